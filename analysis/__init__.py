@@ -0,0 +1,17 @@
+"""
+分析模块
+包含多模型排名聚合、跨职位统计、配置模式评估等批量分析功能
+"""
+
+from .aggregation import RankAggregator, RankTensor, METHODS
+from .evaluation import ModeScore, score_mode
+
+__all__ = ['RankAggregator', 'RankTensor', 'METHODS', 'ModeScore', 'score_mode', 'PositionAnalytics']
+
+
+def __getattr__(name):
+    # analytics 依赖 pandas，且可通过 python -m analysis.analytics 独立运行，按需导入
+    if name == 'PositionAnalytics':
+        from .analytics import PositionAnalytics
+        return PositionAnalytics
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,251 @@
+"""
+经历排名聚合引擎
+把一批职位的多模型排名整理为 (职位 × 经历 × 模型) 的名次张量，
+一次性计算共识排名，支持加权名次和、Borda、倒数排名融合(RRF)和近似Kemeny
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+METHODS = ('rank_sum', 'borda', 'rrf', 'kemeny')
+
+# 显示用的分数名称
+SCORE_LABELS = {
+    'rank_sum': '总分',
+    'borda': 'Borda分',
+    'rrf': 'RRF分',
+    'kemeny': '两两胜场',
+}
+
+# 计算近似Kemeny时每批处理的职位数，控制 (职位 × 经历 × 经历) 矩阵的内存
+_KEMENY_CHUNK = 256
+
+
+class RankTensor:
+    """
+    一批职位的排名张量
+
+    Attributes:
+        ranks: (P, E, M) 名次，未被该模型选中为 NaN
+        model_ok: (P, M) 该模型在该职位上是否返回了有效排名
+        model_present: (P, M) 该职位的结果中是否包含该模型（含调用失败的）
+        first_seen: (P, E) 经历在该职位结果中首次出现的次序，分数相同时按此排序；未出现为 inf
+        exp_ids: 经历ID，对应第二维
+        models: 模型名，对应第三维
+        justifications: 每个职位 {经历ID: {模型: (名次, 理由)}}
+    """
+
+    def __init__(self, ranking_batch: List[Dict[str, Any]]):
+        self.models: List[str] = []
+        self.exp_ids: List[str] = []
+        model_index: Dict[str, int] = {}
+        exp_index: Dict[str, int] = {}
+        entries: List[Tuple[int, int, int, float]] = []
+        ok_entries: List[Tuple[int, int]] = []
+        present_entries: List[Tuple[int, int]] = []
+        seen_entries: List[Tuple[int, int, int]] = []
+        self.justifications: List[Dict[str, Dict[str, Tuple[Any, str]]]] = []
+
+        for p, ranking_results in enumerate(ranking_batch):
+            position_justifications: Dict[str, Dict[str, Tuple[Any, str]]] = {}
+            self.justifications.append(position_justifications)
+            if not isinstance(ranking_results, dict):
+                continue
+            for llm_name, result in ranking_results.items():
+                # ranking_results 整体失败时形如 {"error": "..."}，跳过非字典值
+                if not isinstance(result, dict):
+                    continue
+                m = model_index.setdefault(llm_name, len(model_index))
+                if m == len(self.models):
+                    self.models.append(llm_name)
+                present_entries.append((p, m))
+                if "error" in result:
+                    continue
+                ok_entries.append((p, m))
+                for item in result.get("ranked_experiences", []):
+                    exp_id = item.get("id")
+                    if exp_id is None:
+                        continue
+                    rank = item.get("rank", 999)
+                    e = exp_index.setdefault(exp_id, len(exp_index))
+                    if e == len(self.exp_ids):
+                        self.exp_ids.append(exp_id)
+                    entries.append((p, e, m, rank))
+                    if exp_id not in position_justifications:
+                        seen_entries.append((p, e, len(position_justifications)))
+                    position_justifications.setdefault(exp_id, {})[llm_name] = (rank, item.get("justification", ""))
+
+        shape = (len(ranking_batch), len(self.exp_ids), len(self.models))
+        self.ranks = np.full(shape, np.nan)
+        if entries:
+            p_idx, e_idx, m_idx, values = zip(*entries)
+            self.ranks[p_idx, e_idx, m_idx] = np.asarray(values, dtype=float)
+        self.model_ok = np.zeros(shape[::2], dtype=bool)
+        if ok_entries:
+            self.model_ok[tuple(zip(*ok_entries))] = True
+        self.model_present = np.zeros(shape[::2], dtype=bool)
+        if present_entries:
+            self.model_present[tuple(zip(*present_entries))] = True
+        self.first_seen = np.full(shape[:2], np.inf)
+        if seen_entries:
+            p_idx, e_idx, order = zip(*seen_entries)
+            self.first_seen[p_idx, e_idx] = order
+
+    @property
+    def ranked(self) -> np.ndarray:
+        """(P, E, M) 该模型是否选中了该经历"""
+        return ~np.isnan(self.ranks)
+
+    @property
+    def candidates(self) -> np.ndarray:
+        """(P, E) 至少被一个模型选中的经历"""
+        return self.ranked.any(axis=2)
+
+
+class RankAggregator:
+    """多模型排名共识计算"""
+
+    def __init__(self, method: str = 'rank_sum', weights: Optional[Dict[str, float]] = None,
+                 missing_penalty: float = 5, top_k: int = 6, rrf_k: float = 60):
+        """
+        Args:
+            method: 聚合方法，见 METHODS
+            weights: 每个模型的权重，未配置的模型权重为 1
+            missing_penalty: rank_sum 中模型未选中某经历时计入的名次
+            top_k: 每个职位保留的共识经历数
+            rrf_k: RRF 的平滑常数
+        """
+        if method not in METHODS:
+            raise ValueError(f"未知的聚合方法: {method}，可选: {', '.join(METHODS)}")
+        self.method = method
+        self.weights = weights or {}
+        self.missing_penalty = missing_penalty
+        self.top_k = top_k
+        self.rrf_k = rrf_k
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> 'RankAggregator':
+        """根据 prompts.yaml 中的 aggregation 配置创建"""
+        config = config or {}
+        return cls(
+            method=config.get('method', 'rank_sum'),
+            weights=config.get('weights'),
+            missing_penalty=config.get('missing_penalty', 5),
+            top_k=config.get('top_k', 6),
+            rrf_k=config.get('rrf_k', 60),
+        )
+
+    @property
+    def score_label(self) -> str:
+        return SCORE_LABELS[self.method]
+
+    def _weight_vector(self, models: List[str]) -> np.ndarray:
+        return np.array([float(self.weights.get(name, 1.0)) for name in models])
+
+    def _rank_sum(self, tensor: RankTensor, w: np.ndarray) -> np.ndarray:
+        # 与原报告一致：结果中出现的每个模型（含调用失败的）未选中时都计 missing_penalty
+        filled = np.where(tensor.ranked, tensor.ranks, self.missing_penalty)
+        filled = np.where(tensor.model_present[:, None, :], filled, 0.0)
+        return (filled * w).sum(axis=2)
+
+    def _borda(self, tensor: RankTensor, w: np.ndarray) -> np.ndarray:
+        # 每个模型的名单长度（通常为4），第 r 名得 n + 1 - r 分
+        list_len = tensor.ranked.sum(axis=1, keepdims=True)
+        points = np.where(tensor.ranked, list_len + 1 - np.nan_to_num(tensor.ranks), 0.0)
+        return (np.clip(points, 0, None) * w).sum(axis=2)
+
+    def _rrf(self, tensor: RankTensor, w: np.ndarray) -> np.ndarray:
+        points = np.where(tensor.ranked, 1.0 / (self.rrf_k + np.nan_to_num(tensor.ranks)), 0.0)
+        return (points * w).sum(axis=2)
+
+    def _pairwise_wins(self, tensor: RankTensor, w: np.ndarray) -> np.ndarray:
+        """
+        (P, E, E) 加权两两偏好：wins[p, a, b] 为认为 a 优于 b 的模型权重和
+        （未被模型选中的经历视为排在所有选中经历之后）
+        """
+        positions, experiences, _ = tensor.ranks.shape
+        wins = np.zeros((positions, experiences, experiences), dtype=np.float32)
+        ranks = np.where(tensor.ranked, tensor.ranks, np.inf)
+        for start in range(0, positions, _KEMENY_CHUNK):
+            chunk = ranks[start:start + _KEMENY_CHUNK]
+            ok = tensor.model_ok[start:start + _KEMENY_CHUNK]
+            # (p, a, b, m): 模型 m 认为 a 优于 b
+            prefers = chunk[:, :, None, :] < chunk[:, None, :, :]
+            prefers &= ok[:, None, None, :]
+            wins[start:start + _KEMENY_CHUNK] = (prefers * w).sum(axis=3)
+        return wins
+
+    def _kemeny(self, tensor: RankTensor, w: np.ndarray) -> Tuple[np.ndarray, List[List[int]]]:
+        """
+        近似Kemeny共识：以两两净胜（Copeland加权）得到初始顺序，
+        再做相邻交换的局部搜索，减少与各模型排名的两两分歧
+        """
+        wins = self._pairwise_wins(tensor, w)
+        scores = (wins - wins.transpose(0, 2, 1)).sum(axis=2)
+        candidates = tensor.candidates
+        orders = []
+        for p in range(wins.shape[0]):
+            idx = np.flatnonzero(candidates[p])
+            order = list(idx[np.lexsort((tensor.first_seen[p, idx], -scores[p, idx]))])
+            improved = True
+            while improved:
+                improved = False
+                for i in range(len(order) - 1):
+                    a, b = order[i], order[i + 1]
+                    if wins[p, b, a] > wins[p, a, b]:
+                        order[i], order[i + 1] = b, a
+                        improved = True
+            orders.append(order)
+        return scores, orders
+
+    def aggregate(self, ranking_batch: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """
+        计算一批职位的共识排名
+
+        Args:
+            ranking_batch: 每个职位的 ranking_results（{模型: 排名结果}）
+
+        Returns:
+            List[List[Dict]]: 每个职位按共识排序的前 top_k 条经历，
+                每条包含 id、score、llm_rankings（{模型: {rank, justification}}）
+        """
+        tensor = RankTensor(ranking_batch)
+        if not tensor.exp_ids:
+            return [[] for _ in ranking_batch]
+
+        w = self._weight_vector(tensor.models)
+        candidates = tensor.candidates
+
+        if self.method == 'kemeny':
+            scores, orders = self._kemeny(tensor, w)
+        else:
+            if self.method == 'rank_sum':
+                # 分数越低越好
+                scores = self._rank_sum(tensor, w)
+                keyed = np.where(candidates, scores, np.inf)
+            else:
+                scores = self._borda(tensor, w) if self.method == 'borda' else self._rrf(tensor, w)
+                keyed = np.where(candidates, -scores, np.inf)
+            # 分数相同时按经历在该职位结果中首次出现的顺序
+            sorted_idx = np.lexsort((tensor.first_seen, keyed))[:, :self.top_k]
+            counts = candidates.sum(axis=1)
+            orders = [list(sorted_idx[p, :min(self.top_k, counts[p])]) for p in range(len(ranking_batch))]
+
+        consensus = []
+        for p, order in enumerate(orders):
+            justifications = tensor.justifications[p]
+            position_consensus = []
+            for e in order[:self.top_k]:
+                exp_id = tensor.exp_ids[e]
+                score = float(scores[p, e])
+                position_consensus.append({
+                    "id": exp_id,
+                    "score": round(score, 4) if self.method == 'rrf' else round(score, 2),
+                    "llm_rankings": {
+                        llm_name: {"rank": rank, "justification": justification}
+                        for llm_name, (rank, justification) in justifications.get(exp_id, {}).items()
+                    },
+                })
+            consensus.append(position_consensus)
+        return consensus
@@ -0,0 +1,233 @@
+"""
+跨职位分析
+基于结果存储中的历史筛选和排名结果做聚合统计，不产生任何LLM调用：
+- 经历需求矩阵：每条经历进入各模型 Top 4 的次数
+- 技能缺口：JD中频繁出现、但经历库 tech_stack 中没有的技术词
+- 匹配度分布：按公司、地点统计的匹配度
+"""
+
+import os
+import re
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.experience_index import ExperienceIndex
+from utils.result_store import ResultStore
+
+TOP_N = 4
+
+# 默认技术词表；可通过 config.json 的 analytics.tech_vocabulary 追加
+# （小写匹配，因此不收录 Go、R、Swift 这类与普通英文单词同形的词）
+DEFAULT_TECH_VOCABULARY = [
+    "Python", "Java", "C++", "C#", "Golang", "Rust", "Scala", "Kotlin", "TypeScript",
+    "JavaScript", "Ruby", "PHP", "MATLAB", "SQL", "Bash",
+    "React", "Angular", "Vue", "Node.js", "Django", "Flask", "FastAPI", "Spring Boot", ".NET",
+    "GraphQL", "RESTful", "gRPC", "Kafka", "Spark", "Hadoop", "Flink", "Airflow", "dbt", "Snowflake",
+    "Databricks", "BigQuery", "Redshift", "PostgreSQL", "MySQL", "MongoDB", "Redis", "Cassandra",
+    "DynamoDB", "Elasticsearch", "AWS", "GCP", "Azure", "Docker", "Kubernetes", "Terraform", "Ansible",
+    "Jenkins", "CI/CD", "Linux", "Git",
+    "PyTorch", "TensorFlow", "JAX", "Keras", "Scikit-learn", "XGBoost", "Pandas", "NumPy", "OpenCV",
+    "CUDA", "TensorRT", "Triton", "ONNX", "Hugging Face", "LangChain", "LLM", "RAG", "NLP",
+    "Computer Vision", "Reinforcement Learning", "Deep Learning", "Machine Learning", "MLOps",
+    "Tableau", "Power BI", "A/B Testing", "Statistics",
+]
+
+
+def _build_term_regex(terms: Iterable[str]) -> re.Pattern:
+    """把词表编译成一个按词边界匹配的正则（长词优先，避免 Spring 抢先匹配 Spring Boot）"""
+    ordered = sorted({term.lower() for term in terms}, key=len, reverse=True)
+    alternation = "|".join(re.escape(term) for term in ordered)
+    return re.compile(r'(?<![\w])(?:' + alternation + r')(?![\w])')
+
+
+class PositionAnalytics:
+    """跨职位聚合分析"""
+
+    def __init__(self, store: ResultStore, experiences: List[Dict[str, Any]],
+                 tech_vocabulary: Optional[List[str]] = None, candidate: str = ""):
+        """
+        Args:
+            store: 结果存储
+            experiences: 当前经历库
+            tech_vocabulary: 额外的技术词
+            candidate: 候选人（经历库文件名，不含扩展名）
+        """
+        self.experience_index = ExperienceIndex(experiences)
+        positions, rankings = store.load_history(candidate)
+
+        self.positions = pd.DataFrame(
+            [
+                {
+                    "jd_hash": key,
+                    "company": info.get("company", ""),
+                    "location": info.get("location", ""),
+                    "position": info.get("position", ""),
+                    "job_description": info.get("job_description", ""),
+                    "rejected": bool(screening) and bool(
+                        screening.get("citizenship_required") or screening.get("senior_level_required")
+                    ),
+                }
+                for key, info, screening in positions
+            ],
+            columns=["jd_hash", "company", "location", "position", "job_description", "rejected"],
+        )
+
+        ranking_rows = []
+        match_rows = []
+        for key, model, result in rankings:
+            if "error" in result:
+                continue
+            match_rows.append((key, model, result.get("match_percentage")))
+            for item in result.get("ranked_experiences", []):
+                rank = item.get("rank")
+                if isinstance(rank, int) and rank <= TOP_N:
+                    ranking_rows.append((key, model, item.get("id"), rank))
+        self.rankings = pd.DataFrame(ranking_rows, columns=["jd_hash", "model", "exp_id", "rank"])
+        self.matches = pd.DataFrame(match_rows, columns=["jd_hash", "model", "match_percentage"])
+
+        vocabulary = list(DEFAULT_TECH_VOCABULARY) + list(tech_vocabulary or [])
+        experience_terms = set().union(*self.experience_index.terms.values()) if self.experience_index.terms else set()
+        self.experience_terms = experience_terms
+        self._term_regex = _build_term_regex(vocabulary + sorted(experience_terms))
+
+    def experience_demand(self) -> pd.DataFrame:
+        """
+        经历需求矩阵：每条经历进入各模型 Top 4 的次数（稀疏计数 → 经历 × 模型）
+
+        Returns:
+            pd.DataFrame: 行为经历ID，列为各模型次数、合计、进入任一模型Top4的职位占比
+        """
+        if self.rankings.empty:
+            return pd.DataFrame(columns=["total", "position_share"])
+        exp_codes, exp_ids = pd.factorize(self.rankings["exp_id"])
+        model_codes, models = pd.factorize(self.rankings["model"])
+        counts = np.zeros((len(exp_ids), len(models)), dtype=np.int64)
+        np.add.at(counts, (exp_codes, model_codes), 1)
+
+        demand = pd.DataFrame(counts, index=pd.Index(exp_ids, name="exp_id"), columns=list(models))
+        demand["total"] = counts.sum(axis=1)
+        ranked_positions = self.rankings["jd_hash"].nunique()
+        per_position = self.rankings.drop_duplicates(["jd_hash", "exp_id"])["exp_id"].value_counts()
+        demand["position_share"] = (per_position.reindex(demand.index).fillna(0) / max(ranked_positions, 1)).round(4)
+
+        # 经历库中从未入选的经历也列出，便于发现"冷门"经历
+        unused = [exp_id for exp_id in self.experience_index.hashes if exp_id not in demand.index]
+        if unused:
+            demand = pd.concat([demand, pd.DataFrame(0, index=pd.Index(unused, name="exp_id"), columns=demand.columns)])
+        return demand.sort_values("total", ascending=False)
+
+    def skill_gaps(self, min_positions: int = 1) -> pd.DataFrame:
+        """
+        技能缺口：JD中出现、但经历库中没有的技术词，按出现的职位数排序
+
+        Returns:
+            pd.DataFrame: term, positions（出现该词的职位数）, share（占比）
+        """
+        if self.positions.empty:
+            return pd.DataFrame(columns=["term", "positions", "share"])
+        # 向量化抽词：每个JD匹配一次合并后的正则，按 (职位, 词) 去重后计数
+        terms = self.positions["job_description"].str.lower().str.findall(self._term_regex)
+        pairs = terms.explode().dropna().rename("term").reset_index()
+        document_frequency = pairs.drop_duplicates()["term"].value_counts()
+
+        gaps = document_frequency[~document_frequency.index.isin(self.experience_terms)]
+        gaps = gaps[gaps >= min_positions]
+        result = gaps.rename_axis("term").reset_index(name="positions")
+        result["share"] = (result["positions"] / len(self.positions)).round(4)
+        return result
+
+    def _position_match(self) -> pd.DataFrame:
+        """每个职位的平均匹配度（各模型均值），附带公司和地点"""
+        if self.matches.empty:
+            return pd.DataFrame(columns=["jd_hash", "match_percentage", "company", "location"])
+        matches = self.matches.copy()
+        matches["match_percentage"] = pd.to_numeric(matches["match_percentage"], errors="coerce")
+        per_position = matches.groupby("jd_hash", as_index=False)["match_percentage"].mean()
+        return per_position.merge(self.positions[["jd_hash", "company", "location"]], on="jd_hash", how="left")
+
+    def match_distribution(self, by: str) -> pd.DataFrame:
+        """
+        按公司或地点统计匹配度分布
+
+        Args:
+            by: "company" 或 "location"
+        """
+        per_position = self._position_match()
+        if per_position.empty:
+            return pd.DataFrame(columns=["count", "mean", "p25", "median", "p75"])
+        grouped = per_position.groupby(by)["match_percentage"]
+        distribution = pd.DataFrame({
+            "count": grouped.count(),
+            "mean": grouped.mean().round(1),
+            "p25": grouped.quantile(0.25).round(1),
+            "median": grouped.median().round(1),
+            "p75": grouped.quantile(0.75).round(1),
+        })
+        return distribution.sort_values("count", ascending=False)
+
+    def summary(self) -> Dict[str, Any]:
+        """汇总统计，供报告渲染"""
+        return {
+            "total_positions": len(self.positions),
+            "rejected_positions": int(self.positions["rejected"].sum()) if not self.positions.empty else 0,
+            "ranked_positions": self.rankings["jd_hash"].nunique(),
+            "experience_demand": self.experience_demand(),
+            "skill_gaps": self.skill_gaps(),
+            "match_by_company": self.match_distribution("company"),
+            "match_by_location": self.match_distribution("location"),
+        }
+
+    def export_csv(self, output_dir: str, summary: Optional[Dict[str, Any]] = None) -> List[str]:
+        """把各项统计导出为CSV，返回生成的文件路径"""
+        summary = summary or self.summary()
+        os.makedirs(output_dir, exist_ok=True)
+        paths = []
+        for name in ("experience_demand", "skill_gaps", "match_by_company", "match_by_location"):
+            path = os.path.join(output_dir, f"{name}.csv")
+            frame = summary[name]
+            frame.to_csv(path, index=name != "skill_gaps", encoding="utf-8-sig")
+            paths.append(path)
+        return paths
+
+
+def main():
+    """独立运行：只读结果存储，不调用任何LLM"""
+    import argparse
+    import json
+
+    from report_generator import MarkdownReportGenerator
+
+    parser = argparse.ArgumentParser(description="跨职位分析（基于历史结果）")
+    parser.add_argument("--store", default="results.db")
+    parser.add_argument("--experience", "-e", default="experiences.json")
+    parser.add_argument("--output-dir", "-o", default="analytics")
+    parser.add_argument("--config", "-c", help="config.json，读取 analytics.tech_vocabulary")
+    parser.add_argument("--candidate", help="候选人名（经历库文件名，不含扩展名），默认取 --experience 的文件名")
+    args = parser.parse_args()
+
+    with open(args.experience, 'r', encoding='utf-8') as f:
+        experiences = json.load(f)
+    vocabulary = None
+    if args.config:
+        with open(args.config, 'r', encoding='utf-8') as f:
+            vocabulary = json.load(f).get('analytics', {}).get('tech_vocabulary')
+
+    candidate = args.candidate or os.path.splitext(os.path.basename(args.experience))[0]
+    store = ResultStore(args.store)
+    try:
+        analytics = PositionAnalytics(store, experiences, vocabulary, candidate)
+        summary = analytics.summary()
+    finally:
+        store.close()
+
+    paths = analytics.export_csv(args.output_dir, summary)
+    report_path = os.path.join(args.output_dir, "analytics_report.md")
+    with open(report_path, 'w', encoding='utf-8') as f:
+        f.write(MarkdownReportGenerator().generate_analytics_section(summary))
+    print(f"✅ 已生成: {', '.join(paths + [report_path])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+速度与质量评估指标
+把某个配置模式（路由、排名模型子集、聚合方法等）的分析结果与参考结果（完整流水线）逐职位比较：
+- 筛选：以"不推荐投递"为正类的精确率和召回率
+- 排名：共识前 K 条经历与参考的重合率，以及两者共识排名的 Spearman 秩相关
+"""
+
+from dataclasses import dataclass
+from statistics import mean
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from analysis.aggregation import RankAggregator
+from models import PositionResult
+
+# 简历上通常放的经历数
+TOP_K = 4
+
+
+@dataclass(slots=True)
+class ModeScore:
+    """一个模式相对参考结果的质量和开销（没有可比较的职位时质量指标为 None）"""
+    mode: str
+    positions: int
+    screening_precision: Optional[float]
+    screening_recall: Optional[float]
+    top_k_overlap: Optional[float]
+    rank_correlation: Optional[float]
+    requests: int = 0
+    retries: int = 0
+    tokens: int = 0
+    seconds: float = 0.0
+
+
+def screening_scores(reference: Dict[Hashable, bool],
+                     predicted: Dict[Hashable, bool]) -> Tuple[Optional[float], Optional[float]]:
+    """
+    以"不推荐投递"为正类计算精确率和召回率，只比较两边都有筛选结论的职位
+
+    Returns:
+        (precision, recall): 没有预测为拒绝 / 参考中没有拒绝的职位时对应值为 None
+    """
+    keys = reference.keys() & predicted.keys()
+    true_positive = sum(1 for key in keys if reference[key] and predicted[key])
+    predicted_positive = sum(1 for key in keys if predicted[key])
+    actual_positive = sum(1 for key in keys if reference[key])
+    precision = true_positive / predicted_positive if predicted_positive else None
+    recall = true_positive / actual_positive if actual_positive else None
+    return precision, recall
+
+
+def top_k_overlap(reference_ids: List[str], predicted_ids: List[str], k: int = TOP_K) -> Optional[float]:
+    """参考前 k 条经历中被预测前 k 条覆盖的比例"""
+    expected = set(reference_ids[:k])
+    if not expected:
+        return None
+    return len(expected & set(predicted_ids[:k])) / len(expected)
+
+
+def spearman(reference_ids: List[str], predicted_ids: List[str]) -> Optional[float]:
+    """
+    两个排名列表的 Spearman 秩相关
+
+    在两个列表的并集上比较；某一方没有列出的经历并列排在该方的最后
+    （取并列名次的平均值）。少于两条经历或某一方名次全部相同时返回 None。
+    """
+    items = list(dict.fromkeys(reference_ids + predicted_ids))
+    if len(items) < 2:
+        return None
+
+    def ranks(ids: List[str]) -> List[float]:
+        position = {exp_id: rank for rank, exp_id in enumerate(ids, 1)}
+        missing = len(items) - len(position)
+        tied = len(position) + (missing + 1) / 2
+        return [position.get(exp_id, tied) for exp_id in items]
+
+    x, y = ranks(reference_ids), ranks(predicted_ids)
+    mean_x, mean_y = mean(x), mean(y)
+    covariance = sum((a - mean_x) * (b - mean_y) for a, b in zip(x, y))
+    spread_x = sum((a - mean_x) ** 2 for a in x) ** 0.5
+    spread_y = sum((b - mean_y) ** 2 for b in y) ** 0.5
+    if not spread_x or not spread_y:
+        return None
+    return covariance / (spread_x * spread_y)
+
+
+def _consensus_ids(results: Dict[Hashable, PositionResult], keys: List[Hashable],
+                   aggregator: RankAggregator, candidate: str) -> Dict[Hashable, List[str]]:
+    consensus = aggregator.aggregate([results[key].ranking_payloads(candidate) for key in keys])
+    return {key: [item["id"] for item in items] for key, items in zip(keys, consensus)}
+
+
+def score_mode(mode: str, reference: Dict[Hashable, PositionResult], predicted: Dict[Hashable, PositionResult],
+               reference_aggregator: RankAggregator, mode_aggregator: RankAggregator,
+               candidate: str = "", k: int = TOP_K) -> ModeScore:
+    """
+    比较一个模式与参考结果
+
+    排名指标只在两边都推荐投递且都有排名的职位上计算（筛选分歧已计入筛选指标），
+    参考和模式各自用自己的聚合配置计算共识排名
+
+    Args:
+        mode: 模式名
+        reference: 职位标识 -> 参考结果
+        predicted: 职位标识 -> 该模式的结果
+        reference_aggregator: 参考结果的聚合器
+        mode_aggregator: 该模式配置的聚合器
+        candidate: 比较哪个候选人的排名
+        k: 比较共识前几条经历
+    """
+    screened = {
+        key for key in reference.keys() & predicted.keys()
+        if reference[key].screening is not None and predicted[key].screening is not None
+        and reference[key].screening.error is None and predicted[key].screening.error is None
+    }
+    precision, recall = screening_scores(
+        {key: reference[key].rejected for key in screened},
+        {key: predicted[key].rejected for key in screened},
+    )
+
+    ranked = [
+        key for key in screened
+        if not reference[key].rejected and not predicted[key].rejected
+        and reference[key].valid_rankings(candidate) and predicted[key].valid_rankings(candidate)
+    ]
+    expected = _consensus_ids(reference, ranked, reference_aggregator, candidate)
+    actual = _consensus_ids(predicted, ranked, mode_aggregator, candidate)
+    overlaps = [value for value in (top_k_overlap(expected[key], actual[key], k) for key in ranked)
+                if value is not None]
+    correlations = [value for value in (spearman(expected[key], actual[key]) for key in ranked)
+                    if value is not None]
+
+    return ModeScore(
+        mode=mode,
+        positions=len(predicted),
+        screening_precision=precision,
+        screening_recall=recall,
+        top_k_overlap=mean(overlaps) if overlaps else None,
+        rank_correlation=mean(correlations) if correlations else None,
+    )
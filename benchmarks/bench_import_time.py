@@ -0,0 +1,94 @@
+"""
+CLI 冷启动基准
+用 python -X importtime 运行 main.py --help，统计导入耗时并检查启动路径上没有导入重依赖：
+- 总导入耗时和进程墙钟时间（多次运行取中位数）
+- 累计耗时最高的顶层模块
+- pandas / numpy / openai / yaml / dotenv / aiohttp 不应在 --help 时被导入
+
+用法: python benchmarks/bench_import_time.py [运行次数] [--max-ms 毫秒]
+超过 --max-ms 或导入了重依赖时以非零状态退出，可在CI中作为冷启动回归检查
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# --help 路径上不应出现的慢速依赖（只在分析、出报告或调用API时导入）
+HEAVY_MODULES = ("pandas", "numpy", "openai", "yaml", "dotenv", "aiohttp")
+
+
+def _parse_importtime(stderr: str) -> List[Tuple[str, int, int, int]]:
+    """
+    解析 -X importtime 输出（每行形如 "import time:  self | cumulative |   name"）
+
+    Returns:
+        [(模块名, 自身耗时us, 累计耗时us, 嵌套层级)]，按输出顺序
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        # 模块名前的缩进表示嵌套层级：顶层导入前有一个空格，每深一层多两个空格
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def run_once() -> Tuple[float, List[Tuple[str, int, int, int]]]:
+    """运行一次 main.py --help，返回 (墙钟秒数, 导入记录)"""
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "main.py", "--help"],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    return time.perf_counter() - started, _parse_importtime(completed.stderr)
+
+
+def _top_level(rows) -> Dict[str, int]:
+    """每个顶层导入（层级最浅）的累计耗时（us）"""
+    return {name: cumulative for name, _, cumulative, depth in rows if depth == 0}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="CLI 冷启动基准")
+    parser.add_argument("runs", type=int, nargs="?", default=5)
+    parser.add_argument("--max-ms", type=float, help="导入耗时中位数上限（毫秒），超过时失败")
+    args = parser.parse_args()
+
+    walls, totals, last_rows = [], [], []
+    for _ in range(args.runs):
+        wall, rows = run_once()
+        walls.append(wall)
+        totals.append(sum(_top_level(rows).values()) / 1000)
+        last_rows = rows
+
+    total_ms = statistics.median(totals)
+    print(f"main.py --help ({args.runs} 次中位数): 导入 {total_ms:.1f} ms, 进程墙钟 {statistics.median(walls) * 1000:.1f} ms")
+
+    print("\n累计耗时最高的顶层导入")
+    for name, cumulative in sorted(_top_level(last_rows).items(), key=lambda item: -item[1])[:10]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    imported = {name.split(".")[0] for name, _, _, _ in last_rows}
+    heavy = [name for name in HEAVY_MODULES if name in imported]
+    failed = False
+    if heavy:
+        print(f"\n❌ --help 时导入了重依赖: {', '.join(heavy)}")
+        failed = True
+    else:
+        print(f"\n✅ 未导入重依赖 ({', '.join(HEAVY_MODULES)})")
+    if args.max_ms is not None and total_ms > args.max_ms:
+        print(f"❌ 导入耗时 {total_ms:.1f} ms 超过上限 {args.max_ms:.0f} ms")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
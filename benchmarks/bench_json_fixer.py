@@ -0,0 +1,93 @@
+"""
+JSON修复吞吐基准
+在一组典型的畸形LLM响应上，比较单遍容错解析 JSONFixer.parse 与原实现
+（多轮正则 + 最多三次 json.loads，再由调用方解析两次）的吞吐和恢复率
+
+用法: python benchmarks/bench_json_fixer.py [重复次数]
+"""
+
+import os
+import re
+import sys
+import json
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from utils.json_fixer import JSONFixer
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "malformed_responses.json")
+
+
+def _legacy_fix_json(text: str) -> str:
+    """原实现的 fix_json"""
+    if not text:
+        return text
+    text = re.sub(r'```json\s*', '', text)
+    text = re.sub(r'```\s*', '', text)
+    text = text.strip()
+    try:
+        json.loads(text)
+        return text
+    except json.JSONDecodeError:
+        pass
+    text = re.sub(r',\s*([}\]])', r'\1', text)
+    try:
+        json.loads(text)
+        return text
+    except json.JSONDecodeError:
+        return text
+
+
+def legacy_pipeline(text: str):
+    """原调用链：fix_json → _call_with_retry 校验 → screen_jd/rank_experiences 再解析"""
+    fixed = _legacy_fix_json(text)
+    json.loads(fixed)
+    return json.loads(fixed)
+
+
+def run(parse, corpus: list, repeat: int):
+    recovered = {}
+    for sample in corpus:
+        try:
+            parse(sample["text"])
+            ok = True
+        except (json.JSONDecodeError, ValueError):
+            ok = False
+        recovered.setdefault(sample["kind"], []).append(ok)
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for sample in corpus:
+            try:
+                parse(sample["text"])
+            except (json.JSONDecodeError, ValueError):
+                pass
+    elapsed = time.perf_counter() - start
+    return elapsed, recovered
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    with open(CORPUS_PATH, 'r', encoding='utf-8') as f:
+        corpus = json.load(f)
+    total = repeat * len(corpus)
+
+    # 原实现也能解析的样本（合法JSON、代码块、多余逗号），用于同口径比较吞吐
+    common = [sample for sample in corpus if sample["kind"] in ("valid", "code_fence", "trailing_comma")]
+
+    print(f"全部样本 {len(corpus)} 条 × {repeat} 次:")
+    for name, parse in (("原实现", legacy_pipeline), ("单遍容错解析", JSONFixer.parse)):
+        elapsed, recovered = run(parse, corpus, repeat)
+        ok = sum(sum(v) for v in recovered.values())
+        detail = ", ".join(f"{kind} {sum(v)}/{len(v)}" for kind, v in recovered.items())
+        print(f"  {name}: {total / elapsed:,.0f} 响应/秒, 成功解析 {ok}/{len(corpus)} ({detail})")
+
+    print(f"双方都能解析的样本 {len(common)} 条 × {repeat} 次:")
+    for name, parse in (("原实现", legacy_pipeline), ("单遍容错解析", JSONFixer.parse)):
+        elapsed, _ = run(parse, common, repeat)
+        print(f"  {name}: {repeat * len(common) / elapsed:,.0f} 响应/秒")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+剖析钩子开销基准
+比较未装饰、装饰但未启用剖析、启用剖析三种情况下每次调用的耗时，
+以及在真实热点（JSONFixer.parse 解析一个合法响应）上的相对开销
+
+用法: python benchmarks/bench_profiler.py [调用次数]
+"""
+
+import asyncio
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from utils.json_fixer import JSONFixer
+from utils.profiler import pad_display, profiled, profiler
+
+RESPONSE = '{"match_percentage": 82, "ranked_experiences": [{"id": "exp_1", "rank": 1, "justification": "ok"}]}'
+
+
+def plain(value):
+    return value
+
+
+@profiled("bench.sync")
+def decorated(value):
+    return value
+
+
+async def plain_async(value):
+    return value
+
+
+@profiled("bench.async")
+async def decorated_async(value):
+    return value
+
+
+def _per_call_ns(func, number: int) -> float:
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e9
+
+
+def _async_per_call_ns(func, number: int) -> float:
+    async def loop():
+        for _ in range(number):
+            await func(1)
+
+    return min(timeit.repeat(lambda: asyncio.run(loop()), number=1, repeat=5)) / number * 1e9
+
+
+def main(number: int):
+    rows = [
+        ("同步函数", lambda: _per_call_ns(lambda: plain(1), number), lambda: _per_call_ns(lambda: decorated(1), number)),
+        ("协程函数", lambda: _async_per_call_ns(plain_async, number), lambda: _async_per_call_ns(decorated_async, number)),
+        ("JSONFixer.parse", lambda: _per_call_ns(lambda: JSONFixer.parse.__wrapped__(JSONFixer, RESPONSE), number),
+         lambda: _per_call_ns(lambda: JSONFixer.parse(RESPONSE), number)),
+    ]
+    print(f"每次调用耗时 (ns)，{number} 次取最优:")
+    print("  " + pad_display("", 18)
+          + "".join(pad_display(title, 12, right=True) for title in ("未装饰", "未启用", "已启用")))
+    for title, baseline, measured in rows:
+        base = baseline()
+        disabled = measured()
+        profiler.enable()
+        enabled = measured()
+        profiler.disable()
+        print(f"  {pad_display(title, 18)}{base:>12.0f}{disabled:>12.0f}{enabled:>12.0f}"
+              f"   未启用时 {disabled - base:+.0f} ns ({(disabled - base) / base * 100:+.1f}%)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,77 @@
+"""
+Prompt构建微基准
+模拟 N 个职位 × 3 个模型的 prompt 构建，比较预编译模板 + 经历库缓存
+与原始实现（每次拼接模板、str.format、重新格式化经历库）的耗时
+
+用法: python benchmarks/bench_prompt_rendering.py [职位数]
+"""
+
+import os
+import sys
+import json
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from config.prompt_manager import PromptManager
+from utils.experience_formatter import format_experiences_library, format_experiences_library_cached
+from utils.experience_index import ExperienceIndex
+
+LLM_NAMES = ['gemini', 'gpt', 'claude']
+
+
+def _legacy_get_prompt(config: dict, prompt_type: str, llm_name: str, **variables) -> str:
+    """原始实现：每次查字典、拼接模板并 str.format"""
+    prompt_config = config['prompts'][prompt_type]
+    full_template = prompt_config['base_template'] + "\n\n" + prompt_config['output_formats'][llm_name]
+    return full_template.format(**variables)
+
+
+def _make_jds(count: int) -> list:
+    base = "We are hiring a software engineer with Python, PyTorch, Docker and Kubernetes experience. " * 20
+    return [f"[{i}] {base}" for i in range(count)]
+
+
+def bench_legacy(config: dict, jds: list, experiences: list) -> float:
+    start = time.perf_counter()
+    for jd in jds:
+        library = format_experiences_library(experiences)
+        for llm_name in LLM_NAMES:
+            _legacy_get_prompt(config, 'screen_jd', llm_name, jd_text=jd)
+            _legacy_get_prompt(config, 'rank_experiences', llm_name, jd_text=jd, experiences_library=library)
+    return time.perf_counter() - start
+
+
+def bench_compiled(manager: PromptManager, jds: list, experiences: list) -> float:
+    library_key = ExperienceIndex(experiences).layout_hash
+    start = time.perf_counter()
+    for jd in jds:
+        library = format_experiences_library_cached(experiences, library_key)
+        for llm_name in LLM_NAMES:
+            manager.get_prompt('screen_jd', llm_name, jd_text=jd)
+            manager.get_prompt('rank_experiences', llm_name, jd_text=jd, experiences_library=library)
+    return time.perf_counter() - start
+
+
+def main():
+    positions = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+    manager = PromptManager(os.path.join(root, "prompts.yaml"))
+    with open(os.path.join(root, "experiences_example.json"), 'r', encoding='utf-8') as f:
+        experiences = json.load(f)
+    # 放大经历库到约60条，接近真实规模
+    experiences = [dict(exp, id=f"{exp['id']}_{i}") for i in range(12) for exp in experiences]
+    jds = _make_jds(positions)
+
+    legacy = bench_legacy(manager.config, jds, experiences)
+    compiled = bench_compiled(manager, jds, experiences)
+    calls = positions * len(LLM_NAMES) * 2
+
+    print(f"职位数: {positions}, 经历数: {len(experiences)}, prompt 构建次数: {calls}")
+    print(f"原始实现:   {legacy:.3f}s ({legacy / calls * 1e6:.1f}µs/次)")
+    print(f"预编译+缓存: {compiled:.3f}s ({compiled / calls * 1e6:.1f}µs/次)")
+    print(f"加速比: {legacy / compiled:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+分析结果内存与序列化基准
+比较嵌套字典（之前的结果格式）和 models.PositionResult 保存 N 个职位结果的内存占用（tracemalloc），
+以及两者经 JSON 往返（队列保存/读取结果）的耗时。PositionResult 的队列格式是紧凑行，
+往返应不慢于嵌套字典
+
+用法: python benchmarks/bench_result_memory.py [职位数]
+"""
+
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from models import PositionInfo, PositionResult, Ranking, RankedExperience, Routing, Screening
+
+MODELS = ("gemini", "gpt", "claude")
+EXPERIENCES = 12
+
+
+def _legacy_result(i: int) -> dict:
+    """之前 analyze_single_position 返回的嵌套字典"""
+    rankings = {
+        model: {
+            "match_percentage": 60 + i % 40,
+            "ranked_experiences": [
+                {"id": f"exp_{n}", "rank": n + 1, "justification": "关键词重叠"} for n in range(EXPERIENCES)
+            ],
+            "prompt_version": "v2",
+        }
+        for model in MODELS
+    }
+    return {
+        "position_info": {"job_description": "", "company": f"Co{i}", "position": "Engineer",
+                          "location": "Remote", "link": f"https://jobs.example.com/{i}"},
+        "screening_results": {"gemini": {"citizenship_required": False, "senior_level_required": False,
+                                         "expected_graduation_mentioned": False, "expected_graduation_time": None,
+                                         "reason": "无", "prompt_version": "v2"}},
+        "ranking_results": rankings,
+        "rejected": False,
+        "rejection_reasons": [],
+        "routing": {"screening": "gemini", "ranking": list(MODELS)},
+    }
+
+
+def _typed_result(i: int) -> PositionResult:
+    return PositionResult(
+        PositionInfo("", f"Co{i}", "Engineer", "Remote", f"https://jobs.example.com/{i}"),
+        Screening("gemini", reason="无", prompt_version="v2"),
+        {"": {
+            model: Ranking(model, 60 + i % 40, [
+                RankedExperience(f"exp_{n}", n + 1, "关键词重叠") for n in range(EXPERIENCES)
+            ], "v2")
+            for model in MODELS
+        }},
+        routing=Routing("gemini", list(MODELS)),
+    )
+
+
+def _measure_memory(build, count: int) -> int:
+    gc.collect()
+    tracemalloc.start()
+    results = [build(i) for i in range(count)]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del results
+    return current
+
+
+def _best_time(func, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(count: int):
+    legacy_bytes = _measure_memory(_legacy_result, count)
+    typed_bytes = _measure_memory(_typed_result, count)
+    print(f"{count} 个职位 × {len(MODELS)} 个排名模型 × {EXPERIENCES} 条经历:")
+    print(f"  嵌套字典:       {legacy_bytes / 1024 / 1024:8.2f} MiB ({legacy_bytes / count:,.0f} B/职位)")
+    print(f"  PositionResult: {typed_bytes / 1024 / 1024:8.2f} MiB ({typed_bytes / count:,.0f} B/职位)"
+          f"  {(typed_bytes - legacy_bytes) / legacy_bytes * 100:+.1f}%")
+
+    legacy = [_legacy_result(i) for i in range(count)]
+    typed = [_typed_result(i) for i in range(count)]
+    legacy_seconds = _best_time(lambda: [json.loads(json.dumps(r, ensure_ascii=False)) for r in legacy])
+    typed_seconds = _best_time(
+        lambda: [PositionResult.from_dict(json.loads(json.dumps(r.to_dict(), ensure_ascii=False))) for r in typed]
+    )
+    print("JSON 往返耗时:")
+    print(f"  嵌套字典:       {legacy_seconds * 1000:8.1f} ms")
+    print(f"  PositionResult: {typed_seconds * 1000:8.1f} ms (to_dict/from_dict)"
+          f"  {(typed_seconds - legacy_seconds) / legacy_seconds * 100:+.1f}%")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
@@ -0,0 +1,127 @@
+"""
+本地分析服务的延迟和吞吐基准
+使用模拟LLM后端（不访问网络），在本机端口上启动服务并发送请求：
+- 单请求延迟：/screen、/analyze（p50 / p95）
+- 并发吞吐：不同并发上限下 /analyze 的每秒请求数
+- 批量和缓存：包含重复JD的批量 /screen，以及命中结果缓存后的 /analyze
+
+用法: python benchmarks/bench_service.py [模拟延迟秒数] [请求数]
+"""
+
+import asyncio
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import aiohttp
+from aiohttp import web
+
+from llm.manager import UnifiedLLMManager
+from service import ResumeService, create_app
+from utils.result_store import ResultStore
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+SKILLS = ["Python", "PyTorch", "CUDA", "Kafka", "React", "Go", "SQL", "Spark", "Kubernetes", "C++"]
+
+
+def _jd(i: int) -> str:
+    skills = ", ".join(SKILLS[(i + k) % len(SKILLS)] for k in range(3))
+    return f"Position #{i}: software / ML engineer intern. Requirements: {skills}. New grad welcome."
+
+
+def _report(line: str):
+    """输出基准结果（不受 stdout 重定向影响）"""
+    sys.__stdout__.write(line + "\n")
+    sys.__stdout__.flush()
+
+
+def _percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+@contextlib.asynccontextmanager
+async def _serve(latency: float, max_inflight: int, store_path: str = None):
+    """启动一个绑定随机端口的服务，返回基础URL和服务对象"""
+    with open(os.path.join(ROOT, "experiences_example.json"), encoding="utf-8") as f:
+        experiences = json.load(f)
+    llm_manager = UnifiedLLMManager(None, None, None, os.path.join(ROOT, "prompts.yaml"), mock_latency=latency)
+    store = ResultStore(store_path) if store_path else None
+    service = ResumeService(llm_manager, experiences, store, max_inflight)
+    runner = web.AppRunner(create_app(service))
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    try:
+        yield f"http://127.0.0.1:{port}", service
+    finally:
+        await runner.cleanup()
+        if store is not None:
+            store.close()
+
+
+async def _post(session, url, body):
+    started = time.perf_counter()
+    async with session.post(url, json=body) as response:
+        await response.read()
+        assert response.status == 200, response.status
+    return time.perf_counter() - started
+
+
+async def bench_latency(latency: float, requests: int):
+    async with _serve(latency, 8) as (base, _), aiohttp.ClientSession() as session:
+        for endpoint in ("screen", "analyze"):
+            times = [await _post(session, f"{base}/{endpoint}", {"jd": _jd(i)}) for i in range(requests)]
+            _report(f"  /{endpoint:<8} p50 {statistics.median(times) * 1000:7.1f} ms   "
+                    f"p95 {_percentile(times, 0.95) * 1000:7.1f} ms")
+
+
+async def bench_throughput(latency: float, requests: int):
+    for max_inflight in (1, 8, 32):
+        async with _serve(latency, max_inflight) as (base, _), aiohttp.ClientSession() as session:
+            started = time.perf_counter()
+            times = await asyncio.gather(*(_post(session, f"{base}/analyze", {"jd": _jd(i)}) for i in range(requests)))
+            elapsed = time.perf_counter() - started
+            _report(f"  max_inflight={max_inflight:<3} {requests / elapsed:7.1f} req/s   "
+                    f"p95 {_percentile(times, 0.95) * 1000:8.1f} ms")
+
+
+async def bench_batch_and_cache(latency: float, requests: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        async with _serve(latency, 8, os.path.join(tmp, "bench.db")) as (base, service), \
+                aiohttp.ClientSession() as session:
+            # 一半是重复JD（例如同一职位的多个地点）
+            jds = [_jd(i % (requests // 2 or 1)) for i in range(requests)]
+            calls_before = service.llm_manager.call_count
+            batch_time = await _post(session, f"{base}/screen", {"jds": jds[:50]})
+            _report(f"  批量 /screen ({min(len(jds), 50)} 个JD，含重复): {batch_time * 1000:.1f} ms, "
+                    f"LLM调用 {service.llm_manager.call_count - calls_before} 次")
+
+            cold = await _post(session, f"{base}/analyze", {"jd": _jd(10_000)})
+            warm = await _post(session, f"{base}/analyze", {"jd": _jd(10_000)})
+            _report(f"  /analyze 首次 {cold * 1000:.1f} ms, 命中缓存 {warm * 1000:.1f} ms")
+
+
+async def main(latency: float, requests: int):
+    _report(f"模拟LLM平均延迟 {latency * 1000:.0f} ms，每组 {requests} 个请求")
+    sections = [("单请求延迟", bench_latency), ("并发吞吐 (/analyze)", bench_throughput),
+                ("批量与缓存", bench_batch_and_cache)]
+    for title, bench in sections:
+        _report(f"\n{title}")
+        # 客户端的调试输出很多，压测时屏蔽
+        with contextlib.redirect_stdout(io.StringIO()):
+            await bench(latency, requests)
+
+
+if __name__ == "__main__":
+    latency = float(sys.argv[1]) if len(sys.argv) > 1 else 0.05
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+    asyncio.run(main(latency, requests))
@@ -0,0 +1,286 @@
+"""
+速度与质量评估
+在录制的职位集合上，比较各配置模式（排名模型子集、筛选模型、聚合方法等）与完整流水线参考结果的一致程度：
+- 筛选：以"不推荐投递"为正类的精确率 / 召回率
+- 排名：共识 Top-4 与参考的重合率、Spearman 秩相关
+- 开销：LLM 请求数（不含重试）、重试次数、token 数、分析耗时（至少有一个职位在分析的墙钟时间，
+  不含职位之间的调度间隔 scheduler.throttle）
+
+参考结果是完整流水线写入的结果存储（SQLite）；可以用 --record 按参考模式分析职位表生成。
+每个模式是对 prompts.yaml 的覆盖（默认 benchmarks/data/eval_modes.yaml），评估时按该配置运行真实的
+分析流程（ResumeOptimizer），每个模式使用独立的临时结果存储，不复用彼此的结果。
+
+用法:
+  # 生成参考结果（使用真实模型时需要对应的 API 密钥）
+  python benchmarks/eval_modes.py --reference ref.db -e experiences.json --record config.json
+  # 评估各模式；--mock 使用本地模拟LLM离线运行
+  python benchmarks/eval_modes.py --reference ref.db -e experiences.json [--only full one_ranker] [--csv out.csv]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import csv
+import io
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+import yaml
+
+from analysis.aggregation import RankAggregator
+from analysis.evaluation import TOP_K, ModeScore, score_mode
+from llm.manager import UnifiedLLMManager
+from main import ResumeOptimizer, load_candidates
+from models import PositionInfo, PositionResult, Ranking, Screening
+from utils.profiler import pad_display
+from utils.result_store import ResultStore, jd_hash
+
+DEFAULT_MODES = os.path.join(ROOT, "benchmarks", "data", "eval_modes.yaml")
+COLUMNS = ("模式", "职位", "筛选精确率", "筛选召回率", f"Top-{TOP_K}重合", "秩相关", "请求", "重试", "tokens",
+           "耗时(s)")
+
+
+class _BusyClock:
+    """累计至少有一个职位在分析的时间：职位之间的调度间隔（scheduler.throttle）里没有职位在分析时不计入"""
+
+    def __init__(self):
+        self.seconds = 0.0
+        self._active = 0
+        self._started = 0.0
+
+    def wrap(self, analyze):
+        async def timed(*args, **kwargs):
+            if not self._active:
+                self._started = time.perf_counter()
+            self._active += 1
+            try:
+                return await analyze(*args, **kwargs)
+            finally:
+                self._active -= 1
+                if not self._active:
+                    self.seconds += time.perf_counter() - self._started
+        return timed
+
+
+def _report(line: str):
+    """输出评估结果（不受 stdout 重定向影响）"""
+    sys.__stdout__.write(line + "\n")
+    sys.__stdout__.flush()
+
+
+def _merge(base: Dict[str, Any], overlay: Dict[str, Any]) -> Dict[str, Any]:
+    """字典按键递归合并，列表和标量整体替换"""
+    merged = dict(base)
+    for key, value in overlay.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def _mode_prompts(base: Dict[str, Any], overlay: Optional[Dict[str, Any]], directory: str, name: str) -> str:
+    """把模式覆盖合并进 prompts.yaml，写成临时配置文件"""
+    path = os.path.join(directory, f"{name}.yaml")
+    with open(path, "w", encoding="utf-8") as f:
+        yaml.safe_dump(_merge(base, overlay or {}), f, allow_unicode=True, sort_keys=False)
+    return path
+
+
+def _optimizer(prompts_path: str, store_path: str, experience_path: str, mock_latency: Optional[float],
+               concurrency: int) -> ResumeOptimizer:
+    """按模式配置创建分析器（LLM管理器使用该模式的 prompts 配置）"""
+    optimizer = ResumeOptimizer(store_path=store_path, concurrency=concurrency, mock_latency=mock_latency)
+    optimizer.llm_manager = UnifiedLLMManager(
+        os.getenv('GEMINI_API_KEY'), os.getenv('OPENAI_API_KEY'), os.getenv('ANTHROPIC_API_KEY'),
+        prompts_config=prompts_path, mock_latency=mock_latency
+    )
+    with contextlib.redirect_stdout(io.StringIO()):
+        optimizer.candidates = load_candidates(experience_path)
+    return optimizer
+
+
+def _check_environment(optimizer: ResumeOptimizer) -> bool:
+    """检查该模式用到的模型的API密钥，缺少时才输出检查结果"""
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        ok = optimizer.check_environment()
+    if not ok:
+        _report(output.getvalue().rstrip())
+    return ok
+
+
+def load_reference(path: str, experience_path: str, limit: Optional[int] = None) -> Dict[str, PositionResult]:
+    """读取参考结果存储：有筛选结论的职位及其（该经历库对应候选人的）各模型排名"""
+    candidate = os.path.splitext(os.path.basename(experience_path))[0]
+    store = ResultStore(path)
+    try:
+        positions, rankings = store.load_history(candidate)
+        by_position: Dict[str, Dict[str, Ranking]] = {}
+        for key, model, payload in rankings:
+            by_position.setdefault(key, {})[model] = Ranking.from_dict(model, payload)
+        reference = {}
+        for key, info, _ in positions:
+            screening = store.get_screening(key)
+            if screening is None:
+                continue
+            reference[key] = PositionResult(PositionInfo.from_dict(info), Screening.from_dict(*screening),
+                                            {"": by_position.get(key, {})})
+            if limit is not None and len(reference) >= limit:
+                break
+        return reference
+    finally:
+        store.close()
+
+
+def _position_row(info: PositionInfo) -> Dict[str, str]:
+    """还原为职位表的行（get_position_info 读取的列）"""
+    return {"job description": info.job_description, "公司名字": info.company, "岗位名": info.position,
+            "地点": info.location, "link": info.link}
+
+
+async def run_mode(name: str, prompts_path: str, reference: Dict[str, PositionResult], experience_path: str,
+                   mock_latency: Optional[float], concurrency: int, directory: str,
+                   reference_aggregator: RankAggregator) -> Optional[ModeScore]:
+    """按模式配置分析全部参考职位，并与参考结果比较"""
+    optimizer = _optimizer(prompts_path, os.path.join(directory, f"{name}.db"), experience_path,
+                           mock_latency, concurrency)
+    try:
+        if not _check_environment(optimizer):
+            return None
+        rows = [_position_row(result.position) for result in reference.values()]
+        clock = _BusyClock()
+        optimizer.analyze_single_position = clock.wrap(optimizer.analyze_single_position)
+        with contextlib.redirect_stdout(io.StringIO()):
+            results, _ = await optimizer._analyze_positions(rows)
+
+        manager = optimizer.llm_manager
+        score = score_mode(
+            name, reference, {jd_hash(result.position.job_description): result for result in results},
+            reference_aggregator, RankAggregator.from_config(manager.prompt_manager.config.get('aggregation')),
+        )
+        score.requests = manager.call_count - manager.retry_count
+        score.retries = manager.retry_count
+        score.tokens = sum(client.prompt_tokens + client.completion_tokens for client in manager.clients.values())
+        score.seconds = clock.seconds
+        return score
+    finally:
+        await optimizer.llm_manager.aclose()
+        optimizer.store.close()
+
+
+async def record(config_path: str, reference_path: str, prompts_path: str, experience_path: str,
+                 mock_latency: Optional[float], concurrency: int) -> bool:
+    """按参考模式分析职位表，把结果写入参考存储"""
+    optimizer = _optimizer(prompts_path, reference_path, experience_path, mock_latency, concurrency)
+    try:
+        if not _check_environment(optimizer):
+            return False
+        with contextlib.redirect_stdout(io.StringIO()):
+            loaded = optimizer.load_data(config_path, experience_path)
+            if loaded:
+                await optimizer.analyze_all_positions()
+        if not loaded:
+            _report(f"❌ 职位表或经历库加载失败: {config_path}")
+            return False
+        _report(f"📼 已录制参考结果: {len(optimizer.analysis_results)} 个职位 -> {reference_path}")
+        return True
+    finally:
+        await optimizer.llm_manager.aclose()
+        optimizer.store.close()
+
+
+def _format(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value:.3f}"
+
+
+def _row(score: ModeScore) -> List[str]:
+    return [score.mode, str(score.positions), _format(score.screening_precision), _format(score.screening_recall),
+            _format(score.top_k_overlap), _format(score.rank_correlation), str(score.requests), str(score.retries),
+            str(score.tokens), f"{score.seconds:.1f}"]
+
+
+def print_table(scores: List[ModeScore]):
+    widths = [16, 6, 12, 12, 10, 8, 8, 6, 10, 9]
+    _report("".join(pad_display(title, width, right=i > 0)
+                    for i, (title, width) in enumerate(zip(COLUMNS, widths))))
+    for score in scores:
+        _report("".join(pad_display(cell, width, right=i > 0)
+                        for i, (cell, width) in enumerate(zip(_row(score), widths))))
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="速度与质量评估：各配置模式 vs 完整流水线参考结果")
+    parser.add_argument("--reference", required=True, help="参考结果存储 (SQLite)")
+    parser.add_argument("--experience", "-e", required=True, help="经历库（需与录制参考结果时相同）")
+    parser.add_argument("--modes", default=DEFAULT_MODES, help="模式定义文件（对 prompts.yaml 的覆盖）")
+    parser.add_argument("--only", nargs="+", metavar="MODE", help="只评估这些模式")
+    parser.add_argument("--record", metavar="CONFIG", help="先按参考模式分析该配置的职位表，写入参考存储")
+    parser.add_argument("--reference-mode", default="full", help="录制参考结果使用的模式")
+    parser.add_argument("--prompts", default=os.path.join(ROOT, "prompts.yaml"), help="基础 prompts 配置")
+    parser.add_argument("--mock", type=float, metavar="LATENCY", help="使用本地模拟LLM（平均延迟秒数）")
+    parser.add_argument("--concurrency", type=int, default=4, help="每个模式同时分析的职位数")
+    parser.add_argument("--limit", type=int, help="只使用参考存储中的前 N 个职位")
+    parser.add_argument("--csv", metavar="PATH", help="同时把结果写入CSV")
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    with open(args.prompts, encoding="utf-8") as f:
+        base = yaml.safe_load(f)
+    with open(args.modes, encoding="utf-8") as f:
+        modes = yaml.safe_load(f) or {}
+    unknown = [name for name in (args.only or []) + [args.reference_mode] if name not in modes]
+    if unknown:
+        parser.error(f"{args.modes} 中没有模式: {', '.join(unknown)}（可选: {', '.join(modes)}）")
+
+    with tempfile.TemporaryDirectory(prefix="eval-modes-") as directory:
+        reference_prompts = _mode_prompts(base, modes[args.reference_mode], directory, args.reference_mode)
+        if args.record and not await record(args.record, args.reference, reference_prompts, args.experience,
+                                            args.mock, args.concurrency):
+            raise SystemExit(1)
+
+        reference = load_reference(args.reference, args.experience, args.limit)
+        if not reference:
+            parser.error(f"{args.reference} 中没有带筛选结论的职位（先用 --record 录制参考结果）")
+        reference_aggregator = RankAggregator.from_config(
+            _merge(base, modes[args.reference_mode] or {}).get('aggregation')
+        )
+        rejected = sum(1 for result in reference.values() if result.rejected)
+        _report(f"📼 参考结果: {len(reference)} 个职位（其中 {rejected} 个不推荐投递），"
+                f"{'模拟LLM' if args.mock is not None else '真实模型'}，并发 {args.concurrency}")
+
+        scores = []
+        for name in args.only or list(modes):
+            _report(f"⏳ 评估模式 {name}...")
+            prompts_path = _mode_prompts(base, modes[name], directory, name)
+            score = await run_mode(name, prompts_path, reference, args.experience, args.mock, args.concurrency,
+                                   directory, reference_aggregator)
+            if score is not None:
+                scores.append(score)
+
+    _report("")
+    print_table(scores)
+    if args.csv:
+        with open(args.csv, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["mode", "positions", "screening_precision", "screening_recall", f"top{TOP_K}_overlap",
+                             "rank_correlation", "requests", "retries", "tokens", "seconds"])
+            for score in scores:
+                writer.writerow([score.mode, score.positions] + [
+                    None if value is None else round(value, 4)
+                    for value in (score.screening_precision, score.screening_recall,
+                                  score.top_k_overlap, score.rank_correlation)
+                ] + [score.requests, score.retries, score.tokens, round(score.seconds, 3)])
+        _report(f"📄 已写入 {args.csv}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
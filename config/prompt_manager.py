@@ -1,23 +1,183 @@
 """
 Prompt配置管理器
 负责加载和管理YAML配置文件中的prompt模板
+支持在请求之间热加载 prompts.yaml，并为每个模板提供内容哈希版本号
 """
 
-import yaml
+import hashlib
+import json
+import os
+import time
+from string import Formatter
+from typing import Dict, List, Optional, Tuple
+
+from utils.profiler import profiled
+
+
+def _content_version(text: str) -> str:
+    """计算内容哈希版本号"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:12]
+
+
+class CompiledTemplate:
+    """
+    预编译的prompt模板
+
+    构造时把模板拆分为 (字面文本, 变量名) 片段，渲染时只做拼接，
+    省去每次调用 str.format 重新解析模板的开销。
+    版本号同时覆盖模板文本和调用参数（模型名、temperature 等）：换模型或参数后旧结果同样视为过期
+    """
+
+    __slots__ = ('template', 'version', '_parts', '_needs_format')
+
+    def __init__(self, template: str, llm_config: Optional[dict] = None):
+        self.template = template
+        settings = json.dumps(llm_config, sort_keys=True) if llm_config else ""
+        self.version = _content_version(template + settings)
+        self._parts: List[Tuple[str, Optional[str]]] = []
+        self._needs_format = False
+        for literal, field_name, format_spec, conversion in Formatter().parse(template):
+            if format_spec or conversion:
+                # 带格式说明的变量交给 str.format 处理
+                self._needs_format = True
+            self._parts.append((literal, field_name))
+
+    def render(self, **variables) -> str:
+        """用变量渲染模板"""
+        if self._needs_format:
+            return self.template.format(**variables)
+        pieces = []
+        for literal, field_name in self._parts:
+            pieces.append(literal)
+            if field_name is not None:
+                pieces.append(str(variables[field_name]))
+        return "".join(pieces)
+
+
+class _PromptState:
+    """某一版本 prompts.yaml 的完整快照，热加载时整体替换"""
+
+    __slots__ = ('config', 'version', 'compiled', 'signature')
+
+    def __init__(self, config: dict, version: str, signature: Tuple[float, int]):
+        self.config = config
+        self.version = version
+        self.signature = signature
+        self.compiled: Dict[Tuple[str, str], CompiledTemplate] = {}
 
 
 class PromptManager:
     """Prompt配置管理器"""
     
-    def __init__(self, config_path: str = "prompts.yaml"):
+    def __init__(self, config_path: str = "prompts.yaml", hot_reload: bool = True,
+                 reload_interval: float = 1.0):
+        """
+        Args:
+            config_path: prompts.yaml 路径
+            hot_reload: 是否在文件变更后自动重新加载
+            reload_interval: 检查文件变更的最小间隔（秒）
+        """
         self.config_path = config_path
-        self.config = self._load_config()
+        self.hot_reload = hot_reload
+        self.reload_interval = reload_interval
+        self._state = self._load_state()
+        self._last_check = time.monotonic()
+
+    @property
+    def config(self) -> dict:
+        """当前生效的配置"""
+        return self._state.config
+
+    @property
+    def version(self) -> str:
+        """当前 prompts.yaml 的内容哈希版本号"""
+        return self._state.version
+
+    def _file_signature(self) -> Tuple[float, int]:
+        stat = os.stat(self.config_path)
+        return stat.st_mtime, stat.st_size
     
-    def _load_config(self) -> dict:
+    def _load_state(self) -> _PromptState:
         """加载YAML配置文件"""
+        import yaml
+        
+        signature = self._file_signature()
         with open(self.config_path, 'r', encoding='utf-8') as file:
-            return yaml.safe_load(file)
+            text = file.read()
+        config = yaml.safe_load(text)
+        if not isinstance(config, dict) or not {'prompts', 'llm_configs', 'retry_config'} <= config.keys():
+            raise ValueError(f"{self.config_path} 缺少 prompts / llm_configs / retry_config 配置")
+        return _PromptState(config, _content_version(text), signature)
+
+    def maybe_reload(self, force: bool = False) -> bool:
+        """
+        检查 prompts.yaml 是否变更，变更则重新加载
+
+        新配置完整解析后才替换当前状态，替换是单次赋值；已经渲染好的 prompt
+        （包括正在进行中的请求）不受影响。新文件解析失败时保留旧配置。
+
+        Returns:
+            bool: 是否发生了重新加载
+        """
+        import yaml
+        
+        now = time.monotonic()
+        if not force and (not self.hot_reload or now - self._last_check < self.reload_interval):
+            return False
+        self._last_check = now
+
+        try:
+            if not force and self._file_signature() == self._state.signature:
+                return False
+            new_state = self._load_state()
+        except (OSError, ValueError, yaml.YAMLError) as e:
+            print(f"⚠️ prompts.yaml 重新加载失败，继续使用版本 {self._state.version}: {e}")
+            return False
+
+        if new_state.version == self._state.version:
+            self._state.signature = new_state.signature
+            return False
+        old_version = self._state.version
+        self._state = new_state
+        print(f"🔄 prompts.yaml 已重新加载: {old_version} -> {new_state.version}")
+        return True
+
+    @staticmethod
+    def _compile(state: _PromptState, prompt_type: str, llm_name: str) -> CompiledTemplate:
+        """组合基础模板和输出格式并预编译，版本号包含该LLM的调用参数"""
+        prompt_config = state.config['prompts'][prompt_type]
+        base_template = prompt_config['base_template']
+        output_format = prompt_config['output_formats'][llm_name]
+        
+        # 组合基础模板和输出格式
+        return CompiledTemplate(base_template + "\n\n" + output_format, state.config['llm_configs'].get(llm_name))
     
+    def get_template(self, prompt_type: str, llm_name: str) -> CompiledTemplate:
+        """获取 (prompt类型, LLM) 对应的预编译模板，首次使用时编译并缓存"""
+        self.maybe_reload()
+        state = self._state
+        key = (prompt_type, llm_name)
+        template = state.compiled.get(key)
+        if template is None:
+            template = state.compiled[key] = self._compile(state, prompt_type, llm_name)
+        return template
+
+    def template_version(self, prompt_type: str, llm_name: str) -> str:
+        """获取模板的内容哈希版本号"""
+        return self.get_template(prompt_type, llm_name).version
+
+    @profiled("prompt.render")
+    def render_prompt(self, prompt_type: str, llm_name: str, **variables) -> Tuple[str, str]:
+        """
+        生成完整prompt，并返回所用模板的版本号
+
+        Returns:
+            Tuple[str, str]: (prompt文本, 模板版本号)
+        """
+        template = self.get_template(prompt_type, llm_name)
+        return template.render(**variables), template.version
+    
+    @profiled("prompt.render")
     def get_prompt(self, prompt_type: str, llm_name: str, **variables) -> str:
         """
         生成特定LLM的完整prompt
@@ -30,15 +190,7 @@ class PromptManager:
         Returns:
             str: 完整的prompt文本
         """
-        prompt_config = self.config['prompts'][prompt_type]
-        base_template = prompt_config['base_template']
-        output_format = prompt_config['output_formats'][llm_name]
-        
-        # 组合基础模板和输出格式
-        full_template = base_template + "\n\n" + output_format
-        
-        # 使用 Python 内置的字符串格式化替换变量
-        return full_template.format(**variables)
+        return self.get_template(prompt_type, llm_name).render(**variables)
     
     def get_llm_config(self, llm_name: str) -> dict:
         """获取LLM配置"""
@@ -46,4 +198,4 @@ class PromptManager:
     
     def get_retry_config(self) -> dict:
         """获取重试配置"""
-        return self.config['retry_config'] 
\ No newline at end of file
+        return self.config['retry_config'] 
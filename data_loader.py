@@ -4,11 +4,24 @@
 支持多sheet和日期范围筛选
 """
 
-import pandas as pd
 import json
-from typing import List, Dict, Any
+from typing import TYPE_CHECKING, List, Dict, Any
 from datetime import datetime
 
+from models import PositionInfo
+from utils.profiler import profiled
+
+# pandas 导入较慢，只在读取Excel时导入
+if TYPE_CHECKING:
+    import pandas as pd
+
+# get_position_info 读取的列，用于计算职位行的标识
+POSITION_COLUMNS = ('job description', '公司名字', '岗位名', '地点', 'link')
+
+# 其他列视为缺失的文本，与 pandas 默认的缺失值列表一致
+NA_VALUES = ('', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+             '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null')
+
 
 def load_config(config_path: str) -> dict:
     """
@@ -27,7 +40,8 @@ def load_config(config_path: str) -> dict:
     return config
 
 
-def load_positions(config: dict) -> pd.DataFrame:
+@profiled("excel.load_positions")
+def load_positions(config: dict) -> "pd.DataFrame":
     """
     根据配置读取包含职位信息的Excel文件
     
@@ -39,8 +53,15 @@ def load_positions(config: dict) -> pd.DataFrame:
     Returns:
         pd.DataFrame: 包含职位信息的DataFrame
     """
-    # 读取指定sheet
-    df = pd.read_excel(config['excel_file'], sheet_name=config['sheet_name'])
+    import pandas as pd
+
+    # 读取指定sheet：职位列按原文读取，只有空单元格视为缺失。默认会把 "NA"、"N/A"、"null" 等文本读成 NaN，
+    # 而回写职位表时 openpyxl 读到的是原文，两边算出的行标识对不上；其他列（status、日期等）保持默认
+    with pd.ExcelFile(config['excel_file']) as workbook:
+        columns = workbook.parse(config['sheet_name'], nrows=0).columns
+        df = workbook.parse(config['sheet_name'], keep_default_na=False, na_values={
+            column: [""] if column in POSITION_COLUMNS else list(NA_VALUES) for column in columns
+        })
     print(f"从sheet '{config['sheet_name']}' 加载 {len(df)} 行数据")
     
     # 日期筛选
@@ -77,7 +98,7 @@ def load_positions(config: dict) -> pd.DataFrame:
     return df
 
 
-def load_positions_simple(file_path: str) -> pd.DataFrame:
+def load_positions_simple(file_path: str) -> "pd.DataFrame":
     """
     简单读取Excel文件（保持向后兼容）
     
@@ -87,6 +108,8 @@ def load_positions_simple(file_path: str) -> pd.DataFrame:
     Returns:
         pd.DataFrame: 包含职位信息的DataFrame
     """
+    import pandas as pd
+    
     df = pd.read_excel(file_path)
     print(f"成功加载 {len(df)} 个职位")
     return df
@@ -109,23 +132,23 @@ def load_experiences(file_path: str) -> List[Dict[str, Any]]:
     return experiences
 
 
-def get_position_info(position_row: pd.Series) -> Dict[str, str]:
+def get_position_info(position_row: "pd.Series") -> PositionInfo:
     """
     从职位行中提取关键信息
     
     Args:
-        position_row (pd.Series): 职位数据行
+        position_row (pd.Series): 职位数据行（或列名到值的字典）
         
     Returns:
-        Dict[str, str]: 包含职位关键信息的字典
+        PositionInfo: 职位关键信息
     """
-    return {
-        'job_description': str(position_row['job description']),
-        'company': str(position_row['公司名字']),
-        'position': str(position_row['岗位名']),
-        'location': str(position_row['地点']),
-        'link': str(position_row['link'])
-    }
+    return PositionInfo(
+        job_description=str(position_row['job description']),
+        company=str(position_row['公司名字']),
+        position=str(position_row['岗位名']),
+        location=str(position_row['地点']),
+        link=str(position_row['link'])
+    )
 
 
 if __name__ == "__main__":
@@ -139,7 +162,7 @@ if __name__ == "__main__":
     
     if len(positions) > 0:
         first_position = get_position_info(positions.iloc[0])
-        print(f"第一个职位: {first_position['company']} - {first_position['position']}")
+        print(f"第一个职位: {first_position.company} - {first_position.position}")
     
     # 测试经历加载
     print("\n=== 测试经历加载 ===")
@@ -3,13 +3,17 @@ LLM客户端基类
 定义通用接口和重试机制
 """
 
+import copy
 import json
+import time
 import asyncio
 from abc import ABC, abstractmethod
-from typing import Dict, List, Any
+from typing import Callable, Dict, Any, Optional, Sequence
 
 from config.prompt_manager import PromptManager
+from llm.schemas import TOP_K, normalize_ranking, ranking_schema, screening_schema, validate_screening
 from utils.json_fixer import JSONFixer
+from utils.profiler import profiled, span
 
 
 class BaseLLMClient(ABC):
@@ -18,25 +22,124 @@ class BaseLLMClient(ABC):
     def __init__(self, prompt_manager: PromptManager, llm_name: str):
         self.prompt_manager = prompt_manager
         self.llm_name = llm_name
-        self.config = prompt_manager.get_llm_config(llm_name)
-        self.retry_config = prompt_manager.get_retry_config()
         self.json_fixer = JSONFixer()
+        self.call_count = 0
+        self.retry_count = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        # 共享的费用预算控制器和模型路由器，由 UnifiedLLMManager 设置
+        self.budget = None
+        self.router = None
+        # single-flight：正在进行中的请求，相同请求共享同一次上游调用
+        self._in_flight: Dict[tuple, asyncio.Future] = {}
+        self.coalesced_count = 0
+
+    @property
+    def config(self) -> dict:
+        """当前生效的LLM配置（随 prompts.yaml 热加载更新）"""
+        return self.prompt_manager.get_llm_config(self.llm_name)
+
+    @property
+    def retry_config(self) -> dict:
+        """当前生效的重试配置"""
+        return self.prompt_manager.get_retry_config()
     
     @abstractmethod
-    async def _call_llm(self, prompt: str) -> str:
-        """调用LLM API"""
+    async def _call_llm(self, prompt: str, response_format: Optional[Dict[str, Any]] = None) -> str:
+        """
+        调用LLM API
+
+        Args:
+            prompt: 完整prompt
+            response_format: OpenAI 兼容的 response_format 参数，None 表示自由文本
+        """
+        pass
+
+    async def _close_connection(self):
+        """关闭底层 SDK 客户端的连接池（使用网络的子类实现）"""
         pass
+
+    async def aclose(self):
+        """取消进行中的上游请求（包括 single-flight 共享的请求）并关闭网络连接"""
+        flights = list(self._in_flight.values())
+        for flight in flights:
+            flight.cancel()
+        await asyncio.gather(*flights, return_exceptions=True)
+        await self._close_connection()
+
+    def _record_usage(self, response: Any):
+        """从 response.usage 累计 token 用量，并计入共享预算"""
+        usage = getattr(response, 'usage', None)
+        if usage is None:
+            return
+        prompt_tokens = getattr(usage, 'prompt_tokens', 0) or 0
+        completion_tokens = getattr(usage, 'completion_tokens', 0) or 0
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        if self.budget is not None:
+            self.budget.record(self.llm_name, prompt_tokens, completion_tokens)
+
+    def _record_outcome(self, prompt_type: str, started: float, ok: bool):
+        """把一次尝试的延迟和成败计入该类调用的路由统计"""
+        if self.router is not None:
+            self.router.record(self.llm_name, prompt_type, time.monotonic() - started, ok)
+
+    def _response_format(self, name: str, schema: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        根据 llm_configs.<llm>.structured_output 构造 response_format
+
+        - json_schema: 按 schema 约束输出（结构化输出）
+        - json_object: 仅要求输出合法JSON（JSON模式）
+        - none / 未配置: 不附加，依赖prompt约束和本地修复
+        """
+        mode = self.config.get('structured_output', 'none')
+        if mode == 'json_schema':
+            return {
+                "type": "json_schema",
+                "json_schema": {"name": name, "schema": schema, "strict": True}
+            }
+        if mode == 'json_object':
+            return {"type": "json_object"}
+        return None
     
-    async def _call_with_retry(self, prompt: str) -> str:
-        """带重试机制的LLM调用"""
+    @profiled("llm.call")
+    async def _call_with_retry(self, prompt_type: str, prompt: str,
+                               response_format: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        带重试机制的LLM调用，返回解析后的JSON对象；prompt_type 用于按调用类型统计延迟和错误
+
+        同一模型、同一prompt和 response_format 的请求正在进行时不再重复发出，
+        而是等待进行中的那一次并共享其解析结果（每个调用方拿到独立的副本）
+        """
+        key = (self.config['model'], prompt, json.dumps(response_format, sort_keys=True))
+        flight = self._in_flight.get(key)
+        if flight is None:
+            flight = asyncio.ensure_future(self._call_upstream(prompt_type, prompt, response_format))
+            self._in_flight[key] = flight
+            flight.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            self.coalesced_count += 1
+            print(f"🔗 {self.llm_name} 相同请求正在进行，共享其结果")
+        # shield: 某个调用方被取消时不影响其他等待同一请求的调用方
+        result = await asyncio.shield(flight)
+        return copy.deepcopy(result)
+
+    async def _call_upstream(self, prompt_type: str, prompt: str,
+                             response_format: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """实际发出请求（含重试和JSON解析）"""
         max_retries = self.retry_config['max_retries']
         retry_delay = self.retry_config['retry_delay']
         
         for attempt in range(max_retries + 1):
+            started = time.monotonic()
             try:
                 print(f"🔄 {self.llm_name} 开始调用 (尝试 {attempt + 1}/{max_retries + 1})")
                 print(f"📡 {self.llm_name} 发送API请求...")
-                response = await self._call_llm(prompt)
+                self.call_count += 1
+                if attempt:
+                    self.retry_count += 1
+                with span("llm.network"):
+                    response = await self._call_llm(prompt, response_format)
                 print(f"📥 {self.llm_name} 收到响应，长度: {len(response) if response else 0}")
                 
                 # 打印原始响应方便调试
@@ -46,57 +149,184 @@ class BaseLLMClient(ABC):
                 if not response:
                     raise Exception(f"{self.llm_name} 返回空响应")
 
-                # 尝试修复和解析JSON
-                fixed_response = self.json_fixer.fix_json(response)
-                json.loads(fixed_response)  # 验证JSON格式
+                # 单遍提取、修复并解析JSON
+                result = self.json_fixer.parse(response)
+                if not isinstance(result, dict):
+                    raise json.JSONDecodeError("响应不是JSON对象", response, 0)
                 
-                return fixed_response
+                self._record_outcome(prompt_type, started, True)
+                return result
                 
             except json.JSONDecodeError as e:
+                self._record_outcome(prompt_type, started, False)
                 print(f"{self.llm_name} JSON解析错误 (尝试 {attempt + 1}/{max_retries + 1}): {e}")
                 if attempt < max_retries:
-                    await asyncio.sleep(retry_delay)
+                    with span("llm.retry_backoff"):
+                        await asyncio.sleep(retry_delay)
                     continue
                 else:
                     raise Exception(f"{self.llm_name} JSON解析失败，已重试{max_retries}次")
                     
             except Exception as e:
+                self._record_outcome(prompt_type, started, False)
                 print(f"{self.llm_name} API调用错误 (尝试 {attempt + 1}/{max_retries + 1}): {e}")
                 if attempt < max_retries:
-                    await asyncio.sleep(retry_delay)
+                    with span("llm.retry_backoff"):
+                        await asyncio.sleep(retry_delay)
                     continue
                 else:
                     raise Exception(f"{self.llm_name} API调用失败，已重试{max_retries}次: {str(e)}")
     
+    async def _repair_fields(self, prompt: str, previous: Dict[str, Any], field_errors: Dict[str, str],
+                             instructions: str) -> Dict[str, Any]:
+        """
+        只针对不合法的字段重新询问，返回模型给出的这些字段的新值
+
+        Args:
+            prompt: 原始prompt
+            previous: 上一次（已解析）的回答
+            field_errors: 字段 -> 问题说明
+            instructions: 需要返回的字段及格式说明
+        """
+        repair_prompt, _ = self.prompt_manager.render_prompt(
+            'repair_fields',
+            self.llm_name,
+            original_prompt=prompt,
+            previous_response=json.dumps(previous, ensure_ascii=False),
+            field_errors="\n".join(f"- {name}: {problem}" for name, problem in field_errors.items()),
+            instructions=instructions
+        )
+        print(f"🩹 {self.llm_name} 字段不合法，仅重新询问: {', '.join(field_errors)}")
+        # 修复回答只包含部分字段，不套用完整 schema，支持结构化输出的模型使用JSON模式
+        json_mode = {"type": "json_object"} if self.config.get('structured_output', 'none') != 'none' else None
+        return await self._call_with_retry('repair_fields', repair_prompt, json_mode)
+
+    async def _repair_until_valid(self, prompt: str, result: Dict[str, Any],
+                                  validate: Callable[[Dict[str, Any]], Dict[str, str]],
+                                  instructions: Callable[[Dict[str, Any], Dict[str, str]], str],
+                                  merge: Callable[[Dict[str, Any], Dict[str, str]], None]) -> Dict[str, str]:
+        """
+        校验结果，对不合法的字段最多重新询问 retry_config.max_repairs 次，每次合并后重新校验
+
+        修复请求本身失败时不再继续修复，保留已有结果，由调用方把剩余问题记为 validation_errors
+
+        Args:
+            prompt: 原始prompt
+            result: 已解析的回答，就地合并修复结果
+            validate: 校验函数，返回 字段 -> 问题说明
+            instructions: 根据当前结果和错误生成修复说明
+            merge: 把修复回答合并进 result
+
+        Returns:
+            Dict[str, str]: 修复后仍不合法的字段；为空表示通过
+        """
+        errors = validate(result)
+        for _ in range(self.retry_config.get('max_repairs', 1)):
+            if not errors:
+                break
+            try:
+                patch = await self._repair_fields(prompt, result, errors, instructions(result, errors))
+            except Exception as e:
+                print(f"⚠️ {self.llm_name} 字段修复失败，保留已有结果: {e}")
+                break
+            merge(patch, errors)
+            errors = validate(result)
+        return errors
+
+    def _template_version(self, prompt_type: str) -> Optional[str]:
+        """渲染失败时记录的模板版本号；模板本身无法加载（如配置缺少该模型的输出格式）时为 None"""
+        try:
+            return self.prompt_manager.template_version(prompt_type, self.llm_name)
+        except Exception:
+            return None
+
     async def screen_jd(self, jd_text: str) -> Dict[str, Any]:
         """筛选职位描述"""
+        version = None
         try:
-            prompt = self.prompt_manager.get_prompt('screen_jd', self.llm_name, jd_text=jd_text)
-            response = await self._call_with_retry(prompt)
-            return json.loads(response)
+            prompt, version = self.prompt_manager.render_prompt('screen_jd', self.llm_name, jd_text=jd_text)
+            result = await self._call_with_retry('screen_jd', prompt,
+                                                 self._response_format('screen_jd', screening_schema()))
+            errors = await self._repair_until_valid(
+                prompt, result, validate_screening,
+                lambda _, errors: f"只返回这些字段组成的JSON对象: {', '.join(errors)}",
+                lambda patch, errors: result.update({name: patch[name] for name in errors if name in patch})
+            )
+            if errors:
+                result["validation_errors"] = errors
+            result["prompt_version"] = version
+            return result
         except Exception as e:
             return {
                 "citizenship_required": False,
                 "senior_level_required": False,
                 "expected_graduation_mentioned": False,
                 "expected_graduation_time": None,
-                "reason": f"{self.llm_name}调用失败: {str(e)}"
+                "reason": f"{self.llm_name}调用失败: {str(e)}",
+                "error": f"{self.llm_name}调用失败: {str(e)}",
+                "prompt_version": version or self._template_version('screen_jd')
             }
     
-    async def rank_experiences(self, jd_text: str, experiences_library: str) -> Dict[str, Any]:
-        """对经历进行排名"""
+    async def rank_experiences(self, jd_text: str, experiences_library: str,
+                               valid_ids: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+        """
+        对经历进行排名
+
+        Args:
+            jd_text: 职位描述
+            experiences_library: 格式化后的经历库
+            valid_ids: 经历库中的全部经历ID，用于约束和校验返回的 id
+        """
+        version = None
         try:
-            prompt = self.prompt_manager.get_prompt(
-                'rank_experiences', 
-                self.llm_name, 
-                jd_text=jd_text, 
+            prompt, version = self.prompt_manager.render_prompt(
+                'rank_experiences',
+                self.llm_name,
+                jd_text=jd_text,
                 experiences_library=experiences_library
             )
-            response = await self._call_with_retry(prompt)
-            return json.loads(response)
+            result = await self._call_with_retry(
+                'rank_experiences', prompt, self._response_format('rank_experiences', ranking_schema(valid_ids))
+            )
+
+            def merge(patch: Dict[str, Any], errors: Dict[str, str]):
+                if "match_percentage" in errors and "match_percentage" in patch:
+                    result["match_percentage"] = patch["match_percentage"]
+                if "ranked_experiences" in errors and isinstance(patch.get("ranked_experiences"), list):
+                    # 新补充的经历排在已有经历之后
+                    extra = [
+                        dict(item, rank=TOP_K) for item in patch["ranked_experiences"] if isinstance(item, dict)
+                    ]
+                    result["ranked_experiences"] = result["ranked_experiences"] + extra
+
+            errors = await self._repair_until_valid(
+                prompt, result, lambda data: normalize_ranking(data, valid_ids),
+                self._ranking_repair_instructions, merge
+            )
+            if errors:
+                result["validation_errors"] = errors
+            result["prompt_version"] = version
+            return result
         except Exception as e:
             return {
                 "match_percentage": 0,
                 "ranked_experiences": [],
-                "error": f"{self.llm_name}调用失败: {str(e)}"
-            } 
\ No newline at end of file
+                "error": f"{self.llm_name}调用失败: {str(e)}",
+                "prompt_version": version or self._template_version('rank_experiences')
+            }
+
+    @staticmethod
+    def _ranking_repair_instructions(result: Dict[str, Any], errors: Dict[str, str]) -> str:
+        """排名结果的修复说明：只要缺失的字段和缺少的经历"""
+        parts = []
+        if "match_percentage" in errors:
+            parts.append('"match_percentage": 0-100 的整数')
+        if "ranked_experiences" in errors:
+            chosen = [item["id"] for item in result.get("ranked_experiences", [])]
+            missing = TOP_K - len(chosen)
+            excluded = f"，不要包含已选的 {', '.join(chosen)}" if chosen else ""
+            parts.append(
+                f'"ranked_experiences": 再补充 {missing} 条经历库中存在的经历{excluded}，'
+                f'格式为 {{"id": "经历ID", "rank": 名次, "justification": "一句话中文理由"}}'
+            )
+        return "只返回包含以下字段的JSON对象：\n" + "\n".join(parts)
@@ -0,0 +1,145 @@
+"""
+运行级费用预算控制
+所有客户端共享一个控制器，根据每次响应的 usage 和价格表实时累计花费，
+在预算接近耗尽时分阶段降级：三个排名模型 → 两个 → 一个 → 仅筛选 → 停止
+"""
+
+import time
+from typing import Any, Dict, List, Optional
+
+# 降级阶段，按顺序逐级降低
+STAGE_FULL = 'full'
+STAGE_TWO_RANKERS = 'two_rankers'
+STAGE_ONE_RANKER = 'one_ranker'
+STAGE_SCREENING_ONLY = 'screening_only'
+STAGE_STOPPED = 'stopped'
+
+STAGES = [STAGE_FULL, STAGE_TWO_RANKERS, STAGE_ONE_RANKER, STAGE_SCREENING_ONLY, STAGE_STOPPED]
+
+STAGE_LABELS = {
+    STAGE_FULL: '三模型排名',
+    STAGE_TWO_RANKERS: '两模型排名',
+    STAGE_ONE_RANKER: '单模型排名',
+    STAGE_SCREENING_ONLY: '仅筛选',
+    STAGE_STOPPED: '停止',
+}
+
+# 各阶段允许的排名模型数
+_STAGE_RANKERS = {STAGE_FULL: None, STAGE_TWO_RANKERS: 2, STAGE_ONE_RANKER: 1,
+                  STAGE_SCREENING_ONLY: 0, STAGE_STOPPED: 0}
+
+DEFAULT_DEGRADE_AT = {
+    STAGE_TWO_RANKERS: 0.6,
+    STAGE_ONE_RANKER: 0.75,
+    STAGE_SCREENING_ONLY: 0.9,
+}
+
+
+class BudgetController:
+    """共享的费用预算控制器"""
+
+    def __init__(self, max_dollars: float, pricing: Dict[str, Dict[str, float]],
+                 degrade_at: Optional[Dict[str, float]] = None):
+        """
+        Args:
+            max_dollars: 费用上限（美元）
+            pricing: 每个LLM的价格，{llm_name: {"input": 美元/百万token, "output": 美元/百万token}}
+            degrade_at: 进入各降级阶段时已用预算的比例
+        """
+        self.max_dollars = max_dollars
+        self.pricing = pricing
+        self.degrade_at = dict(DEFAULT_DEGRADE_AT, **(degrade_at or {}))
+        self.spent = 0.0
+        self.calls = 0
+        self.usage: Dict[str, Dict[str, float]] = {}
+        self.stage = STAGE_FULL
+        self.decisions: List[Dict[str, Any]] = []
+
+    @classmethod
+    def from_config(cls, max_dollars: float, config: Dict[str, Any]) -> 'BudgetController':
+        """根据 prompts.yaml 中的 pricing 和 budget 配置创建"""
+        return cls(max_dollars, config.get('pricing', {}), config.get('budget', {}).get('degrade_at'))
+
+    def cost_of(self, llm_name: str, prompt_tokens: int, completion_tokens: int) -> float:
+        """按价格表计算一次调用的费用"""
+        price = self.pricing.get(llm_name, {})
+        return (prompt_tokens * price.get('input', 0) + completion_tokens * price.get('output', 0)) / 1_000_000
+
+    def record(self, llm_name: str, prompt_tokens: int, completion_tokens: int) -> float:
+        """
+        记录一次调用的 token 用量，返回本次费用
+        """
+        cost = self.cost_of(llm_name, prompt_tokens, completion_tokens)
+        self.spent += cost
+        self.calls += 1
+        totals = self.usage.setdefault(llm_name, {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "dollars": 0.0})
+        totals["calls"] += 1
+        totals["prompt_tokens"] += prompt_tokens
+        totals["completion_tokens"] += completion_tokens
+        totals["dollars"] += cost
+        return cost
+
+    @property
+    def remaining(self) -> float:
+        return max(self.max_dollars - self.spent, 0.0)
+
+    @property
+    def average_call_cost(self) -> float:
+        return self.spent / self.calls if self.calls else 0.0
+
+    def _target_stage(self) -> str:
+        """根据已用比例和剩余预算确定应处的阶段"""
+        # 剩余预算不够再做一次平均调用时停止
+        if self.spent >= self.max_dollars or (self.calls and self.remaining < self.average_call_cost):
+            return STAGE_STOPPED
+        fraction = self.spent / self.max_dollars if self.max_dollars > 0 else 1.0
+        stage = STAGE_FULL
+        for candidate in (STAGE_TWO_RANKERS, STAGE_ONE_RANKER, STAGE_SCREENING_ONLY):
+            if fraction >= self.degrade_at[candidate]:
+                stage = candidate
+        return stage
+
+    def update_stage(self, context: str = "") -> str:
+        """
+        重新评估降级阶段（只降不升），阶段变化时记录决策
+
+        Args:
+            context: 决策发生时的上下文（例如正在处理的职位）
+        """
+        target = self._target_stage()
+        if STAGES.index(target) > STAGES.index(self.stage):
+            decision = {
+                "time": time.strftime('%Y-%m-%d %H:%M:%S'),
+                "from": self.stage,
+                "to": target,
+                "spent": round(self.spent, 4),
+                "max_dollars": self.max_dollars,
+                "context": context,
+            }
+            self.decisions.append(decision)
+            print(f"💸 预算降级: {STAGE_LABELS[self.stage]} -> {STAGE_LABELS[target]} "
+                  f"(已用 ${self.spent:.2f}/${self.max_dollars:.2f})")
+            self.stage = target
+        return self.stage
+
+    def select_rankers(self, candidates: List[str]) -> List[str]:
+        """
+        按当前阶段从候选排名模型中挑选：降级时优先保留单价低的模型
+        """
+        limit = _STAGE_RANKERS[self.stage]
+        if limit is None:
+            return list(candidates)
+        by_price = sorted(candidates, key=lambda name: self.pricing.get(name, {}).get('output', 0))
+        kept = set(by_price[:limit])
+        return [name for name in candidates if name in kept]
+
+    def summary(self) -> Dict[str, Any]:
+        """预算使用汇总"""
+        return {
+            "max_dollars": self.max_dollars,
+            "spent": round(self.spent, 4),
+            "calls": self.calls,
+            "stage": self.stage,
+            "usage": self.usage,
+            "decisions": self.decisions,
+        }
@@ -6,5 +6,6 @@ LLM客户端模块
 from .gemini_client import GeminiClient
 from .gpt_client import GPTClient
 from .claude_client import ClaudeClient
+from .mock_client import MockClient
 
-__all__ = ['GeminiClient', 'GPTClient', 'ClaudeClient'] 
\ No newline at end of file
+__all__ = ['GeminiClient', 'GPTClient', 'ClaudeClient', 'MockClient'] 
\ No newline at end of file
@@ -3,7 +3,8 @@ Anthropic Claude 客户端实现
 使用 OpenAI SDK 通过 Claude 的 OpenAI 兼容接口
 """
 
-from openai import AsyncOpenAI
+from typing import Any, Dict, Optional
+
 from config.prompt_manager import PromptManager
 from llm.base_client import BaseLLMClient
 
@@ -13,23 +14,40 @@ class ClaudeClient(BaseLLMClient):
     
     def __init__(self, api_key: str, prompt_manager: PromptManager):
         super().__init__(prompt_manager, 'claude')
-        self.client = AsyncOpenAI(
-            api_key=api_key,
-            base_url="https://api.anthropic.com/v1/"
-        )
+        self.api_key = api_key
+        self._client = None
+    
+    @property
+    def client(self):
+        """首次调用时才创建 AsyncOpenAI 客户端（openai 导入较慢，未用到的模型不付出这个开销）"""
+        if self._client is None:
+            from openai import AsyncOpenAI
+            self._client = AsyncOpenAI(
+                api_key=self.api_key,
+                base_url="https://api.anthropic.com/v1/"
+            )
+        return self._client
+    
+    async def _close_connection(self):
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
     
-    async def _call_llm(self, prompt: str) -> str:
+    async def _call_llm(self, prompt: str, response_format: Optional[Dict[str, Any]] = None) -> str:
         """调用 Claude API（通过 OpenAI 兼容接口）"""
         print(f"🟣 Claude API 调用开始 (OpenAI 兼容模式)...")
         
+        extra_args = {"response_format": response_format} if response_format else {}
         response = await self.client.chat.completions.create(
             model=self.config['model'],
             messages=[
                 {"role": "user", "content": prompt}
             ],
             temperature=self.config['temperature'],
-            max_tokens=self.config.get('max_tokens', 2000)
+            max_tokens=self.config.get('max_tokens', 2000),
+            **extra_args
         )
         
+        self._record_usage(response)
         print(f"🟣 Claude API 调用完成")
         return response.choices[0].message.content
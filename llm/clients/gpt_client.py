@@ -3,7 +3,8 @@ OpenAI GPT 客户端实现
 使用 OpenAI SDK 原生接口
 """
 
-from openai import AsyncOpenAI
+from typing import Any, Dict, Optional
+
 from config.prompt_manager import PromptManager
 from llm.base_client import BaseLLMClient
 
@@ -13,21 +14,38 @@ class GPTClient(BaseLLMClient):
     
     def __init__(self, api_key: str, prompt_manager: PromptManager):
         super().__init__(prompt_manager, 'gpt')
-        self.client = AsyncOpenAI(api_key=api_key)
+        self.api_key = api_key
+        self._client = None
+    
+    @property
+    def client(self):
+        """首次调用时才创建 AsyncOpenAI 客户端（openai 导入较慢，未用到的模型不付出这个开销）"""
+        if self._client is None:
+            from openai import AsyncOpenAI
+            self._client = AsyncOpenAI(api_key=self.api_key)
+        return self._client
+    
+    async def _close_connection(self):
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
     
-    async def _call_llm(self, prompt: str) -> str:
+    async def _call_llm(self, prompt: str, response_format: Optional[Dict[str, Any]] = None) -> str:
         """调用 OpenAI GPT API"""
         print(f"🟢 GPT API 调用开始...")
         
         # GPT-5.x 系列使用 max_completion_tokens，而不是 max_tokens
+        extra_args = {"response_format": response_format} if response_format else {}
         response = await self.client.chat.completions.create(
             model=self.config['model'],
             messages=[
                 {"role": "user", "content": prompt}
             ],
             temperature=self.config['temperature'],
-            max_completion_tokens=self.config.get('max_tokens', 5000)
+            max_completion_tokens=self.config.get('max_tokens', 5000),
+            **extra_args
         )
         
+        self._record_usage(response)
         print(f"🟢 GPT API 调用完成")
         return response.choices[0].message.content
@@ -0,0 +1,78 @@
+"""
+本地模拟 LLM 客户端
+不访问网络，按固定延迟返回确定性的合法JSON，用于离线演示、服务压测和基准测试
+"""
+
+import asyncio
+import json
+import random
+import re
+from types import SimpleNamespace
+from typing import Any, Dict, Optional
+
+from config.prompt_manager import PromptManager
+from llm.base_client import BaseLLMClient
+from llm.schemas import TOP_K
+
+_WORD = re.compile(r'[a-z][a-z0-9+#.\-]{2,}')
+_CITIZENSHIP = re.compile(r'u\.?s\.? citizen|citizenship required|green card|security clearance')
+_SENIOR = re.compile(r'\b(senior|staff|principal|lead)\b|\b([5-9]|1\d)\+? years')
+_GRADUATION = re.compile(r'(class of \d{4}|(spring|summer|fall|winter) \d{4}|graduat\w* (in|by) \w+ \d{4})', re.I)
+
+
+def _section(prompt: str, start: str, end: str) -> str:
+    """取 prompt 中两个标记之间的文本"""
+    head, _, rest = prompt.partition(start)
+    return rest.partition(end)[0] if rest else ""
+
+
+class MockClient(BaseLLMClient):
+    """模拟客户端：筛选按JD关键词判断，排名按JD与经历的词重叠打分"""
+
+    def __init__(self, llm_name: str, prompt_manager: PromptManager, latency: float = 0.05):
+        super().__init__(prompt_manager, llm_name)
+        self.latency = latency
+
+    async def _call_llm(self, prompt: str, response_format: Optional[Dict[str, Any]] = None) -> str:
+        """模拟一次 API 调用（延迟在 latency 的 0.5~1.5 倍之间抖动）"""
+        await asyncio.sleep(self.latency * random.uniform(0.5, 1.5))
+        if '"ranked_experiences"' in prompt:
+            content = self._rank(prompt)
+        else:
+            content = self._screen(prompt)
+        self._record_usage(SimpleNamespace(usage=SimpleNamespace(
+            prompt_tokens=len(prompt) // 4, completion_tokens=len(content) // 4
+        )))
+        return content
+
+    @staticmethod
+    def _screen(prompt: str) -> str:
+        jd = _section(prompt, "职位描述：", "判断标准：").lower()
+        graduation = _GRADUATION.search(jd)
+        return json.dumps({
+            "citizenship_required": bool(_CITIZENSHIP.search(jd)),
+            "senior_level_required": bool(_SENIOR.search(jd)),
+            "expected_graduation_mentioned": graduation is not None,
+            "expected_graduation_time": graduation.group(0) if graduation else None,
+            "reason": "模拟客户端按关键词判断"
+        }, ensure_ascii=False)
+
+    @staticmethod
+    def _rank(prompt: str) -> str:
+        jd_words = set(_WORD.findall(_section(prompt, "职位描述：", "个人经历库：").lower()))
+        library = _section(prompt, "个人经历库：", "要求：")
+        scored = []
+        for block in re.split(r'^ID: ', library, flags=re.M)[1:]:
+            exp_id, _, body = block.partition("\n")
+            overlap = jd_words & set(_WORD.findall(body.lower()))
+            scored.append((len(overlap), exp_id.strip(), sorted(overlap)[:3]))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        top = scored[:TOP_K]
+        best = max((score for score, _, _ in top), default=0)
+        return json.dumps({
+            "match_percentage": min(40 + best * 5, 95),
+            "ranked_experiences": [
+                {"id": exp_id, "rank": rank, "justification": f"关键词重叠: {', '.join(words) or '无'}"}
+                for rank, (_, exp_id, words) in enumerate(top, 1)
+            ]
+        }, ensure_ascii=False)
@@ -4,29 +4,105 @@
 """
 
 import asyncio
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 
 from config.prompt_manager import PromptManager
-from llm.clients import GeminiClient, GPTClient, ClaudeClient
+from llm.budget import BudgetController
+from llm.clients import GeminiClient, GPTClient, ClaudeClient, MockClient
+from llm.router import ModelRouter
+from models import Ranking, Screening
+from utils.experience_formatter import format_experiences_library_cached
+
+# 每个模型使用的 API 密钥环境变量
+API_KEY_ENV = {
+    'gemini': 'GEMINI_API_KEY',
+    'gpt': 'OPENAI_API_KEY',
+    'claude': 'ANTHROPIC_API_KEY'
+}
 
 
 class UnifiedLLMManager:
     """统一LLM管理器"""
     
     def __init__(self, gemini_key: str, openai_key: str, anthropic_key: str, 
-                 prompts_config: str = "prompts.yaml"):
+                 prompts_config: str = "prompts.yaml", mock_latency: Optional[float] = None):
+        """
+        Args:
+            mock_latency: 设置时三个模型都使用本地模拟客户端（每次调用的平均延迟，秒），不访问网络
+        """
         self.prompt_manager = PromptManager(prompts_config)
         
-        # 创建三个客户端
-        self.gemini = GeminiClient(gemini_key, self.prompt_manager)
-        self.gpt = GPTClient(openai_key, self.prompt_manager)
-        self.claude = ClaudeClient(anthropic_key, self.prompt_manager)
+        # 创建三个客户端（底层 SDK 客户端在第一次调用时才创建，未用到的模型不需要密钥）
+        if mock_latency is not None:
+            self.gemini = MockClient('gemini', self.prompt_manager, mock_latency)
+            self.gpt = MockClient('gpt', self.prompt_manager, mock_latency)
+            self.claude = MockClient('claude', self.prompt_manager, mock_latency)
+        else:
+            self.gemini = GeminiClient(gemini_key, self.prompt_manager)
+            self.gpt = GPTClient(openai_key, self.prompt_manager)
+            self.claude = ClaudeClient(anthropic_key, self.prompt_manager)
         
         self.clients = {
             'gemini': self.gemini,
             'gpt': self.gpt,
             'claude': self.claude
         }
+        self.budget = None
+        
+        # 按实时延迟和错误率选择筛选/排名模型
+        self.router = ModelRouter(self.prompt_manager.config.get('routing'), list(self.clients))
+        for client in self.clients.values():
+            client.router = self.router
+    
+    async def aclose(self):
+        """取消所有进行中的LLM请求并关闭连接（运行被中断或结束时调用）"""
+        await asyncio.gather(*(client.aclose() for client in self.clients.values()))
+    
+    def required_api_keys(self) -> Dict[str, str]:
+        """路由配置中可能被调用的模型（筛选和排名候选）及其 API 密钥环境变量"""
+        models = dict.fromkeys(self.router.screening_candidates + self.router.ranking_candidates)
+        return {name: API_KEY_ENV[name] for name in models if name in API_KEY_ENV}
+    
+    def set_budget(self, budget: Optional[BudgetController]):
+        """为所有客户端设置共享的费用预算控制器"""
+        self.budget = budget
+        for client in self.clients.values():
+            client.budget = budget
+    
+    @property
+    def call_count(self) -> int:
+        """所有客户端累计发出的API调用次数（含重试）"""
+        return sum(client.call_count for client in self.clients.values())
+    
+    @property
+    def retry_count(self) -> int:
+        """call_count 中因失败而重试的次数"""
+        return sum(client.retry_count for client in self.clients.values())
+
+    @property
+    def coalesced_count(self) -> int:
+        """因相同请求正在进行而被合并、未实际发出的调用次数"""
+        return sum(client.coalesced_count for client in self.clients.values())
+    
+    async def screen_jd(self, jd_text: str) -> Screening:
+        """
+        用路由选出的模型筛选职位；调用失败时依次改用下一个候选模型
+
+        Returns:
+            Screening: 筛选结果（含所用模型），所有候选都失败时为最后一个模型的失败结果
+        """
+        order = self.router.screening_order()
+        name, result = order[0], {}
+        for name in order:
+            result = await self.clients[name].screen_jd(jd_text)
+            if "error" not in result:
+                break
+            print(f"    🧭 {name} 筛选失败，路由到下一个候选模型")
+        return Screening.from_dict(name, result)
+    
+    def choose_rankers(self) -> List[str]:
+        """路由选出的排名模型子集"""
+        return self.router.choose_rankers()
     
     async def screen_jd_all(self, jd_text: str) -> Dict[str, Dict[str, Any]]:
         """并发调用所有LLM进行职位筛选"""
@@ -47,21 +123,27 @@ class UnifiedLLMManager:
             'claude': results[2]
         }
     
-    async def rank_experiences_all(self, jd_text: str, experiences: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
-        """并发调用所有LLM进行经历排名"""
-        from utils.experience_formatter import format_experiences_library
-        experiences_library = format_experiences_library(experiences)
+    async def rank_experiences_all(self, jd_text: str, experiences: List[Dict[str, Any]],
+                                   library_key: Optional[str] = None,
+                                   models: Optional[List[str]] = None) -> Dict[str, Ranking]:
+        """
+        并发调用LLM进行经历排名
+
+        Args:
+            jd_text: 职位描述
+            experiences: 经历列表
+            library_key: 按经历顺序计算的经历库哈希（ExperienceIndex.layout_hash），用于复用已格式化的经历库
+            models: 参与排名的模型，默认全部三个
+        """
+        experiences_library = format_experiences_library_cached(experiences, library_key)
+        valid_ids = [exp.get('id') for exp in experiences]
+        models = models or list(self.clients)
 
         tasks = [
-            self.gemini.rank_experiences(jd_text, experiences_library),
-            self.gpt.rank_experiences(jd_text, experiences_library),
-            self.claude.rank_experiences(jd_text, experiences_library)
+            self.clients[name].rank_experiences(jd_text, experiences_library, valid_ids)
+            for name in models
         ]
         
         results = await asyncio.gather(*tasks)
         
-        return {
-            'gemini': results[0],
-            'gpt': results[1],
-            'claude': results[2]
-        } 
\ No newline at end of file
+        return {name: Ranking.from_dict(name, result) for name, result in zip(models, results)}
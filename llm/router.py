@@ -0,0 +1,173 @@
+"""
+自适应模型路由
+为每个（模型, 调用类型）维护滚动的延迟和错误窗口，在 prompts.yaml 的 routing 约束内
+动态选择筛选模型和排名模型子集，绕开变慢或出错的提供方。
+筛选和排名的 prompt 长度、输出长度差别很大，只在做同一类调用的模型之间比较延迟
+"""
+
+import time
+from collections import deque
+from statistics import median
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+# 调用类型（与 prompts.yaml 中的 prompt 类型一致）
+SCREENING = 'screen_jd'
+RANKING = 'rank_experiences'
+_KIND_LABELS = {SCREENING: '筛选', RANKING: '排名', 'repair_fields': '修复'}
+
+
+class ModelStats:
+    """
+    单个模型一类调用的滚动统计窗口
+
+    只保留最近 window 次调用，且超过 horizon 秒的样本不再计入，
+    这样被路由绕开的模型在样本过期后会重新被尝试
+    """
+
+    def __init__(self, window: int, horizon: float):
+        self.samples: Deque[Tuple[float, float, bool]] = deque(maxlen=window)
+        self.horizon = horizon
+
+    def record(self, latency: float, ok: bool):
+        self.samples.append((time.monotonic(), latency, ok))
+
+    def _recent(self) -> List[Tuple[float, float, bool]]:
+        cutoff = time.monotonic() - self.horizon
+        return [sample for sample in self.samples if sample[0] >= cutoff]
+
+    @property
+    def count(self) -> int:
+        return len(self._recent())
+
+    @property
+    def error_rate(self) -> float:
+        recent = self._recent()
+        if not recent:
+            return 0.0
+        return sum(1 for _, _, ok in recent if not ok) / len(recent)
+
+    @property
+    def latency_p50(self) -> Optional[float]:
+        latencies = [latency for _, latency, ok in self._recent() if ok]
+        return median(latencies) if latencies else None
+
+
+class ModelRouter:
+    """按实时延迟和错误率选择模型"""
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None, models: Optional[List[str]] = None):
+        """
+        Args:
+            config: prompts.yaml 中的 routing 配置
+            models: 可用的全部模型，未配置候选列表时使用
+        """
+        config = config or {}
+        models = models or ['gemini', 'gpt', 'claude']
+        self.window = config.get('window', 20)
+        self.min_samples = config.get('min_samples', 3)
+        self.max_error_rate = config.get('max_error_rate', 0.5)
+        self.slow_factor = config.get('slow_factor', 2.5)
+        self.horizon = config.get('horizon_seconds', 300)
+        self.screening_candidates = config.get('screening_candidates', ['gemini'])
+        self.ranking_candidates = config.get('ranking_candidates', models)
+        self.min_rankers = config.get('min_rankers', 1)
+        self.max_rankers = config.get('max_rankers', len(self.ranking_candidates))
+        # (模型, 调用类型) -> 统计窗口
+        self.stats: Dict[Tuple[str, str], ModelStats] = {}
+        self.decisions: Dict[str, int] = {}
+
+    def record(self, llm_name: str, prompt_type: str, latency: float, ok: bool):
+        """记录一次调用的延迟和成败"""
+        self.stats.setdefault((llm_name, prompt_type), ModelStats(self.window, self.horizon)).record(latency, ok)
+
+    def is_healthy(self, llm_name: str, prompt_type: str) -> bool:
+        """样本不足时视为健康（冷启动或样本已过期），否则看该类调用的错误率是否超限"""
+        stats = self.stats.get((llm_name, prompt_type))
+        if stats is None or stats.count < self.min_samples:
+            return True
+        return stats.error_rate <= self.max_error_rate
+
+    def _latency(self, llm_name: str, prompt_type: str) -> Optional[float]:
+        stats = self.stats.get((llm_name, prompt_type))
+        if stats is None or stats.count < self.min_samples:
+            return None
+        return stats.latency_p50
+
+    def _rank_candidates(self, candidates: List[str], prompt_type: str) -> List[str]:
+        """
+        候选排序：健康的在前；有延迟数据的按延迟升序，没有数据的保持配置顺序
+        """
+        def key(item: Tuple[int, str]):
+            position, name = item
+            latency = self._latency(name, prompt_type)
+            return (not self.is_healthy(name, prompt_type), latency if latency is not None else float('inf'),
+                    position)
+        return [name for _, name in sorted(enumerate(candidates), key=key)]
+
+    def _is_slow(self, llm_name: str, fastest: Optional[float], prompt_type: str) -> bool:
+        latency = self._latency(llm_name, prompt_type)
+        return fastest is not None and latency is not None and latency > fastest * self.slow_factor
+
+    def screening_order(self) -> List[str]:
+        """
+        筛选模型的尝试顺序：最快的健康模型在前，其余作为失败时的备选
+
+        没有延迟数据时按配置顺序，保证冷启动行为与固定路由一致
+        """
+        order = self._rank_candidates(self.screening_candidates, SCREENING)
+        self._note('screening', order[0] if order else '')
+        return order
+
+    def choose_rankers(self) -> List[str]:
+        """
+        选择排名模型子集：去掉排名调用不健康和明显慢于其他排名模型的模型，但至少保留 min_rankers 个
+        """
+        ordered = self._rank_candidates(self.ranking_candidates, RANKING)
+        healthy = [name for name in ordered if self.is_healthy(name, RANKING)]
+        fastest = min((lat for lat in (self._latency(n, RANKING) for n in healthy) if lat is not None), default=None)
+        chosen = [name for name in healthy if not self._is_slow(name, fastest, RANKING)]
+        for name in ordered:
+            if len(chosen) >= self.min_rankers:
+                break
+            if name not in chosen:
+                chosen.append(name)
+        chosen = chosen[:self.max_rankers]
+        # 保持配置中的顺序，便于报告展示
+        chosen = [name for name in self.ranking_candidates if name in chosen]
+        self._note('ranking', '+'.join(chosen))
+        return chosen
+
+    def _note(self, kind: str, choice: str):
+        key = f"{kind}:{choice}"
+        self.decisions[key] = self.decisions.get(key, 0) + 1
+
+    @staticmethod
+    def label(llm_name: str, prompt_type: str) -> str:
+        """（模型, 调用类型）的显示名，如 gemini 筛选"""
+        return f"{llm_name} {_KIND_LABELS.get(prompt_type, prompt_type)}"
+
+    def describe(self, llm_name: str, prompt_type: str) -> str:
+        """模型某类调用当前状态的简短描述"""
+        label = self.label(llm_name, prompt_type)
+        stats = self.stats.get((llm_name, prompt_type))
+        if stats is None or stats.count == 0:
+            return f"{label}: 无数据"
+        latency = stats.latency_p50
+        latency_text = f"{latency:.1f}s" if latency is not None else "n/a"
+        health = "健康" if self.is_healthy(llm_name, prompt_type) else "不健康"
+        return f"{label}: p50 {latency_text}, 错误率 {stats.error_rate:.0%} ({stats.count} 次), {health}"
+
+    def summary(self) -> Dict[str, Any]:
+        """路由遥测汇总（models 按 "模型 调用类型" 区分）"""
+        return {
+            "models": {
+                self.label(name, prompt_type): {
+                    "samples": stats.count,
+                    "latency_p50": stats.latency_p50,
+                    "error_rate": round(stats.error_rate, 3),
+                    "healthy": self.is_healthy(name, prompt_type),
+                }
+                for (name, prompt_type), stats in self.stats.items()
+            },
+            "decisions": dict(self.decisions),
+        }
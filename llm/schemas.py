@@ -0,0 +1,133 @@
+"""
+LLM响应的结构定义与校验
+为 screen_jd / rank_experiences 提供 JSON Schema（用于结构化输出请求），
+并在本地校验解析结果，找出需要修复或重新询问的字段
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+TOP_K = 4
+
+SCREENING_FIELDS = {
+    "citizenship_required": bool,
+    "senior_level_required": bool,
+    "expected_graduation_mentioned": bool,
+    "expected_graduation_time": (str, type(None)),
+    "reason": str,
+}
+
+
+def screening_schema() -> Dict[str, Any]:
+    """screen_jd 的 JSON Schema"""
+    return {
+        "type": "object",
+        "properties": {
+            "citizenship_required": {"type": "boolean"},
+            "senior_level_required": {"type": "boolean"},
+            "expected_graduation_mentioned": {"type": "boolean"},
+            "expected_graduation_time": {"type": ["string", "null"]},
+            "reason": {"type": "string"},
+        },
+        "required": list(SCREENING_FIELDS),
+        "additionalProperties": False,
+    }
+
+
+def ranking_schema(valid_ids: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    """rank_experiences 的 JSON Schema；提供经历ID时把 id 限定为经历库中的值"""
+    id_schema: Dict[str, Any] = {"type": "string"}
+    if valid_ids:
+        id_schema["enum"] = list(valid_ids)
+    return {
+        "type": "object",
+        "properties": {
+            "match_percentage": {"type": "integer", "minimum": 0, "maximum": 100},
+            "ranked_experiences": {
+                "type": "array",
+                "minItems": TOP_K,
+                "maxItems": TOP_K,
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "id": id_schema,
+                        "rank": {"type": "integer", "minimum": 1, "maximum": TOP_K},
+                        "justification": {"type": "string"},
+                    },
+                    "required": ["id", "rank", "justification"],
+                    "additionalProperties": False,
+                },
+            },
+        },
+        "required": ["match_percentage", "ranked_experiences"],
+        "additionalProperties": False,
+    }
+
+
+def validate_screening(result: Dict[str, Any]) -> Dict[str, str]:
+    """
+    校验筛选结果
+
+    Returns:
+        Dict[str, str]: 不合法的字段 -> 问题说明；为空表示通过
+    """
+    errors = {}
+    for name, expected in SCREENING_FIELDS.items():
+        if name not in result:
+            errors[name] = "缺失"
+        elif not isinstance(result[name], expected):
+            errors[name] = f"类型错误: {result[name]!r}"
+    return errors
+
+
+def normalize_ranking(result: Dict[str, Any], valid_ids: Optional[Sequence[str]]) -> Dict[str, str]:
+    """
+    校验并就地修正排名结果
+
+    能在本地修正的问题直接修正：丢弃不存在或重复的经历ID、按名次排序后
+    重新编号为 1..n、截断多余条目、把匹配度限制在 0-100。修正不了的
+    （有效经历不足 TOP_K 条、匹配度缺失）作为错误返回，交给调用方重新询问。
+
+    Returns:
+        Dict[str, str]: 仍需修复的字段 -> 问题说明；为空表示通过
+    """
+    errors = {}
+
+    percentage = result.get("match_percentage")
+    if isinstance(percentage, (int, float)) and not isinstance(percentage, bool):
+        result["match_percentage"] = max(0, min(100, int(round(percentage))))
+    else:
+        errors["match_percentage"] = "缺失或不是数字"
+
+    items = result.get("ranked_experiences")
+    if not isinstance(items, list):
+        items = []
+    valid = set(valid_ids) if valid_ids else None
+
+    # (排序键, 原始位置, 条目)
+    kept: List[Tuple[int, int, Dict[str, Any]]] = []
+    seen = set()
+    for position, item in enumerate(items):
+        if not isinstance(item, dict):
+            continue
+        exp_id = item.get("id")
+        if not isinstance(exp_id, str) or exp_id in seen or (valid is not None and exp_id not in valid):
+            continue
+        seen.add(exp_id)
+        rank = item.get("rank")
+        sort_key = rank if isinstance(rank, int) and not isinstance(rank, bool) and 1 <= rank <= TOP_K else TOP_K + 1
+        kept.append((sort_key, position, item))
+
+    kept.sort(key=lambda entry: (entry[0], entry[1]))
+    ranked = []
+    for new_rank, (_, _, item) in enumerate(kept[:TOP_K], 1):
+        justification = item.get("justification")
+        ranked.append({
+            "id": item["id"],
+            "rank": new_rank,
+            "justification": justification if isinstance(justification, str) else "",
+        })
+    result["ranked_experiences"] = ranked
+
+    if len(ranked) < TOP_K:
+        errors["ranked_experiences"] = f"有效经历只有 {len(ranked)} 条，还需要 {TOP_K - len(ranked)} 条"
+    return errors
@@ -6,50 +6,134 @@
 import asyncio
 import json
 import os
+import time
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import TYPE_CHECKING, Dict, List, Any, Optional, Tuple, Union
 
 from data_loader import load_config, load_positions, load_experiences, get_position_info
 from llm.manager import UnifiedLLMManager
-from report_generator import create_markdown_report
+from models import PositionInfo, PositionResult, Ranking, Routing, Screening
+from utils.cancellation import AnalysisCancelled, GracefulStop, parse_duration
+from utils.experience_index import ExperienceIndex
+from utils.file_watcher import FileWatcher
+from utils.work_queue import WorkQueue, worker_id
+from utils.profiler import profiled, profiler, span
+from utils.workbook_writer import DEFAULT_SETTINGS as WRITE_BACK_DEFAULTS, STATUS_COLUMN, write_back
+from utils.result_store import ResultStore, jd_hash
+from scheduler import BudgetTracker, PositionScheduler, RunBudget
+from llm.budget import BudgetController, STAGE_LABELS, STAGE_STOPPED
+
+# pandas、numpy（报告聚合）和 openai 导入都较慢，只在真正用到时导入，
+# 使 --help 和全部命中缓存的运行能快速启动
+if TYPE_CHECKING:
+    import pandas as pd
+    from analysis.aggregation import RankAggregator
+
+
+@dataclass
+class Candidate:
+    """一个候选人及其经历库"""
+    name: str  # 显示名和输出文件后缀：经历库文件名（不含扩展名）；单候选人时为空字符串
+    key: str  # 结果存储中的候选人标识：始终为经历库文件名，增减其他经历库时已有排名仍可复用
+    path: str
+    experiences: List[Dict[str, Any]]
+    index: ExperienceIndex
+
+
+def load_candidates(experience_paths: Union[str, List[str]]) -> List[Candidate]:
+    """
+    加载一个或多个经历库，每个经历库对应一个候选人
+
+    Raises:
+        ValueError: 多个经历库的文件名（不含扩展名）重复
+    """
+    paths = [experience_paths] if isinstance(experience_paths, str) else list(experience_paths)
+    keys = [os.path.splitext(os.path.basename(path))[0] for path in paths]
+    if len(set(keys)) != len(keys):
+        raise ValueError(f"经历库文件名重复，无法区分候选人: {', '.join(paths)}")
+    candidates = []
+    for key, path in zip(keys, paths):
+        experiences = load_experiences(path)
+        name = key if len(paths) > 1 else ""
+        candidates.append(Candidate(name, key, path, experiences, ExperienceIndex(experiences)))
+    return candidates
 
 
 class ResumeOptimizer:
     """简历优化器主类"""
     
-    def __init__(self):
+    def __init__(self, store_path: str = "results.db", since_last_run: bool = False,
+                 prioritize: bool = False, budget: RunBudget = None, concurrency: int = 1,
+                 mock_latency: float = None, write_back: bool = False, deadline: float = None):
         self.llm_manager = None
+        self.config = {}
         self.positions_data = None
-        self.experiences_data = None
-        self.analysis_results = []
+        self.candidates: List[Candidate] = []
+        self.analysis_results: List[PositionResult] = []
+        self.store = ResultStore(store_path)
+        self.since_last_run = since_last_run
+        self.rerank_stats = {"reused": 0, "reranked": 0, "full": 0}
+        self.budget = budget or RunBudget()
+        # 设置了预算时总是按优先级分析，把预算花在最有希望的职位上
+        self.prioritize = prioritize or self.budget.is_limited()
+        self.deferred_positions: List[PositionInfo] = []
+        # 运行被中断（信号或截止时间）时尚未完成的职位和中断原因
+        self.unfinished_positions: List[PositionInfo] = []
+        self.stop_reason: Optional[str] = None
+        self.exit_code = 0
+        # 允许运行的秒数，到达后取消进行中的请求并保存已完成的结果
+        self.deadline = deadline
+        self.concurrency = max(concurrency, 1)
+        self.tracker = None
+        # 设置时使用本地模拟LLM，不需要API密钥
+        self.mock_latency = mock_latency
+        # 分析完成后把结论写回职位表，之后的运行自然跳过已处理的行
+        self.write_back = write_back
+    
+    @property
+    def experiences_data(self) -> Optional[List[Dict[str, Any]]]:
+        """第一个候选人的经历库（单候选人模式下即唯一的经历库）"""
+        return self.candidates[0].experiences if self.candidates else None
+    
+    @property
+    def experience_index(self) -> Optional[ExperienceIndex]:
+        """第一个候选人的经历库索引，用于调度打分"""
+        return self.candidates[0].index if self.candidates else None
     
     def check_environment(self) -> bool:
-        """检查环境变量和必要文件"""
+        """检查所选模型需要的API密钥（需先初始化LLM管理器）"""
         print("🔍 检查运行环境...")
         
-        # 检查API密钥
-        required_keys = ['GEMINI_API_KEY', 'OPENAI_API_KEY', 'ANTHROPIC_API_KEY']
+        if self.mock_latency is not None:
+            print("✅ 使用模拟LLM，跳过API密钥检查")
+            return True
+        
+        # 只检查路由配置中会用到的模型的API密钥
+        required_keys = self.llm_manager.required_api_keys()
         missing_keys = []
         
-        for key in required_keys:
+        for name, key in required_keys.items():
             if not os.getenv(key):
-                missing_keys.append(key)
+                missing_keys.append(f"{key} ({name})")
         
         if missing_keys:
             print(f"❌ 缺少API密钥: {', '.join(missing_keys)}")
-            print("请确保 .env 文件包含所有必要的API密钥")
+            print("请在 .env 文件中补充，或从 prompts.yaml 的 routing 候选模型中去掉对应模型")
             return False
         
-        print("✅ API密钥检查通过")
+        print(f"✅ API密钥检查通过 ({', '.join(required_keys)})")
         return True
     
-    def load_data(self, config_path: str = "config_example.json", experience_path: str = "experiences_example.json") -> bool:
-        """加载数据文件"""
+    def load_data(self, config_path: str = "config_example.json",
+                  experience_path: Union[str, List[str]] = "experiences_example.json") -> bool:
+        """加载数据文件；experience_path 为多个经历库时进入多候选人模式"""
         print("📂 加载数据文件...")
         
         try:
             # 加载配置
             config = load_config(config_path)
+            self.config = config
             print(f"✅ 配置文件加载成功: {config_path}")
             
             # 加载职位数据
@@ -57,8 +141,13 @@ class ResumeOptimizer:
             print(f"✅ 职位数据加载成功: {len(self.positions_data)} 个职位")
             
             # 加载经历数据
-            self.experiences_data = load_experiences(experience_path)
-            print(f"✅ 经历数据加载成功: {len(self.experiences_data)} 个经历")
+            self.candidates = load_candidates(experience_path)
+            self.adopt_legacy_rankings()
+            if len(self.candidates) > 1:
+                print(f"✅ 经历数据加载成功: {len(self.candidates)} 个候选人 "
+                      f"({', '.join(f'{c.name}: {len(c.experiences)} 个经历' for c in self.candidates)})")
+            else:
+                print(f"✅ 经历数据加载成功: {len(self.experiences_data)} 个经历")
             
             return True
             
@@ -69,6 +158,20 @@ class ResumeOptimizer:
             print(f"❌ 数据加载失败: {e}")
             return False
     
+    def adopt_legacy_rankings(self):
+        """
+        把旧版单候选人模式的排名记录（候选人为空字符串）归属到对应的经历库
+
+        只有一个经历库时全部归属于它；多个经历库时只迁移排名时经历库快照与某个经历库当前版本一致的记录，
+        无法确定归属的记录保留不动
+        """
+        single = len(self.candidates) == 1
+        for candidate in self.candidates:
+            moved = self.store.adopt_unnamed_rankings(candidate.key,
+                                                      None if single else candidate.index.library_hash)
+            if moved:
+                print(f"🔧 迁移结果存储: {moved} 条单候选人排名记录归属到经历库 {candidate.key}")
+
     def initialize_llm_manager(self) -> bool:
         """初始化LLM管理器"""
         print("🤖 初始化LLM管理器...")
@@ -77,109 +180,407 @@ class ResumeOptimizer:
             self.llm_manager = UnifiedLLMManager(
                 os.getenv('GEMINI_API_KEY'),
                 os.getenv('OPENAI_API_KEY'),
-                os.getenv('ANTHROPIC_API_KEY')
+                os.getenv('ANTHROPIC_API_KEY'),
+                mock_latency=self.mock_latency
             )
+            if self.budget.max_dollars is not None:
+                self.llm_manager.set_budget(
+                    BudgetController.from_config(self.budget.max_dollars, self.llm_manager.prompt_manager.config)
+                )
             print("✅ LLM管理器初始化成功")
             return True
         except Exception as e:
             print(f"❌ LLM管理器初始化失败: {e}")
             return False
     
-    async def analyze_single_position(self, position_data: Dict[str, Any]) -> Dict[str, Any]:
+    def _ranking_models(self) -> List[str]:
+        """
+        本次排名使用的模型：先由路由器去掉变慢或出错的模型，
+        有费用预算时再按降级阶段减少模型
+
+        Returns:
+            List[str]: 模型名列表，为空表示预算只够筛选
+        """
+        models = self.llm_manager.choose_rankers()
+        cost_control = self.llm_manager.budget
+        if cost_control is None:
+            return models
+        cost_control.update_stage(context="排名前")
+        return cost_control.select_rankers(models)
+
+    def _calls_per_position(self) -> int:
+        """
+        下一个职位最多产生的调用数：1次筛选 + 每个候选人各排名模型一次
+
+        排名模型数按路由器的上限和当前费用降级阶段估计（不做路由决策，不计入路由统计）
+        """
+        router = self.llm_manager.router
+        models = router.ranking_candidates[:router.max_rankers]
+        if self.llm_manager.budget is not None:
+            models = self.llm_manager.budget.select_rankers(models)
+        return 1 + len(models) * len(self.candidates)
+
+    async def _rank_position(self, jd_key: str, jd_text: str, models: List[str],
+                             candidate: Candidate) -> Dict[str, Ranking]:
+        """
+        用某个候选人的经历库对职位进行经历排名并保存结果
+
+        Raises:
+            Exception: 排名调用整体失败（单个模型失败时记录在该模型的 Ranking.error 中）
+        """
+        label = f"[{candidate.name}] " if candidate.name else ""
+        try:
+            rankings = await self.llm_manager.rank_experiences_all(
+                jd_text, candidate.experiences, candidate.index.layout_hash, models
+            )
+            print(f"    ✅ {label}排名完成")
+
+            # 打印各LLM排名摘要
+            for llm_name, ranking in rankings.items():
+                print(f"    📝 {label}{llm_name} 排名结果:")
+                if ranking.experiences:
+                    for exp_id, rank, justification in ranking.experiences:
+                        print(f"      #{rank} -> {exp_id} : {justification[:60]}...")
+                else:
+                    print(f"      ⚠️  无排名数据: {ranking.error or 'unknown'}")
+
+            await asyncio.to_thread(self.store.save_rankings, jd_key,
+                                    {name: ranking.to_dict() for name, ranking in rankings.items()},
+                                    candidate.index.library_hash, candidate.index.hashes, candidate.key)
+        except Exception as e:
+            print(f"    ❌ {label}排名失败: {e}")
+            raise
+        return rankings
+
+    async def _rank_or_skip(self, jd_key: str, position_info: PositionInfo, screening: Screening,
+                            reused: Optional[Dict[str, Dict[str, Ranking]]] = None) -> PositionResult:
+        """
+        通过筛选的职位进行排名；费用预算只够筛选时跳过排名
+
+        筛选结果由所有候选人共享，排名按候选人并发展开（共享同一组客户端、路由和限流）
+
+        Args:
+            reused: 可以直接复用的候选人排名，这些候选人不再重新排名
+        """
+        reused = reused or {}
+        models = self._ranking_models()
+        routing = Routing(screening.model, models)
+        if not models:
+            print("    💸 预算不足，仅完成筛选")
+            return PositionResult(position_info, screening, ranking_skipped="预算不足，仅完成筛选", routing=routing)
+        
+        print(f"    🧭 排名模型: {', '.join(models)}")
+        pending = [candidate for candidate in self.candidates if candidate.name not in reused]
+        ranked = await asyncio.gather(*(
+            self._rank_position(jd_key, position_info.job_description, models, candidate)
+            for candidate in pending
+        ), return_exceptions=True)
+        rankings, ranking_errors = dict(reused), {}
+        for candidate, outcome in zip(pending, ranked):
+            if isinstance(outcome, BaseException):
+                ranking_errors[candidate.name] = f"排名失败: {outcome}"
+            else:
+                rankings[candidate.name] = outcome
+        return PositionResult(position_info, screening, rankings, ranking_errors, routing=routing)
+
+    def _is_stale(self, stored_result: Dict[str, Any], prompt_type: str, llm_name: str) -> bool:
+        """已保存的结果是否由旧版本prompt生成（无版本记录的旧结果视为有效）"""
+        stored_version = stored_result.get("prompt_version")
+        if stored_version is None:
+            return False
+        return stored_version != self.llm_manager.prompt_manager.template_version(prompt_type, llm_name)
+
+    async def _reuse_stored_results(self, jd_key: str, position_info: PositionInfo) -> Optional[PositionResult]:
+        """
+        增量模式：复用上次运行保存的结果
+
+        筛选与经历库无关，只要有记录就直接复用；排名仅在经历库变更可能影响
+        该职位的入选经历时才重新计算。没有任何记录时返回 None，走完整分析。
+        """
+        stored_screening = await asyncio.to_thread(self.store.get_screening, jd_key)
+        if stored_screening is None:
+            return None
+        model, screening_result = stored_screening
+        if self._is_stale(screening_result, 'screen_jd', model):
+            print("    🔁 筛选prompt已更新，重新分析")
+            return None
+        screening = Screening.from_dict(model, screening_result)
+
+        if screening.rejected:
+            print("    ♻️  复用筛选结果: 职位不合适")
+            self.rerank_stats["reused"] += 1
+            return PositionResult(position_info, screening)
+
+        reused = {}
+        for candidate in self.candidates:
+            rankings = await self._reusable_rankings(jd_key, position_info.job_description, candidate)
+            if rankings is not None:
+                reused[candidate.name] = rankings
+        if len(reused) == len(self.candidates):
+            print("    ♻️  复用筛选和排名结果")
+            self.rerank_stats["reused"] += 1
+            return PositionResult(position_info, screening, reused)
+
+        self.rerank_stats["reranked"] += 1
+        return await self._rank_or_skip(jd_key, position_info, screening, reused)
+
+    async def _reusable_rankings(self, jd_key: str, jd_text: str, candidate: Candidate) -> Optional[Dict[str, Ranking]]:
+        """
+        某个候选人已保存的排名在当前经历库下是否仍然有效；有效时返回排名结果
+        """
+        stored_rankings = await asyncio.to_thread(self.store.get_rankings, jd_key, candidate.key)
+        if stored_rankings is None:
+            return None
+        ranking_results, old_hashes = stored_rankings
+        diff = candidate.index.diff(old_hashes)
+        top_ids = {
+            item.get("id")
+            for res in ranking_results.values()
+            for item in res.get("ranked_experiences", [])
+        }
+        failed = any("error" in res for res in ranking_results.values())
+        stale = any(self._is_stale(res, 'rank_experiences', llm_name) for llm_name, res in ranking_results.items())
+        if not failed and not stale and not candidate.index.needs_rerank(jd_text, top_ids, diff):
+            if not diff.is_empty():
+                await asyncio.to_thread(self.store.revalidate_rankings, jd_key, candidate.index.library_hash,
+                                        candidate.index.hashes, candidate.key)
+            return {name: Ranking.from_dict(name, res) for name, res in ranking_results.items()}
+        label = f"[{candidate.name}] " if candidate.name else ""
+        print(f"    🔁 {label}经历库变更影响该职位 ({diff.summary()})，重新排名")
+        return None
+
+    @profiled("position.analyze")
+    async def analyze_single_position(self, position_data: Dict[str, Any]) -> PositionResult:
         """分析单个职位"""
         position_info = get_position_info(position_data)
-        jd_text = position_info['job_description']
+        jd_text = position_info.job_description
+        jd_key = jd_hash(jd_text)
         
-        print(f"  🔍 分析: {position_info['company']} - {position_info['position']}")
+        print(f"  🔍 分析: {position_info.company} - {position_info.position}")
+        await asyncio.to_thread(self.store.save_position, jd_key, position_info.to_dict())
+
+        if self.since_last_run:
+            reused = await self._reuse_stored_results(jd_key, position_info)
+            if reused is not None:
+                return reused
+        self.rerank_stats["full"] += 1
         
-        # 步骤1: 仅使用 Gemini 进行初步筛选
+        # 步骤1: 由路由器选择一个模型进行初步筛选
         try:
-            gemini_result = await self.llm_manager.gemini.screen_jd(jd_text)
-            print("    ✅ Gemini 筛选完成")
+            screening = await self.llm_manager.screen_jd(jd_text)
+            print(f"    ✅ {screening.model} 筛选完成")
         except Exception as e:
-            print(f"    ❌ Gemini 筛选失败: {e}")
-            return {
-                "position_info": position_info,
-                "screening_results": {"gemini": {"error": str(e)}},
-                "ranking_results": {},
-                "error": f"筛选失败: {str(e)}"
-            }
-
-        # 如果 Gemini 判断不合适则直接拒绝
-        if gemini_result.get("citizenship_required", False) or gemini_result.get("senior_level_required", False):
-            print("    🚫 职位不合适 (Gemini 判断有身份或高级要求)")
-            return {
-                "position_info": position_info,
-                "screening_results": {"gemini": gemini_result},
-                "ranking_results": {},
-                "rejected": True,
-                "rejection_reasons": ["gemini"]
-            }
-
-        # 记录筛选结果，仅包含 Gemini
-        screening_results = {"gemini": gemini_result}
+            print(f"    ❌ 筛选失败: {e}")
+            return PositionResult(position_info, error=f"筛选失败: {str(e)}")
+
+        # 调用失败的筛选结果不保存，下次运行重新筛选
+        if screening.error is None:
+            await asyncio.to_thread(self.store.save_screening, jd_key, screening.model, screening.to_dict())
+
+        # 如果筛选判断不合适则直接拒绝
+        if screening.rejected:
+            print(f"    🚫 职位不合适 ({screening.model} 判断有身份或高级要求)")
+            return PositionResult(position_info, screening, routing=Routing(screening.model))
         
         # 步骤2: 经历排名
-        try:
-            ranking_results = await self.llm_manager.rank_experiences_all(jd_text, self.experiences_data)
-            print("    ✅ 排名完成")
-
-            # 打印各LLM排名摘要
-            for llm_name, res in ranking_results.items():
-                print(f"    📝 {llm_name} 排名结果:")
-                ranked = res.get("ranked_experiences")
-                if ranked:
-                    for item in ranked:
-                        rid = item.get("id", "?")
-                        rank = item.get("rank", "?")
-                        justification = item.get("justification", "")[:60]
-                        print(f"      #{rank} -> {rid} : {justification}...")
-                else:
-                    print(f"      ⚠️  无排名数据: {res.get('error', 'unknown')}")
-        except Exception as e:
-            print(f"    ❌ 排名失败: {e}")
-            ranking_results = {"error": f"排名失败: {str(e)}"}
+        return await self._rank_or_skip(jd_key, position_info, screening)
+    
+    def _ordered_positions(self, positions: "pd.DataFrame" = None) -> List[Dict[str, Any]]:
+        """按调度优先级（启用时）或表格顺序返回待分析的职位，默认为全部已加载职位"""
+        positions = self.positions_data if positions is None else positions
+        if not self.prioritize:
+            return [row.to_dict() for _, row in positions.iterrows()]
         
-        return {
-            "position_info": position_info,
-            "screening_results": screening_results,
-            "ranking_results": ranking_results,
-            "rejected": False
-        }
+        scheduler = PositionScheduler(self.experience_index, self.config)
+        ordered = scheduler.order(positions)
+        print("📌 已按优先级排序 (发布日期 / 关键词匹配 / 公司优先级)")
+        for score, row in ordered[:5]:
+            print(f"   {score:.3f}  {row.get('公司名字')} - {row.get('岗位名')}")
+        return [row for _, row in ordered]
     
-    async def analyze_all_positions(self) -> List[Dict[str, Any]]:
-        """分析所有职位"""
+    async def analyze_all_positions(self) -> List[PositionResult]:
+        """
+        分析所有职位
+
+        最多同时分析 concurrency 个职位；每个职位开始前检查预算，
+        并发下相同的JD（如同一职位的多个地点）由客户端的 single-flight 合并为一次调用
+        """
         print(f"🚀 开始分析 {len(self.positions_data)} 个职位...")
+        if self.concurrency > 1:
+            print(f"⚡ 并发数: {self.concurrency}")
+        if self.budget.is_limited():
+            print(f"💰 预算: {self.budget.describe()}")
         
-        self.analysis_results = []
+        try:
+            self.analysis_results, self.deferred_positions = await self._analyze_positions(self._ordered_positions())
+        except AnalysisCancelled as e:
+            self.analysis_results, self.deferred_positions = e.results, e.deferred
+            self.unfinished_positions = e.unfinished
+            raise
+        return self.analysis_results
+
+    async def _analyze_positions(self, positions: List[Dict[str, Any]]) -> Tuple[List[PositionResult],
+                                                                                  List[PositionInfo]]:
+        """
+        按给定顺序分析一批职位
+
+        Returns:
+            (分析结果, 因预算不足推迟的职位信息)
+
+        Raises:
+            AnalysisCancelled: 被取消时，取消进行中的职位并携带已完成的结果
+        """
+        if self.budget.is_limited() and self.tracker is None:
+            self.tracker = BudgetTracker(self.budget)
+        tracker = self.tracker
+        cost_control = self.llm_manager.budget
+        slots = asyncio.Semaphore(self.concurrency)
+        tasks = []
+        deferred = []
+
+        async def analyze(position_dict: Dict[str, Any]) -> PositionResult:
+            try:
+                return await self.analyze_single_position(position_dict)
+            finally:
+                slots.release()
         
-        for i, position_data in enumerate(self.positions_data.iterrows(), 1):
-            print(f"\n📋 处理职位 {i}/{len(self.positions_data)}")
+        try:
+            for i, position_dict in enumerate(positions, 1):
+                # 等到有空闲名额再检查预算，使检查基于最新的花费
+                with span("scheduler.wait_slot"):
+                    await slots.acquire()
+                reason = None
+                if tracker is not None:
+                    tracker.record_calls(self.llm_manager.call_count)
+                    reason = tracker.exhausted_by(self._calls_per_position())
+                if reason is None and cost_control is not None:
+                    if cost_control.update_stage(context=f"第 {i} 个职位前") == STAGE_STOPPED:
+                        reason = f"费用已用 ${cost_control.spent:.2f}/${cost_control.max_dollars:.2f}"
+                if reason:
+                    slots.release()
+                    print(f"\n💸 预算不足 ({reason})，剩余 {len(positions) - i + 1} 个职位推迟分析")
+                    deferred = [get_position_info(row) for row in positions[i - 1:]]
+                    break
             
-            # 获取行数据
-            _, row_data = position_data
-            position_dict = row_data.to_dict()
+                print(f"\n📋 处理职位 {i}/{len(positions)}")
             
-            # 分析单个职位
-            result = await self.analyze_single_position(position_dict)
-            self.analysis_results.append(result)
+                # 分析单个职位
+                tasks.append(asyncio.create_task(analyze(position_dict)))
             
-            # 简短的间隔，避免API限制
-            await asyncio.sleep(0.1)
+                # 简短的间隔，避免API限制
+                with span("scheduler.throttle"):
+                    await asyncio.sleep(0.1)
         
-        return self.analysis_results
+            # 结果按职位顺序排列
+            return list(await asyncio.gather(*tasks)), deferred
+        except asyncio.CancelledError:
+            # 进行中的职位一并取消；已完成的职位保留（各阶段结果在完成时已写入结果存储）
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            finished, unfinished = [], []
+            for row, task in zip(positions, tasks):
+                if task.cancelled() or task.exception() is not None:
+                    unfinished.append(get_position_info(row))
+                else:
+                    finished.append(task.result())
+            if not deferred:
+                unfinished += [get_position_info(row) for row in positions[len(tasks):]]
+            raise AnalysisCancelled(finished, unfinished, deferred) from None
     
+    @staticmethod
+    def _candidate_output(path: str, candidate: Candidate) -> str:
+        """候选人的输出路径：多候选人时在文件名后加候选人名"""
+        if not candidate.name:
+            return path
+        root, ext = os.path.splitext(path)
+        return f"{root}_{candidate.name}{ext}"
+
+    def report_paths(self, output_path: str) -> List[str]:
+        """各候选人报告的实际路径"""
+        return [self._candidate_output(output_path, candidate) for candidate in self.candidates] or [output_path]
+
+    @profiled("report.render")
     def generate_report(self, output_path: str = "resume_analysis_report.md") -> bool:
-        """生成分析报告"""
+        """生成分析报告；多候选人时每个候选人一份"""
         print(f"📝 生成分析报告...")
         
+        from analysis.aggregation import RankAggregator
+        from report_generator import create_markdown_report
+        
         try:
-            create_markdown_report(self.analysis_results, self.experiences_data, output_path)
+            aggregator = RankAggregator.from_config(self.llm_manager.prompt_manager.config.get('aggregation'))
+            budget_summary = self.llm_manager.budget.summary() if self.llm_manager.budget else None
+            for candidate in self.candidates:
+                create_markdown_report(self.analysis_results, candidate.experiences,
+                                       self._candidate_output(output_path, candidate),
+                                       aggregator, self.deferred_positions, budget_summary,
+                                       self.llm_manager.router.summary(), candidate.name,
+                                       self.unfinished_positions, self.stop_reason)
             return True
         except Exception as e:
             print(f"❌ 报告生成失败: {e}")
             return False
     
+    def _write_back_values(self, result: PositionResult, settings: Dict[str, Any],
+                           aggregator: "RankAggregator") -> Optional[Dict[str, Any]]:
+        """
+        一个职位要写回职位表的列值
+
+        出错或只完成筛选的职位不写（status 保持为空，下次运行重新处理）；
+        多候选人时匹配度和推荐经历按 "候选人: 值" 分别列出
+        """
+        if result.error or result.ranking_skipped:
+            return None
+        if result.rejected:
+            return {STATUS_COLUMN: settings["rejected_status"]}
+        
+        matches, top_ids = {}, {}
+        for candidate in self.candidates:
+            valid = result.valid_rankings(candidate.name)
+            if not valid:
+                return None
+            percentages = [ranking.match_percentage for ranking in valid.values()
+                           if isinstance(ranking.match_percentage, (int, float))]
+            matches[candidate.name] = round(sum(percentages) / len(percentages)) if percentages else None
+            payloads = {name: ranking.to_dict() for name, ranking in valid.items()}
+            top_ids[candidate.name] = ", ".join(item["id"] for item in aggregator.aggregate([payloads])[0])
+        
+        def cell(values: Dict[str, Any]) -> Any:
+            if len(values) == 1:
+                return next(iter(values.values()))
+            return "; ".join(f"{name}: {'-' if value is None else value}" for name, value in values.items())
+        
+        return {
+            STATUS_COLUMN: settings["suitable_status"],
+            settings["match_column"]: cell(matches),
+            settings["top_ids_column"]: cell(top_ids),
+        }
+    
+    @profiled("excel.write_back")
+    def write_back_results(self) -> bool:
+        """把所有已分析职位的状态、平均匹配度和共识推荐经历一次性写回职位表"""
+        from analysis.aggregation import RankAggregator
+        
+        print("📝 回写职位表...")
+        settings = dict(WRITE_BACK_DEFAULTS, **self.config.get('write_back', {}))
+        aggregator = RankAggregator.from_config(self.llm_manager.prompt_manager.config.get('aggregation'))
+        updates = {}
+        for result in self.analysis_results:
+            values = self._write_back_values(result, settings, aggregator)
+            if values is not None:
+                updates[self._row_key(result.position)] = values
+        
+        try:
+            updated = write_back(self.config['excel_file'], self.config['sheet_name'], updates, self._row_key)
+        except Exception as e:
+            print(f"❌ 回写职位表失败: {e}")
+            return False
+        skipped = len(self.analysis_results) - len(updates)
+        print(f"✅ 已回写 {updated} 行到 {self.config['excel_file']}"
+              + (f"（{skipped} 个出错或未完成的职位保持待处理）" if skipped else ""))
+        return True
+    
     def print_summary(self):
         """打印分析总结"""
         if not self.analysis_results:
@@ -187,7 +588,7 @@ class ResumeOptimizer:
             return
         
         total = len(self.analysis_results)
-        suitable = sum(1 for r in self.analysis_results if not r.get("rejected", False))
+        suitable = sum(1 for r in self.analysis_results if not r.rejected)
         rejected = total - suitable
         
         print("\n" + "="*50)
@@ -197,16 +598,330 @@ class ResumeOptimizer:
         print(f"✅ 推荐投递: {suitable} 个")
         print(f"🚫 不推荐投递: {rejected} 个")
         print(f"📈 推荐率: {suitable/total*100:.1f}%")
+        if self.deferred_positions:
+            print(f"⏸️  预算不足推迟: {len(self.deferred_positions)} 个")
+        if self.unfinished_positions:
+            print(f"🛑 中断未完成: {len(self.unfinished_positions)} 个")
+        cost_control = self.llm_manager.budget if self.llm_manager else None
+        if cost_control is not None:
+            print(f"💰 费用: ${cost_control.spent:.2f}/${cost_control.max_dollars:.2f}, "
+                  f"最终阶段: {STAGE_LABELS[cost_control.stage]}, 降级 {len(cost_control.decisions)} 次")
+        if self.llm_manager is not None and self.llm_manager.coalesced_count:
+            print(f"🔗 合并相同请求: {self.llm_manager.coalesced_count} 次")
+        if self.llm_manager is not None:
+            router = self.llm_manager.router
+            print("🧭 模型路由: " + "; ".join(router.describe(name, prompt_type) for name, prompt_type in router.stats))
+        if self.since_last_run:
+            stats = self.rerank_stats
+            print(f"♻️  增量模式: 复用 {stats['reused']} 个, 仅重排 {stats['reranked']} 个, 完整分析 {stats['full']} 个")
         print("="*50)
     
+    @profiled("report.analytics")
+    def generate_analytics(self, output_dir: str, report_path: str) -> bool:
+        """基于全部历史结果生成跨职位分析：导出CSV并追加到报告末尾"""
+        print("📊 生成跨职位分析...")
+        from analysis.analytics import PositionAnalytics
+        from report_generator import append_analytics_section
+        
+        try:
+            analytics_config = self.config.get('analytics', {})
+            for candidate in self.candidates:
+                analytics = PositionAnalytics(self.store, candidate.experiences,
+                                              analytics_config.get('tech_vocabulary'), candidate.key)
+                summary = analytics.summary()
+                paths = analytics.export_csv(os.path.join(output_dir, candidate.name), summary)
+                append_analytics_section(self._candidate_output(report_path, candidate), summary)
+                print(f"✅ 分析CSV已导出: {', '.join(paths)}")
+            return True
+        except Exception as e:
+            print(f"❌ 跨职位分析失败: {e}")
+            return False
+    
+    @staticmethod
+    def _row_key(position_row: Any) -> Tuple[str, str, str]:
+        """职位行的标识：JD内容哈希 + 链接 + 地点（同一JD的不同地点视为不同的行）；也接受 PositionInfo"""
+        info = position_row if isinstance(position_row, PositionInfo) else get_position_info(position_row)
+        return jd_hash(info.job_description), info.link, info.location
+
+    async def _analyze_new_rows(self, seen: set) -> int:
+        """重新读取职位表，只分析之前没见过、且 status 为空的新行，结果追加到已有结果之后"""
+        try:
+            positions = load_positions(self.config)
+        except Exception as e:
+            # 文件可能正在被保存，等下一次变更再读
+            print(f"⚠️ 职位表读取失败，等待下次变更: {e}")
+            return 0
+        self.positions_data = positions
+        is_new = [self._row_key(row) not in seen for _, row in positions.iterrows()]
+        new_rows = positions[is_new]
+        if new_rows.empty:
+            print("📋 职位表已变更，但没有新的待分析职位")
+            return 0
+        
+        print(f"🆕 发现 {len(new_rows)} 个新职位")
+        seen.update(self._row_key(row) for _, row in new_rows.iterrows())
+        try:
+            results, deferred = await self._analyze_positions(self._ordered_positions(new_rows))
+        except AnalysisCancelled as e:
+            self.analysis_results.extend(e.results)
+            self.deferred_positions.extend(e.deferred)
+            self.unfinished_positions.extend(e.unfinished)
+            raise
+        self.analysis_results.extend(results)
+        self.deferred_positions.extend(deferred)
+        return len(results) + len(deferred)
+
+    async def _reload_experiences(self, candidate: Candidate) -> bool:
+        """经历库变更后重新加载，并只对受变更影响的已分析职位重新排名"""
+        try:
+            experiences = load_experiences(candidate.path)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ 经历库读取失败，继续使用当前版本: {e}")
+            return False
+        index = ExperienceIndex(experiences)
+        if index.ordered_hashes == candidate.index.ordered_hashes:
+            return False
+        diff = index.diff(candidate.index.hashes)
+        candidate.experiences, candidate.index = experiences, index
+        if diff.is_empty():
+            # 只调整了顺序（或重复条目）：之后的排名使用新的经历库文本，已有排名仍然有效
+            print(f"📚 经历库顺序已更新: {candidate.path}，已有排名不受影响")
+            return False
+        print(f"📚 经历库已更新: {candidate.path} ({diff.summary()})，检查受影响的职位")
+        
+        slots = asyncio.Semaphore(self.concurrency)
+
+        async def refresh(i: int, result: PositionResult):
+            if result.error:
+                return
+            info = result.position
+            async with slots:
+                updated = await self._reuse_stored_results(jd_hash(info.job_description), info)
+            if updated is not None:
+                self.analysis_results[i] = updated
+        
+        await asyncio.gather(*(refresh(i, result) for i, result in enumerate(self.analysis_results)))
+        return True
+
+    async def watch(self, output_path: str, analytics_dir: str = None, interval: float = 0.25):
+        """
+        常驻监听模式：LLM客户端及其连接池保持常驻，职位表或经历库变更时
+        只处理新增的职位 / 受影响的职位，并重新生成报告
+        """
+        excel_path = self.config['excel_file']
+        experience_paths = [candidate.path for candidate in self.candidates]
+        watcher = FileWatcher([excel_path] + experience_paths, interval)
+        seen = {self._row_key(row) for _, row in self.positions_data.iterrows()}
+        print(f"\n👀 监听中: {', '.join([excel_path] + experience_paths)}（Ctrl+C 退出）")
+        
+        try:
+            while True:
+                changed = await watcher.wait_for_change()
+                started = time.monotonic()
+                updated = False
+                for candidate in self.candidates:
+                    if candidate.path in changed:
+                        updated = await self._reload_experiences(candidate) or updated
+                if excel_path in changed:
+                    updated = await self._analyze_new_rows(seen) > 0 or updated
+                if updated:
+                    self.generate_report(output_path)
+                    if analytics_dir:
+                        self.generate_analytics(analytics_dir, output_path)
+                    if self.write_back and self.write_back_results():
+                        # 自己写入职位表引起的变更不需要再处理
+                        watcher.acknowledge(excel_path)
+                    print(f"✅ 报告已更新，共 {len(self.analysis_results)} 个职位 "
+                          f"(本批用时 {time.monotonic() - started:.1f}s)")
+                print("👀 继续监听...")
+        except asyncio.CancelledError:
+            print("\n👋 停止监听")
+            raise
+    
+    def enqueue_positions(self, queue: WorkQueue) -> int:
+        """生产者：把待分析职位按（优先级）顺序写入任务队列，已在队列中的职位不重复加入"""
+        positions = self._ordered_positions()
+        added = sum(queue.enqueue("|".join(self._row_key(row)), row) for row in positions)
+        print(f"📥 已加入队列 {added} 个职位（{len(positions) - added} 个已在队列中）")
+        return added
+
+    @staticmethod
+    async def _keep_lease(queue: WorkQueue, job, owner: str, lease_seconds: float):
+        """处理期间定期续约，避免长任务被当作崩溃而被其他进程重复领取"""
+        while True:
+            await asyncio.sleep(lease_seconds / 3)
+            if not await asyncio.to_thread(queue.heartbeat, job, owner, lease_seconds):
+                print(f"⚠️ 任务 {job.id} 的租约已被其他进程接管")
+                return
+
+    async def run_worker(self, queue: WorkQueue, lease_seconds: float = 120) -> int:
+        """
+        工作进程：同时运行 concurrency 个领取循环，直到队列中没有待处理或处理中的任务；
+        队列操作可能等待其他进程的写锁，在线程中执行，不阻塞事件循环
+
+        Returns:
+            int: 本进程处理的任务数
+        """
+        processed = 0
+
+        async def claim_loop(slot: int):
+            nonlocal processed
+            owner = f"{worker_id()}#{slot}"
+            while True:
+                job = await asyncio.to_thread(queue.claim, owner, lease_seconds)
+                if job is None:
+                    if await asyncio.to_thread(queue.is_drained):
+                        return
+                    # 其他进程仍在处理或有任务在等待重试，稍后再领取
+                    await asyncio.sleep(1)
+                    continue
+                
+                print(f"\n📋 [{owner}] 任务 {job.id} (第 {job.attempts} 次尝试)")
+                heartbeat = asyncio.create_task(self._keep_lease(queue, job, owner, lease_seconds))
+                try:
+                    result = await self.analyze_single_position(job.payload)
+                except Exception as e:
+                    await asyncio.to_thread(queue.fail, job, owner, str(e))
+                    continue
+                finally:
+                    heartbeat.cancel()
+                
+                if result.error:
+                    await asyncio.to_thread(queue.fail, job, owner, result.error, result.to_dict())
+                else:
+                    await asyncio.to_thread(queue.complete, job, owner, result.to_dict())
+                processed += 1
+
+        await asyncio.gather(*(claim_loop(slot) for slot in range(self.concurrency)))
+        return processed
+
+    async def run_queue(self, config_path: str, experience_path: Union[str, List[str]], output_path: str,
+                        queue_path: str, workers: int = 2, role: str = "all",
+                        analytics_dir: str = None) -> bool:
+        """
+        任务队列模式
+
+        Args:
+            role: produce 只入队；work 启动 workers 个工作进程直到队列清空；
+                  render 用队列中的结果生成报告；all 依次执行三步
+        """
+        queue = WorkQueue(queue_path)
+        try:
+            if role in ("all", "produce"):
+                if not self.load_data(config_path, experience_path):
+                    return False
+                self.enqueue_positions(queue)
+            
+            if role in ("all", "work"):
+                if self.budget.is_limited():
+                    print("⚠️ 队列模式下预算按每个工作进程分别计算")
+                print(f"👷 启动 {workers} 个工作进程...")
+                import multiprocessing
+                context = multiprocessing.get_context("spawn")
+                processes = [
+                    context.Process(target=_queue_worker_process, args=(dict(
+                        queue_path=queue_path, store_path=self.store.db_path, experience_path=experience_path,
+                        since_last_run=self.since_last_run, budget=self.budget,
+                        concurrency=self.concurrency, mock_latency=self.mock_latency
+                    ),))
+                    for _ in range(workers)
+                ]
+                for process in processes:
+                    process.start()
+                for process in processes:
+                    await asyncio.to_thread(process.join)
+                    if process.exitcode != 0:
+                        print(f"⚠️ 工作进程 {process.pid} 异常退出 (exit {process.exitcode})，其任务将在租约过期后重新领取")
+            
+            counts = queue.counts()
+            print(f"📊 队列状态: 完成 {counts['done']}, 失败 {counts['failed']}, "
+                  f"待处理 {counts['pending']}, 处理中 {counts['leased']}")
+            
+            if role in ("all", "render"):
+                # 只渲染已有结果，不调用LLM，不需要API密钥
+                if not self.initialize_llm_manager():
+                    return False
+                if not self.candidates:
+                    self.candidates = load_candidates(experience_path)
+                self.analysis_results = [PositionResult.from_dict(result) for result in queue.results()]
+                if not self.generate_report(output_path):
+                    return False
+                if self.write_back:
+                    self.config = self.config or load_config(config_path)
+                    if not self.write_back_results():
+                        return False
+                if analytics_dir and not self.generate_analytics(analytics_dir, output_path):
+                    return False
+                self.print_summary()
+            return True
+        finally:
+            queue.close()
+            self.store.close()
+    
     async def run(self, config_path: str = "config_example.json", 
-                  experience_path: str = "experiences_example.json",
-                  output_path: str = "resume_analysis_report.md") -> bool:
-        """运行完整的分析流程"""
+                  experience_path: Union[str, List[str]] = "experiences_example.json",
+                  output_path: str = "resume_analysis_report.md",
+                  analytics_dir: str = None, watch: bool = False,
+                  watch_interval: float = 0.25) -> bool:
+        """运行完整的分析流程；watch 为 True 时完成后进入常驻监听模式"""
         print("🚀 启动简历优化分析...")
         print(f"⏰ 开始时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         print("-" * 50)
         
+        stop = GracefulStop(self.deadline)
+        try:
+            with stop:
+                try:
+                    success = await self._run(config_path, experience_path, output_path, analytics_dir)
+                    if success and watch:
+                        await self.watch(output_path, analytics_dir, watch_interval)
+                    return success
+                except asyncio.CancelledError:
+                    if not stop.requested:
+                        raise
+                    stop.acknowledge()
+            self.stop_reason, self.exit_code = stop.reason, stop.exit_code
+            return await self.flush_partial_results(output_path, analytics_dir)
+        finally:
+            if self.llm_manager is not None:
+                await self.llm_manager.aclose()
+            self.store.close()
+    
+    async def flush_partial_results(self, output_path: str, analytics_dir: str = None) -> bool:
+        """
+        运行被中断后保存已完成的部分：取消进行中的LLM请求并关闭连接，
+        再为已完成的职位生成报告、回写职位表，并列出未完成的职位
+
+        已完成的筛选和排名在每次调用结束时已写入结果存储，下次运行可以复用
+        """
+        if self.llm_manager is not None:
+            await self.llm_manager.aclose()
+        if not self.candidates:
+            print("⚠️ 中断时尚未加载数据，没有可保存的结果")
+            return False
+        
+        print(f"💾 保存已完成的 {len(self.analysis_results)} 个职位...")
+        success = self.generate_report(output_path)
+        if self.write_back and self.analysis_results:
+            success = self.write_back_results() and success
+        if analytics_dir:
+            success = self.generate_analytics(analytics_dir, output_path) and success
+        self.print_summary()
+        
+        if self.unfinished_positions:
+            print(f"\n🛑 未完成的职位 ({len(self.unfinished_positions)} 个):")
+            for info in self.unfinished_positions:
+                print(f"   - {info.company} - {info.position}")
+            hint = "已回写的职位会被跳过" if self.write_back else "已完成的职位可通过 --since-last-run 复用"
+            print(f"💡 重新运行即可继续（{hint}）")
+        return success
+    
+    async def _run(self, config_path: str, experience_path: Union[str, List[str]], output_path: str,
+                   analytics_dir: str) -> bool:
+        # 初始化LLM管理器（只读取配置，不创建网络客户端）
+        if not self.initialize_llm_manager():
+            return False
+        
         # 检查环境
         if not self.check_environment():
             return False
@@ -215,16 +930,9 @@ class ResumeOptimizer:
         if not self.load_data(config_path, experience_path):
             return False
         
-        # 初始化LLM管理器
-        if not self.initialize_llm_manager():
-            return False
-        
-        # 分析所有职位
+        # 分析所有职位（中断时 CancelledError 向上传播，由 run 保存已完成的部分）
         try:
             await self.analyze_all_positions()
-        except KeyboardInterrupt:
-            print("\n⚠️ 用户中断分析")
-            return False
         except Exception as e:
             print(f"\n❌ 分析过程出错: {e}")
             return False
@@ -233,6 +941,14 @@ class ResumeOptimizer:
         if not self.generate_report(output_path):
             return False
         
+        # 回写职位表
+        if self.write_back and not self.write_back_results():
+            return False
+        
+        # 跨职位分析
+        if analytics_dir and not self.generate_analytics(analytics_dir, output_path):
+            return False
+        
         # 打印总结
         self.print_summary()
         
@@ -242,36 +958,133 @@ class ResumeOptimizer:
         return True
 
 
+def _queue_worker_process(options: Dict[str, Any]):
+    """工作进程入口（spawn 启动，拥有独立的LLM管理器）"""
+    from dotenv import load_dotenv
+    load_dotenv()
+    asyncio.run(_queue_worker(**options))
+
+
+async def _queue_worker(queue_path: str, store_path: str, experience_path: Union[str, List[str]],
+                        since_last_run: bool,
+                        budget: RunBudget, concurrency: int, mock_latency: float):
+    optimizer = ResumeOptimizer(store_path=store_path, since_last_run=since_last_run, budget=budget,
+                                concurrency=concurrency, mock_latency=mock_latency)
+    queue = WorkQueue(queue_path)
+    try:
+        if not optimizer.initialize_llm_manager() or not optimizer.check_environment():
+            raise SystemExit(1)
+        optimizer.candidates = load_candidates(experience_path)
+        optimizer.adopt_legacy_rankings()
+        processed = await optimizer.run_worker(queue)
+        print(f"👷 工作进程 {os.getpid()} 完成，处理 {processed} 个任务")
+    finally:
+        queue.close()
+        optimizer.store.close()
+
+
 async def main():
     """主函数"""
     import argparse
     
     parser = argparse.ArgumentParser(description="简历优化分析工具")
     parser.add_argument("--config", "-c", default="config.json")
-    parser.add_argument("--experience", "-e", default="experiences.json")
+    parser.add_argument("--experience", "-e", nargs="+", default=["experiences.json"],
+                        help="经历库；给出多个时为多候选人模式：筛选共享，每个候选人单独排名并生成报告")
     parser.add_argument("--output", "-o", default="resume_analysis_report.md")
+    parser.add_argument("--store", default="results.db", help="分析结果存储文件 (SQLite)")
+    parser.add_argument("--since-last-run", action="store_true",
+                        help="增量模式：复用上次的筛选结果，仅重排受经历库变更影响的职位")
+    parser.add_argument("--prioritize", action="store_true",
+                        help="按发布日期、关键词匹配和公司优先级排序后再分析")
+    parser.add_argument("--budget", type=RunBudget.parse, default=RunBudget(),
+                        help="运行预算，如 calls=200,dollars=5,minutes=30；费用接近上限时逐级减少排名模型，超出后剩余职位推迟")
+    parser.add_argument("--concurrency", type=int, default=1,
+                        help="同时分析的职位数；并发中的相同请求只调用一次")
+    parser.add_argument("--watch", action="store_true",
+                        help="常驻模式：监听职位表和经历库，新增职位时只分析新行并更新报告")
+    parser.add_argument("--watch-interval", type=float, default=0.25,
+                        help="监听模式下检查文件变更的间隔（秒）")
+    parser.add_argument("--queue", metavar="PATH",
+                        help="任务队列模式：职位写入SQLite队列，由多个工作进程领取分析，最后生成报告")
+    parser.add_argument("--workers", type=int, default=2, help="队列模式下启动的工作进程数")
+    parser.add_argument("--queue-role", choices=["all", "produce", "work", "render"], default="all",
+                        help="队列模式下执行的步骤：入队 / 处理 / 生成报告 / 全部")
+    parser.add_argument("--mock", type=float, metavar="LATENCY",
+                        help="使用本地模拟LLM（平均延迟秒数），不需要API密钥")
+    parser.add_argument("--analytics", metavar="DIR",
+                        help="基于全部历史结果生成跨职位分析，CSV输出到DIR并追加到报告")
     
+    parser.add_argument("--write-back", action="store_true",
+                        help="把状态、平均匹配度和推荐经历ID批量写回职位表（.xlsm 保留宏），之后的运行跳过这些行")
+    parser.add_argument("--deadline", type=parse_duration, metavar="DURATION",
+                        help="运行时长上限，如 90s / 30m / 2h（不带单位按分钟）；到达后取消进行中的请求，"
+                             "保存已完成的职位并列出未完成的职位。与 --budget minutes 不同，不等待进行中的职位")
+    parser.add_argument("--profile", action="store_true",
+                        help="统计各阶段耗时（Excel解析、prompt渲染、LLM调用、JSON解析 json.parse 及其中的修复 json.repair、"
+                             "报告生成）和事件循环延迟，结束时打印；队列模式下只统计当前进程")
+    parser.add_argument("--profile-dump", metavar="PREFIX",
+                        help="同时导出剖析数据: PREFIX.folded（火焰图折叠栈）和 PREFIX.prof（cProfile）；隐含 --profile")
     args = parser.parse_args()
     
+    # 加载环境变量（在解析参数之后，--help 不需要导入 dotenv）
+    from dotenv import load_dotenv
+    load_dotenv()
+    
     # 创建优化器实例
-    optimizer = ResumeOptimizer()
+    optimizer = ResumeOptimizer(store_path=args.store, since_last_run=args.since_last_run,
+                                prioritize=args.prioritize, budget=args.budget,
+                                concurrency=args.concurrency, mock_latency=args.mock,
+                                write_back=args.write_back, deadline=args.deadline)
+    
+    # 性能剖析
+    profiling = args.profile or args.profile_dump is not None
+    lag_monitor = None
+    if profiling:
+        profiler.enable(cprofile=args.profile_dump is not None)
+        lag_monitor = asyncio.create_task(profiler.monitor_loop_lag())
+        # 让监测任务先启动计时，随后的同步加载（如Excel解析）阻塞事件循环时才能被记录
+        await asyncio.sleep(0)
     
     # 运行分析
-    success = await optimizer.run(config_path=args.config,
-                                  experience_path=args.experience,
-                                  output_path=args.output)
+    try:
+        if args.queue:
+            if args.deadline is not None:
+                print("⚠️ 队列模式不支持 --deadline，中断后未完成的任务在租约到期后由其他工作进程接管")
+            success = await optimizer.run_queue(args.config, args.experience, args.output, args.queue,
+                                                args.workers, args.queue_role, args.analytics)
+        else:
+            success = await optimizer.run(config_path=args.config,
+                                          experience_path=args.experience,
+                                          output_path=args.output,
+                                          analytics_dir=args.analytics,
+                                          watch=args.watch,
+                                          watch_interval=args.watch_interval)
+    finally:
+        if profiling:
+            lag_monitor.cancel()
+            profiler.disable()
+            print("\n" + profiler.format_report())
+            if args.profile_dump is not None:
+                print(f"🔥 剖析数据已导出: {', '.join(profiler.dump(args.profile_dump))}")
     
+    report_paths = ", ".join(optimizer.report_paths(args.output))
+    if optimizer.stop_reason:
+        if success:
+            print(f"\n⚠️ 运行中断（{optimizer.stop_reason}），部分报告已保存到: {report_paths}")
+        else:
+            print(f"\n❌ 运行中断（{optimizer.stop_reason}），未能保存报告")
+        exit(optimizer.exit_code)
     if success:
-        print(f"\n✅ 报告已保存到: {args.output}")
+        print(f"\n✅ 报告已保存到: {report_paths}")
     else:
         print("\n❌ 分析失败")
         exit(1)
 
 
 if __name__ == "__main__":
-    # 加载环境变量
-    from dotenv import load_dotenv
-    load_dotenv()
-    
     # 运行主程序
-    asyncio.run(main()) 
\ No newline at end of file
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
\ No newline at end of file
@@ -0,0 +1,258 @@
+"""
+分析结果数据模型
+职位、筛选、排名和路由记录使用带 __slots__ 的数据类，在 main.py、llm/ 和 report_generator.py 之间共享，
+替代层层嵌套的字典：每条记录没有实例字典，大批量运行时占用内存更少，字段也有明确的类型。
+
+LLM 返回的 JSON（结果存储和服务接口中的格式）通过 from_dict / to_dict 手写转换，
+不使用 dataclasses.asdict 的递归深拷贝。任务队列中的结果（PositionResult.to_dict）使用按位置排列的
+紧凑行，经历排名直接以元组序列化，读取时也不再逐条重建字典，往返不比直接序列化嵌套字典慢。
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, NamedTuple, Optional
+
+
+def _optional(payload: Dict[str, Any], **values) -> Dict[str, Any]:
+    """把值不为 None 的可选字段加入 payload"""
+    payload.update((key, value) for key, value in values.items() if value is not None)
+    return payload
+
+
+@dataclass(slots=True)
+class PositionInfo:
+    """职位表中的一行"""
+    job_description: str
+    company: str
+    position: str
+    location: str
+    link: str
+
+    def to_dict(self) -> Dict[str, str]:
+        return {
+            "job_description": self.job_description,
+            "company": self.company,
+            "position": self.position,
+            "location": self.location,
+            "link": self.link,
+        }
+
+    def to_row(self) -> List[str]:
+        return [self.job_description, self.company, self.position, self.location, self.link]
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'PositionInfo':
+        return cls(data["job_description"], data["company"], data["position"], data["location"], data["link"])
+
+
+@dataclass(slots=True)
+class Screening:
+    """一个模型对职位的筛选结论"""
+    model: str
+    citizenship_required: bool = False
+    senior_level_required: bool = False
+    expected_graduation_mentioned: bool = False
+    expected_graduation_time: Optional[str] = None
+    reason: str = ""
+    prompt_version: Optional[str] = None
+    validation_errors: Optional[Dict[str, str]] = None
+    error: Optional[str] = None
+
+    @property
+    def rejected(self) -> bool:
+        """有身份或高级别要求，不推荐投递"""
+        return bool(self.citizenship_required or self.senior_level_required)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """LLM 返回的 JSON 格式（不含模型名），即结果存储中的格式"""
+        return _optional({
+            "citizenship_required": self.citizenship_required,
+            "senior_level_required": self.senior_level_required,
+            "expected_graduation_mentioned": self.expected_graduation_mentioned,
+            "expected_graduation_time": self.expected_graduation_time,
+            "reason": self.reason,
+        }, validation_errors=self.validation_errors, error=self.error, prompt_version=self.prompt_version)
+
+    @classmethod
+    def from_dict(cls, model: str, data: Dict[str, Any]) -> 'Screening':
+        return cls(
+            model,
+            bool(data.get("citizenship_required", False)),
+            bool(data.get("senior_level_required", False)),
+            bool(data.get("expected_graduation_mentioned", False)),
+            data.get("expected_graduation_time"),
+            data.get("reason", ""),
+            data.get("prompt_version"),
+            data.get("validation_errors"),
+            data.get("error"),
+        )
+
+    def to_row(self) -> List[Any]:
+        """任务队列中的紧凑格式（字段按定义顺序）"""
+        return [self.model, self.citizenship_required, self.senior_level_required,
+                self.expected_graduation_mentioned, self.expected_graduation_time, self.reason,
+                self.prompt_version, self.validation_errors, self.error]
+
+
+class RankedExperience(NamedTuple):
+    """
+    排名中的一条经历（元组：内存小，json 直接序列化为数组）
+
+    任务队列中每个排名的经历展开为一个扁平数组 [id, rank, justification, id, ...]，
+    读取时用 zip 按三个一组切分后经 _make 还原：大批量读取时不会产生数十万个被垃圾回收跟踪的小数组
+    """
+    id: str
+    rank: Any
+    justification: str = ""
+
+
+@dataclass(slots=True)
+class Ranking:
+    """一个模型对经历的排名"""
+    model: str
+    match_percentage: Any = 0
+    experiences: List[RankedExperience] = field(default_factory=list)
+    prompt_version: Optional[str] = None
+    validation_errors: Optional[Dict[str, str]] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        """调用成功且给出了排名"""
+        return self.error is None and bool(self.experiences)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """LLM 返回的 JSON 格式（不含模型名），即结果存储和排名聚合使用的格式"""
+        return _optional({
+            "match_percentage": self.match_percentage,
+            "ranked_experiences": [
+                {"id": exp_id, "rank": rank, "justification": justification}
+                for exp_id, rank, justification in self.experiences
+            ],
+        }, validation_errors=self.validation_errors, error=self.error, prompt_version=self.prompt_version)
+
+    @classmethod
+    def from_dict(cls, model: str, data: Dict[str, Any]) -> 'Ranking':
+        return cls(
+            model,
+            data.get("match_percentage", 0),
+            [
+                RankedExperience(item.get("id"), item.get("rank"), item.get("justification", ""))
+                for item in data.get("ranked_experiences") or [] if isinstance(item, dict)
+            ],
+            data.get("prompt_version"),
+            data.get("validation_errors"),
+            data.get("error"),
+        )
+
+    def to_row(self) -> List[Any]:
+        """任务队列中的紧凑格式，经历排名展开为扁平数组"""
+        return [self.match_percentage, [value for item in self.experiences for value in item],
+                self.prompt_version, self.validation_errors, self.error]
+
+    @classmethod
+    def from_row(cls, model: str, row: List[Any]) -> 'Ranking':
+        match_percentage, flat, prompt_version, validation_errors, error = row
+        values = iter(flat)
+        experiences = list(map(RankedExperience._make, zip(values, values, values)))
+        return cls(model, match_percentage, experiences, prompt_version, validation_errors, error)
+
+
+@dataclass(slots=True)
+class Routing:
+    """职位实际使用的模型（路由决策记录）"""
+    screening: str
+    ranking: List[str] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class PositionResult:
+    """
+    一个职位的分析结果
+
+    rankings 按候选人名 -> 模型名 -> 排名保存（单候选人时候选人名为空字符串）；
+    某个候选人的排名调用整体失败时记录在 ranking_errors 中，而不是混进 rankings
+    """
+    position: PositionInfo
+    screening: Optional[Screening] = None
+    rankings: Dict[str, Dict[str, Ranking]] = field(default_factory=dict)
+    ranking_errors: Dict[str, str] = field(default_factory=dict)
+    error: Optional[str] = None
+    ranking_skipped: Optional[str] = None
+    routing: Optional[Routing] = None
+
+    @property
+    def rejected(self) -> bool:
+        return self.screening is not None and self.screening.rejected
+
+    @property
+    def rejection_reasons(self) -> List[str]:
+        """判断不合适的模型"""
+        return [self.screening.model] if self.rejected else []
+
+    def rankings_for(self, candidate: str = "") -> Dict[str, Ranking]:
+        return self.rankings.get(candidate, {})
+
+    def valid_rankings(self, candidate: str = "") -> Dict[str, Ranking]:
+        """某个候选人调用成功的排名"""
+        return {name: ranking for name, ranking in self.rankings_for(candidate).items() if ranking.ok}
+
+    def ranking_payloads(self, candidate: str = "") -> Dict[str, Dict[str, Any]]:
+        """某个候选人的排名（JSON 格式），供 RankAggregator 使用"""
+        return {name: ranking.to_dict() for name, ranking in self.rankings_for(candidate).items()}
+
+    def to_dict(self) -> Dict[str, Any]:
+        """任务队列等处保存的 JSON 格式（职位、筛选和排名为按位置排列的紧凑行）"""
+        return _optional({
+            "position": self.position.to_row(),
+            "rankings": {
+                candidate: {name: ranking.to_row() for name, ranking in rankings.items()}
+                for candidate, rankings in self.rankings.items()
+            },
+        }, screening=self.screening.to_row() if self.screening is not None else None,
+            ranking_errors=self.ranking_errors or None, error=self.error, ranking_skipped=self.ranking_skipped,
+            routing=[self.routing.screening, self.routing.ranking] if self.routing else None)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'PositionResult':
+        """读取 to_dict() 的格式，也兼容之前版本保存的嵌套字典格式"""
+        if "position_info" in data:
+            return cls._from_legacy(data)
+        screening = data.get("screening")
+        routing = data.get("routing")
+        return cls(
+            PositionInfo(*data["position"]),
+            Screening(*screening) if screening else None,
+            {
+                candidate: {name: Ranking.from_row(name, row) for name, row in rankings.items()}
+                for candidate, rankings in data.get("rankings", {}).items()
+            },
+            dict(data.get("ranking_errors", {})),
+            data.get("error"),
+            data.get("ranking_skipped"),
+            Routing(*routing) if routing else None,
+        )
+
+    @classmethod
+    def _from_legacy(cls, data: Dict[str, Any]) -> 'PositionResult':
+        """
+        之前的格式: position_info / screening_results / ranking_results（第一个候选人，
+        整体失败时为 {"error": ...}）/ candidate_rankings（多候选人）
+        """
+        screening = next(iter(data.get("screening_results", {}).items()), None)
+        by_candidate = data.get("candidate_rankings") or {"": data.get("ranking_results", {})}
+        rankings, ranking_errors = {}, {}
+        for candidate, payloads in by_candidate.items():
+            if isinstance(payloads.get("error"), str):
+                ranking_errors[candidate] = payloads["error"]
+                continue
+            rankings[candidate] = {name: Ranking.from_dict(name, payload) for name, payload in payloads.items()}
+        routing = data.get("routing")
+        return cls(
+            PositionInfo.from_dict(data["position_info"]),
+            Screening.from_dict(*screening) if screening else None,
+            rankings,
+            ranking_errors,
+            data.get("error"),
+            data.get("ranking_skipped"),
+            Routing(routing["screening"], list(routing.get("ranking", []))) if routing else None,
+        )
@@ -3,9 +3,13 @@ Markdown报告生成器
 将LLM分析结果生成格式化的Markdown报告
 """
 
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from datetime import datetime
 
+from analysis.aggregation import RankAggregator
+from llm.budget import STAGE_LABELS
+from models import PositionInfo, PositionResult, Ranking, Screening
+
 
 class MarkdownReportGenerator:
     """Markdown格式报告生成器"""
@@ -37,116 +41,114 @@ class MarkdownReportGenerator:
         """添加有序列表项"""
         self._add_line(f"{number}. {text}")
     
-    def _format_llm_results(self, llm_results: Dict[str, Dict[str, Any]], result_type: str) -> str:
-        """格式化LLM结果为可读文本"""
+    def _format_llm_results(self, llm_results: Dict[str, Ranking], ranking_error: Optional[str] = None) -> List[str]:
+        """格式化各模型的匹配度为可读文本；排名调用整体失败时只显示失败原因"""
+        if ranking_error:
+            return [f"❌ {ranking_error}"]
+        
         formatted_results = []
         
-        for llm_name, result in llm_results.items():
-            match_percentage = result.get("match_percentage", 0)
-            error = result.get("error")
-            if error:
-                formatted_results.append(f"**{llm_name.upper()}**: ❌ 调用失败 - {error}")
+        for llm_name, ranking in llm_results.items():
+            if ranking.error:
+                formatted_results.append(f"**{llm_name.upper()}**: ❌ 调用失败 - {ranking.error}")
             else:
-                formatted_results.append(f"**{llm_name.upper()}**: 匹配度 {match_percentage}%")
+                formatted_results.append(f"**{llm_name.upper()}**: 匹配度 {ranking.match_percentage}%")
         
         return formatted_results
     
-    def _extract_rejection_details(self, screening_results: Dict[str, Dict[str, Any]], rejection_reasons: List[str]) -> List[str]:
+    def _extract_rejection_details(self, screening: Screening) -> str:
         """
-        从screening_results中提取具体的拒绝原因
+        从筛选结果中提取具体的拒绝原因
         
         Args:
-            screening_results: 筛选结果字典
-            rejection_reasons: 拒绝的LLM名称列表
+            screening: 判断不合适的筛选结果
             
         Returns:
-            List[str]: 具体的拒绝原因列表
+            str: 具体的拒绝原因
         """
-        detailed_reasons = []
+        reasons = []
         
-        for llm_name in rejection_reasons:
-            if llm_name in screening_results:
-                result = screening_results[llm_name]
-                reasons = []
-                
-                # 检查身份要求
-                if result.get("citizenship_required", False):
-                    reasons.append("要求美国身份/绿卡")
-                
-                # 检查经验要求
-                if result.get("senior_level_required", False):
-                    reasons.append("要求高级别经验")
-                
-                # 添加LLM给出的具体原因
-                llm_reason = result.get("reason", "")
-                if llm_reason and llm_reason != "无":
-                    reasons.append(llm_reason)
-                
-                if reasons:
-                    detailed_reasons.append(f"**{llm_name.upper()}**: {'; '.join(reasons)}")
-                else:
-                    detailed_reasons.append(f"**{llm_name.upper()}**: 不符合投递条件")
+        # 检查身份要求
+        if screening.citizenship_required:
+            reasons.append("要求美国身份/绿卡")
         
-        return detailed_reasons
+        # 检查经验要求
+        if screening.senior_level_required:
+            reasons.append("要求高级别经验")
+        
+        # 添加LLM给出的具体原因
+        if screening.reason and screening.reason != "无":
+            reasons.append(screening.reason)
+        
+        return f"**{screening.model.upper()}**: {'; '.join(reasons) or '不符合投递条件'}"
     
-    def _aggregate_experience_rankings(self, ranking_results: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def _add_table(self, frame, index_label: str = None, max_rows: int = 15):
+        """添加表格（pandas DataFrame，最多 max_rows 行）"""
+        columns = list(frame.columns)
+        header = ([index_label] if index_label else []) + [str(c) for c in columns]
+        self._add_line("| " + " | ".join(header) + " |")
+        self._add_line("|" + "---|" * len(header))
+        for index, row in frame.head(max_rows).iterrows():
+            cells = ([str(index)] if index_label else []) + [f"{v:g}" if isinstance(v, float) else str(v) for v in row]
+            self._add_line("| " + " | ".join(cells) + " |")
+        self._add_line()
+
+    def generate_analytics_section(self, summary: Dict[str, Any]) -> str:
         """
-        聚合三个LLM的经历排名结果
+        生成跨职位分析章节
         
+        Args:
+            summary: PositionAnalytics.summary() 的结果
+            
         Returns:
-            List[Dict]: 按总分排序的经历列表
+            str: Markdown格式的章节内容
         """
-        experience_scores = {}
+        self.report_content = []
         
-        # 收集所有LLM的排名
-        for llm_name, result in ranking_results.items():
-            if "error" in result:
-                continue  # 跳过失败的LLM
-                
-            ranked_experiences = result.get("ranked_experiences", [])
-            for exp in ranked_experiences:
-                exp_id = exp.get("id")
-                rank = exp.get("rank", 999)
-                justification = exp.get("justification", "")
-                
-                if exp_id not in experience_scores:
-                    experience_scores[exp_id] = {
-                        "id": exp_id,
-                        "total_score": 0,
-                        "llm_rankings": {},
-                        "count": 0
-                    }
-                
-                experience_scores[exp_id]["total_score"] += rank
-                experience_scores[exp_id]["llm_rankings"][llm_name] = {
-                    "rank": rank,
-                    "justification": justification
-                }
-                experience_scores[exp_id]["count"] += 1
+        self._add_header("📈 跨职位分析（全部历史结果）", 2)
+        self._add_list_item(f"**历史职位数**: {summary['total_positions']}")
+        self._add_list_item(f"**不推荐投递**: {summary['rejected_positions']}")
+        self._add_list_item(f"**已排名职位数**: {summary['ranked_positions']}")
+        self._add_line()
         
-        # 补齐缺失LLM评分：未出现的按5分计
-        num_llms = len(ranking_results)
-        for exp_data in experience_scores.values():
-            missing = num_llms - exp_data["count"]
-            if missing > 0:
-                exp_data["total_score"] += missing * 5
-
-        # 按总分排序（分数越低越好）
-        sorted_experiences = sorted(
-            experience_scores.values(),
-            key=lambda x: x["total_score"]
-        )
+        self._add_header("经历需求（进入各模型 Top 4 的次数）", 3)
+        self._add_table(summary["experience_demand"], "经历ID")
+        
+        self._add_header("技能缺口（JD中出现但经历库没有的技术）", 3)
+        if summary["skill_gaps"].empty:
+            self._add_quote("未发现技能缺口")
+        else:
+            self._add_table(summary["skill_gaps"].set_index("term"), "技术")
+        
+        self._add_header("匹配度分布（按公司）", 3)
+        self._add_table(summary["match_by_company"], "公司")
         
-        # 返回所有出现过的经历，已按总分排序
-        return sorted_experiences[:6]
+        self._add_header("匹配度分布（按地点）", 3)
+        self._add_table(summary["match_by_location"], "地点")
+        
+        return "\n".join(self.report_content)
     
-    def generate_report(self, analysis_results: List[Dict[str, Any]], experiences_data: List[Dict[str, Any]]) -> str:
+    def generate_report(self, analysis_results: List[PositionResult], experiences_data: List[Dict[str, Any]],
+                        consensus: List[List[Dict[str, Any]]], score_label: str = "总分",
+                        deferred_positions: Optional[List[PositionInfo]] = None,
+                        budget_summary: Optional[Dict[str, Any]] = None,
+                        routing_summary: Optional[Dict[str, Any]] = None, candidate: str = "",
+                        unfinished_positions: Optional[List[PositionInfo]] = None,
+                        stop_reason: Optional[str] = None) -> str:
         """
         生成完整的Markdown报告
         
         Args:
             analysis_results: 所有职位的分析结果
             experiences_data: 经历数据（用于显示经历标题）
+            consensus: 每个职位的共识经历排名（由 RankAggregator 计算）
+            score_label: 共识分数的显示名称
+            deferred_positions: 因预算不足未分析的职位（按优先级排序）
+            budget_summary: 费用预算使用情况和降级记录（BudgetController.summary()）
+            routing_summary: 各模型延迟/错误率和路由决策（ModelRouter.summary()）
+            candidate: 报告对应的候选人（单候选人时为空字符串）
+            unfinished_positions: 运行被中断时尚未完成的职位
+            stop_reason: 中断原因（信号或截止时间），None 表示完整运行
             
         Returns:
             str: Markdown格式的报告内容
@@ -158,6 +160,9 @@ class MarkdownReportGenerator:
         self._add_line(f"**生成时间**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         self._add_line(f"**分析职位数量**: {len(analysis_results)}")
         self._add_line(f"**使用LLM**: Gemini 3.0 Pro, GPT-5.2, Claude Opus 4.5")
+        if stop_reason:
+            self._add_line(f"**⚠️ 部分报告**: 运行中断（{stop_reason}），"
+                           f"{len(unfinished_positions or [])} 个职位未完成，见报告末尾")
         self._add_line()
         
         # 我们仅使用经历ID，不再依赖 title 字段
@@ -167,48 +172,35 @@ class MarkdownReportGenerator:
         rejected_count = 0
         
         for i, position_result in enumerate(analysis_results, 1):
-            position_info = position_result["position_info"]
-            screening_results = position_result.get("screening_results", {})
-            ranking_results = position_result.get("ranking_results", {})
+            position_info = position_result.position
+            screening = position_result.screening
+            ranking_results = position_result.rankings_for(candidate)
             
             # 职位标题
-            self._add_header(f"职位 {i}: {position_info['company']} - {position_info['position']}", 2)
+            self._add_header(f"职位 {i}: {position_info.company} - {position_info.position}", 2)
             
             # 基本信息
             self._add_line("**基本信息**:")
-            self._add_list_item(f"**公司**: {position_info['company']}")
-            self._add_list_item(f"**职位**: {position_info['position']}")
-            self._add_list_item(f"**地点**: {position_info['location']}")
-            self._add_list_item(f"**链接**: {position_info['link']}")
+            self._add_list_item(f"**公司**: {position_info.company}")
+            self._add_list_item(f"**职位**: {position_info.position}")
+            self._add_list_item(f"**地点**: {position_info.location}")
+            self._add_list_item(f"**链接**: {position_info.link}")
             
-            # 毕业时间（从Gemini筛选结果获取）
-            gemini_result = screening_results.get("gemini", {})
-            expected_graduation_time = gemini_result.get("expected_graduation_time")
+            # 毕业时间（从路由选中的筛选模型结果获取）
+            expected_graduation_time = screening.expected_graduation_time if screening else None
             graduation_display = expected_graduation_time if expected_graduation_time else "na"
             self._add_list_item(f"**毕业时间（期望）**: {graduation_display}")
             
             self._add_line()
             
             # 筛选结果
-            should_reject = position_result.get("rejected", False)
-            rejection_reasons = position_result.get("rejection_reasons", [])
-            
-            if should_reject:
+            if position_result.rejected:
                 rejected_count += 1
                 self._add_header("🚫 筛选结果：不推荐投递", 3)
                 self._add_quote("❌ **该职位不符合投递条件，建议跳过**")
                 
                 self._add_line("**拒绝原因**:")
-                if rejection_reasons and screening_results:
-                    detailed_reasons = self._extract_rejection_details(screening_results, rejection_reasons)
-                    for reason in detailed_reasons:
-                        self._add_list_item(reason)
-                elif rejection_reasons:
-                    # 如果有rejection_reasons但没有screening_results详情
-                    for llm_name in rejection_reasons:
-                        self._add_list_item(f"**{llm_name.upper()}**: 不符合投递条件")
-                else:
-                    self._add_list_item("职位不符合投递条件")
+                self._add_list_item(self._extract_rejection_details(screening))
                 self._add_line()
                 
             else:
@@ -218,19 +210,21 @@ class MarkdownReportGenerator:
                 
 
                 
+                if position_result.ranking_skipped:
+                    self._add_quote(f"⚠️ {position_result.ranking_skipped}")
+                
                 # 如果有排名结果，显示推荐经历
                 if ranking_results:
                     self._add_header("📝 推荐经历 Top ", 3)
                     
-                    # 聚合排名结果
-                    top_experiences = self._aggregate_experience_rankings(ranking_results)
+                    top_experiences = consensus[i - 1]
                     
                     if top_experiences:
                         for rank, exp_data in enumerate(top_experiences, 1):
                             exp_id = exp_data["id"]
-                            total_score = exp_data["total_score"]
+                            score = exp_data["score"]
                             
-                            self._add_ordered_item(f"**{exp_id}** (总分: {total_score})", rank)
+                            self._add_ordered_item(f"**{exp_id}** ({score_label}: {score:g})", rank)
                             
                             # 显示各LLM的评价
                             for llm_name, ranking_info in exp_data["llm_rankings"].items():
@@ -244,7 +238,8 @@ class MarkdownReportGenerator:
                 
                 # LLM匹配度信息
                 self._add_line("**各LLM匹配度评估**:")
-                ranking_formatted = self._format_llm_results(ranking_results, "ranking")
+                ranking_formatted = self._format_llm_results(ranking_results,
+                                                             position_result.ranking_errors.get(candidate))
                 for result_line in ranking_formatted:
                     self._add_list_item(result_line)
                 self._add_line()
@@ -258,14 +253,71 @@ class MarkdownReportGenerator:
         self._add_list_item(f"**总职位数**: {len(analysis_results)}")
         self._add_list_item(f"**推荐投递**: {suitable_count} 个")
         self._add_list_item(f"**不推荐投递**: {rejected_count} 个")
-        self._add_list_item(f"**推荐率**: {suitable_count/len(analysis_results)*100:.1f}%")
+        recommend_rate = suitable_count / len(analysis_results) * 100 if analysis_results else 0
+        self._add_list_item(f"**推荐率**: {recommend_rate:.1f}%")
+        
+        if budget_summary:
+            self._add_line()
+            self._add_header("💰 费用预算", 2)
+            self._add_list_item(f"**已用/上限**: ${budget_summary['spent']:.2f} / ${budget_summary['max_dollars']:.2f}")
+            self._add_list_item(f"**调用次数**: {budget_summary['calls']}")
+            for llm_name, usage in budget_summary['usage'].items():
+                self._add_list_item(
+                    f"**{llm_name}**: {usage['calls']} 次, 输入 {usage['prompt_tokens']} / 输出 "
+                    f"{usage['completion_tokens']} tokens, ${usage['dollars']:.2f}", 1
+                )
+            if budget_summary['decisions']:
+                self._add_line()
+                self._add_line("**降级记录**:")
+                for decision in budget_summary['decisions']:
+                    self._add_list_item(
+                        f"{decision['time']} {STAGE_LABELS[decision['from']]} → {STAGE_LABELS[decision['to']]} "
+                        f"(已用 ${decision['spent']:.2f}, {decision['context']})"
+                    )
+        
+        if routing_summary and any(stats['samples'] for stats in routing_summary['models'].values()):
+            self._add_line()
+            self._add_header("🧭 模型路由", 2)
+            for llm_name, stats in routing_summary['models'].items():
+                latency = f"{stats['latency_p50']:.1f}s" if stats['latency_p50'] is not None else "n/a"
+                health = "健康" if stats['healthy'] else "已绕开"
+                self._add_list_item(
+                    f"**{llm_name}**: 延迟中位数 {latency}, 错误率 {stats['error_rate']:.0%} "
+                    f"(最近 {stats['samples']} 次), {health}"
+                )
+            if routing_summary['decisions']:
+                self._add_line()
+                self._add_line("**路由决策**:")
+                for decision, count in routing_summary['decisions'].items():
+                    kind, _, choice = decision.partition(':')
+                    label = "筛选" if kind == 'screening' else "排名"
+                    self._add_list_item(f"{label} → {choice or '无'}: {count} 次")
+        
+        if deferred_positions:
+            self._add_line()
+            self._add_header(f"⏸️ 预算不足推迟分析 ({len(deferred_positions)} 个)", 2)
+            for position_info in deferred_positions:
+                self._add_list_item(f"{position_info.company} - {position_info.position} ({position_info.link})")
+        
+        if unfinished_positions:
+            self._add_line()
+            self._add_header(f"🛑 运行中断未完成 ({len(unfinished_positions)} 个)", 2)
+            for position_info in unfinished_positions:
+                self._add_list_item(f"{position_info.company} - {position_info.position} ({position_info.link})")
         
         return "\n".join(self.report_content)
 
 
-def create_markdown_report(analysis_results: List[Dict[str, Any]], 
+def create_markdown_report(analysis_results: List[PositionResult], 
                           experiences_data: List[Dict[str, Any]], 
-                          output_path: str) -> None:
+                          output_path: str,
+                          aggregator: Optional[RankAggregator] = None,
+                          deferred_positions: Optional[List[PositionInfo]] = None,
+                          budget_summary: Optional[Dict[str, Any]] = None,
+                          routing_summary: Optional[Dict[str, Any]] = None,
+                          candidate: str = "",
+                          unfinished_positions: Optional[List[PositionInfo]] = None,
+                          stop_reason: Optional[str] = None) -> None:
     """
     创建Markdown格式的分析报告
     
@@ -273,11 +325,39 @@ def create_markdown_report(analysis_results: List[Dict[str, Any]],
         analysis_results: 所有职位的分析结果
         experiences_data: 经历数据
         output_path: 输出文件路径
+        aggregator: 排名聚合器，默认为与原报告一致的名次和（缺失计5分，取前6）
+        deferred_positions: 因预算不足未分析的职位信息
+        budget_summary: 费用预算使用情况和降级记录
+        routing_summary: 模型路由统计和决策
+        candidate: 报告对应的候选人，使用该候选人的排名
+        unfinished_positions: 运行被中断时尚未完成的职位信息
+        stop_reason: 中断原因，设置时报告标注为部分报告
     """
+    aggregator = aggregator or RankAggregator()
+    consensus = aggregator.aggregate([r.ranking_payloads(candidate) for r in analysis_results])
+
     generator = MarkdownReportGenerator()
-    report_content = generator.generate_report(analysis_results, experiences_data)
+    report_content = generator.generate_report(analysis_results, experiences_data, consensus, aggregator.score_label,
+                                               deferred_positions, budget_summary, routing_summary, candidate,
+                                               unfinished_positions, stop_reason)
     
     with open(output_path, 'w', encoding='utf-8') as f:
         f.write(report_content)
     
-    print(f"✅ Markdown报告已生成: {output_path}")
\ No newline at end of file
+    print(f"✅ Markdown报告已生成: {output_path}")
+
+
+def append_analytics_section(report_path: str, summary: Dict[str, Any]) -> None:
+    """
+    把跨职位分析章节追加到已生成的报告末尾
+    
+    Args:
+        report_path: 报告文件路径
+        summary: PositionAnalytics.summary() 的结果
+    """
+    section = MarkdownReportGenerator().generate_analytics_section(summary)
+    
+    with open(report_path, 'a', encoding='utf-8') as f:
+        f.write("\n\n" + section)
+    
+    print(f"✅ 跨职位分析已追加到报告: {report_path}")
@@ -0,0 +1,154 @@
+"""
+职位调度模块
+用廉价的本地打分（发布日期、与经历库的关键词匹配、公司优先级）给职位排序，
+并在调用次数/费用/时间预算内优先分析最有希望的职位
+"""
+
+import math
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from utils.experience_index import ExperienceIndex
+
+# RunBudget 在解析命令行参数时就要用到，pandas 只在给职位打分时导入
+if TYPE_CHECKING:
+    import pandas as pd
+
+@dataclass
+class RunBudget:
+    """一次运行的预算上限（None 表示不限）"""
+    max_calls: Optional[int] = None
+    max_dollars: Optional[float] = None
+    max_minutes: Optional[float] = None
+
+    @classmethod
+    def parse(cls, spec: str) -> 'RunBudget':
+        """
+        解析命令行预算，例如 "calls=200,dollars=5,minutes=30"
+
+        Raises:
+            ValueError: 格式错误或出现未知的预算项
+        """
+        budget = cls()
+        for part in filter(None, (p.strip() for p in spec.split(','))):
+            key, _, value = part.partition('=')
+            key = key.strip().lower()
+            if key == 'calls':
+                budget.max_calls = int(value)
+            elif key == 'dollars':
+                budget.max_dollars = float(value)
+            elif key == 'minutes':
+                budget.max_minutes = float(value)
+            else:
+                raise ValueError(f"未知的预算项: {key}（可选 calls / dollars / minutes）")
+        return budget
+
+    def is_limited(self) -> bool:
+        return any(v is not None for v in (self.max_calls, self.max_dollars, self.max_minutes))
+
+    def describe(self) -> str:
+        parts = []
+        if self.max_calls is not None:
+            parts.append(f"{self.max_calls} 次调用")
+        if self.max_dollars is not None:
+            parts.append(f"${self.max_dollars:.2f}")
+        if self.max_minutes is not None:
+            parts.append(f"{self.max_minutes:g} 分钟")
+        return " / ".join(parts) if parts else "不限"
+
+
+class BudgetTracker:
+    """
+    运行中的调用次数和时间预算跟踪
+
+    费用预算由所有客户端共享的 llm.budget.BudgetController 按实际 token 用量控制
+    """
+
+    def __init__(self, budget: RunBudget):
+        self.budget = budget
+        self.started = time.monotonic()
+        self.calls = 0
+
+    @property
+    def minutes(self) -> float:
+        return (time.monotonic() - self.started) / 60
+
+    def record_calls(self, calls: int):
+        self.calls = calls
+
+    def exhausted_by(self, next_calls: int) -> Optional[str]:
+        """
+        如果再做 next_calls 次调用（下一个职位预计的调用数）会超出预算，返回原因；否则返回 None
+        """
+        budget = self.budget
+        if budget.max_calls is not None and self.calls + next_calls > budget.max_calls:
+            return f"调用次数已用 {self.calls}/{budget.max_calls}"
+        if budget.max_minutes is not None and self.minutes >= budget.max_minutes:
+            return f"时间已用 {self.minutes:.1f}/{budget.max_minutes:g} 分钟"
+        return None
+
+
+class PositionScheduler:
+    """按本地打分给职位排优先级"""
+
+    def __init__(self, experience_index: ExperienceIndex, config: Dict[str, Any]):
+        """
+        Args:
+            experience_index: 经历库索引，用于本地关键词匹配
+            config: 运行配置（config.json），读取 scheduling 和 date_filter.column
+        """
+        self.experience_index = experience_index
+        scheduling = config.get('scheduling', {})
+        weights = scheduling.get('weights', {})
+        self.recency_weight = weights.get('recency', 1.0)
+        self.match_weight = weights.get('match', 1.0)
+        self.company_weight = weights.get('company', 1.0)
+        self.half_life_days = scheduling.get('recency_half_life_days', 7)
+        self.priority_companies = {c.lower() for c in scheduling.get('priority_companies', [])}
+        self.deprioritized_companies = {c.lower() for c in scheduling.get('deprioritized_companies', [])}
+        self.date_column = config.get('date_filter', {}).get('column')
+
+    def _recency(self, posted: Any, now: datetime) -> float:
+        """发布日期的新鲜度，半衰期衰减到 (0, 1]；没有日期时取 0.5"""
+        import pandas as pd
+        
+        posted = pd.to_datetime(posted, errors='coerce')
+        if posted is None or pd.isna(posted):
+            return 0.5
+        age_days = max((now - posted.to_pydatetime().replace(tzinfo=None)).total_seconds() / 86400, 0)
+        return math.pow(0.5, age_days / self.half_life_days)
+
+    def _company(self, company: str) -> float:
+        company = company.lower()
+        if company in self.priority_companies:
+            return 1.0
+        if company in self.deprioritized_companies:
+            return -1.0
+        return 0.0
+
+    def order(self, positions: "pd.DataFrame", jd_column: str = 'job description',
+              company_column: str = '公司名字') -> List[Tuple[float, Dict[str, Any]]]:
+        """
+        给职位打分并按分数从高到低排序
+
+        Returns:
+            List[Tuple[float, Dict]]: (优先级分数, 职位行字典)
+        """
+        rows = [row.to_dict() for _, row in positions.iterrows()]
+        if not rows:
+            return []
+        now = datetime.now()
+        match_scores = [self.experience_index.match_score(str(row.get(jd_column, ''))) for row in rows]
+        max_match = max(match_scores) or 1
+
+        scored = []
+        for row, match in zip(rows, match_scores):
+            recency = self._recency(row.get(self.date_column), now) if self.date_column else 0.5
+            score = (self.recency_weight * recency
+                     + self.match_weight * match / max_match
+                     + self.company_weight * self._company(str(row.get(company_column, ''))))
+            scored.append((round(score, 4), row))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return scored
@@ -0,0 +1,292 @@
+"""
+本地HTTP分析服务
+粘贴一个JD即可得到筛选结论和经历排名，无需准备职位表。
+所有请求共享同一组常驻的LLM客户端、路由器、结果存储和并发限制。
+
+接口:
+    POST /screen   {"jd": "..."} 或 {"jds": ["...", ...]}
+    POST /rank     {"jd": "...", "models": ["gemini", ...]} 或 {"jds": [...]}
+    POST /analyze  {"jd": "...", "stream": true}  先筛选，通过后排名；stream 时以 NDJSON 逐步返回
+    GET  /health   调用次数、合并请求数和路由统计
+
+用法: python service.py --experience experiences.json [--port 8080] [--mock 0.05]
+"""
+
+import asyncio
+import json
+import os
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from aiohttp import web
+
+from analysis.aggregation import RankAggregator
+from data_loader import load_experiences
+from llm.manager import UnifiedLLMManager
+from utils.experience_formatter import format_experiences_library_cached
+from utils.experience_index import ExperienceIndex
+from utils.result_store import ResultStore, jd_hash
+
+# 一次批量请求最多包含的JD数
+MAX_BATCH = 50
+
+
+class ResumeService:
+    """共享LLM管理器和结果缓存的单JD分析服务"""
+
+    def __init__(self, llm_manager: UnifiedLLMManager, experiences: List[Dict[str, Any]],
+                 store: Optional[ResultStore] = None, max_inflight: int = 8, candidate: str = ""):
+        """
+        Args:
+            llm_manager: 常驻的LLM管理器
+            experiences: 经历库
+            store: 结果存储，用作跨请求缓存；None 表示不缓存
+            max_inflight: 同时进行中的JD分析数上限（限流）
+            candidate: 结果存储中的候选人标识（经历库文件名，与命令行分析共用排名缓存）
+        """
+        self.llm_manager = llm_manager
+        self.experiences = experiences
+        self.experience_index = ExperienceIndex(experiences)
+        self.valid_ids = [exp.get('id') for exp in experiences]
+        self.store = store
+        self.candidate = candidate
+        self.aggregator = RankAggregator.from_config(llm_manager.prompt_manager.config.get('aggregation'))
+        self.slots = asyncio.Semaphore(max_inflight)
+        self.cache_hits = 0
+
+    def _is_current(self, result: Dict[str, Any], prompt_type: str, llm_name: str) -> bool:
+        """缓存的结果是否由当前版本的prompt生成且没有失败"""
+        if "error" in result:
+            return False
+        version = result.get("prompt_version")
+        return version is None or version == self.llm_manager.prompt_manager.template_version(prompt_type, llm_name)
+
+    @staticmethod
+    def _is_rejected(screening: Dict[str, Any]) -> bool:
+        return bool(screening.get("citizenship_required") or screening.get("senior_level_required"))
+
+    async def screen(self, jd_text: str) -> Dict[str, Any]:
+        """筛选单个JD，优先使用缓存"""
+        key = jd_hash(jd_text)
+        if self.store is not None:
+            cached = self.store.get_screening(key)
+            if cached is not None and self._is_current(cached[1], 'screen_jd', cached[0]):
+                self.cache_hits += 1
+                return {"jd_hash": key, "model": cached[0], "result": cached[1],
+                        "rejected": self._is_rejected(cached[1]), "cached": True}
+
+        async with self.slots:
+            screening = await self.llm_manager.screen_jd(jd_text)
+        result = screening.to_dict()
+        if self.store is not None and screening.error is None:
+            self.store.save_screening(key, screening.model, result)
+        return {"jd_hash": key, "model": screening.model, "result": result,
+                "rejected": screening.rejected, "cached": False}
+
+    def _cached_rankings(self, key: str, models: List[str]) -> Optional[Dict[str, Dict[str, Any]]]:
+        """同一经历库版本、且包含所需全部模型的已保存排名"""
+        if self.store is None:
+            return None
+        stored = self.store.get_rankings(key, self.candidate)
+        if stored is None:
+            return None
+        rankings, hashes = stored
+        if hashes != self.experience_index.hashes or not set(models) <= set(rankings):
+            return None
+        if not all(self._is_current(rankings[name], 'rank_experiences', name) for name in models):
+            return None
+        return {name: rankings[name] for name in models}
+
+    def _consensus(self, rankings: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return self.aggregator.aggregate([rankings])[0]
+
+    async def rank(self, jd_text: str, models: Optional[List[str]] = None) -> Dict[str, Any]:
+        """对单个JD做经历排名并给出共识结果"""
+        key = jd_hash(jd_text)
+        models = models or self.llm_manager.choose_rankers()
+        cached = self._cached_rankings(key, models)
+        if cached is not None:
+            self.cache_hits += 1
+            return {"jd_hash": key, "rankings": cached, "consensus": self._consensus(cached),
+                    "score_label": self.aggregator.score_label, "cached": True}
+
+        async with self.slots:
+            ranked = await self.llm_manager.rank_experiences_all(
+                jd_text, self.experiences, self.experience_index.layout_hash, models
+            )
+        rankings = {name: ranking.to_dict() for name, ranking in ranked.items()}
+        if self.store is not None and not any("error" in res for res in rankings.values()):
+            self.store.save_rankings(key, rankings, self.experience_index.library_hash, self.experience_index.hashes,
+                                     self.candidate)
+        return {"jd_hash": key, "rankings": rankings, "consensus": self._consensus(rankings),
+                "score_label": self.aggregator.score_label, "cached": False}
+
+    async def analyze_stream(self, jd_text: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        先筛选，通过后排名；每个模型的排名一完成就产出，最后产出共识结果
+        """
+        screening = await self.screen(jd_text)
+        yield dict(event="screening", **screening)
+        if screening["rejected"]:
+            yield {"event": "done"}
+            return
+
+        key = screening["jd_hash"]
+        models = self.llm_manager.choose_rankers()
+        rankings = self._cached_rankings(key, models)
+        if rankings is not None:
+            self.cache_hits += 1
+            for name, result in rankings.items():
+                yield {"event": "ranking", "model": name, "result": result, "cached": True}
+        else:
+            library = format_experiences_library_cached(self.experiences, self.experience_index.layout_hash)
+
+            async def rank_one(name: str):
+                client = self.llm_manager.clients[name]
+                return name, await client.rank_experiences(jd_text, library, self.valid_ids)
+
+            rankings = {}
+            async with self.slots:
+                for next_done in asyncio.as_completed([rank_one(name) for name in models]):
+                    name, result = await next_done
+                    rankings[name] = result
+                    yield {"event": "ranking", "model": name, "result": result, "cached": False}
+            if self.store is not None and not any("error" in res for res in rankings.values()):
+                self.store.save_rankings(key, rankings, self.experience_index.library_hash,
+                                         self.experience_index.hashes, self.candidate)
+
+        yield {"event": "consensus", "consensus": self._consensus(rankings),
+               "score_label": self.aggregator.score_label}
+        yield {"event": "done"}
+
+    def health(self) -> Dict[str, Any]:
+        return {
+            "calls": self.llm_manager.call_count,
+            "coalesced": self.llm_manager.coalesced_count,
+            "cache_hits": self.cache_hits,
+            "routing": self.llm_manager.router.summary(),
+        }
+
+
+async def _read_jds(request: web.Request) -> tuple:
+    """
+    解析请求体，返回 (JD列表, 是否为批量请求, 请求体)
+
+    Raises:
+        web.HTTPBadRequest: 请求体不是JSON对象或没有JD
+    """
+    try:
+        body = await request.json()
+    except json.JSONDecodeError:
+        raise web.HTTPBadRequest(text="请求体必须是JSON")
+    if not isinstance(body, dict):
+        raise web.HTTPBadRequest(text="请求体必须是JSON对象")
+    if isinstance(body.get("jds"), list):
+        jds = [str(jd) for jd in body["jds"] if str(jd).strip()]
+        if not jds or len(jds) > MAX_BATCH:
+            raise web.HTTPBadRequest(text=f"jds 需要包含 1-{MAX_BATCH} 个JD")
+        return jds, True, body
+    jd = str(body.get("jd", "")).strip()
+    if not jd:
+        raise web.HTTPBadRequest(text="缺少 jd")
+    return [jd], False, body
+
+
+async def _batch(jds: List[str], handler) -> List[Dict[str, Any]]:
+    """
+    批量处理：相同的JD只处理一次，其余JD并发处理（受服务的并发上限约束）
+    """
+    unique = list(dict.fromkeys(jds))
+    results = dict(zip(unique, await asyncio.gather(*(handler(jd) for jd in unique))))
+    return [results[jd] for jd in jds]
+
+
+def create_app(service: ResumeService) -> web.Application:
+    """创建 aiohttp 应用"""
+
+    async def screen(request: web.Request) -> web.Response:
+        jds, batched, _ = await _read_jds(request)
+        results = await _batch(jds, service.screen)
+        return web.json_response(results if batched else results[0], dumps=_dumps)
+
+    async def rank(request: web.Request) -> web.Response:
+        jds, batched, body = await _read_jds(request)
+        models = body.get("models")
+        if models is not None and (not isinstance(models, list) or not set(models) <= set(service.llm_manager.clients)):
+            raise web.HTTPBadRequest(text=f"models 可选: {', '.join(service.llm_manager.clients)}")
+        results = await _batch(jds, lambda jd: service.rank(jd, models))
+        return web.json_response(results if batched else results[0], dumps=_dumps)
+
+    async def analyze(request: web.Request) -> web.StreamResponse:
+        jds, batched, body = await _read_jds(request)
+        if batched:
+            raise web.HTTPBadRequest(text="analyze 一次只处理一个JD")
+        if not body.get("stream"):
+            events = [event async for event in service.analyze_stream(jds[0])]
+            return web.json_response(events, dumps=_dumps)
+
+        response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+        await response.prepare(request)
+        async for event in service.analyze_stream(jds[0]):
+            await response.write((_dumps(event) + "\n").encode("utf-8"))
+        await response.write_eof()
+        return response
+
+    async def health(request: web.Request) -> web.Response:
+        return web.json_response(service.health(), dumps=_dumps)
+
+    app = web.Application()
+    app.add_routes([
+        web.post("/screen", screen),
+        web.post("/rank", rank),
+        web.post("/analyze", analyze),
+        web.get("/health", health),
+    ])
+    return app
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False)
+
+
+def main():
+    """启动服务"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="简历优化本地分析服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--experience", "-e", default="experiences.json")
+    parser.add_argument("--prompts", default="prompts.yaml")
+    parser.add_argument("--store", default="results.db", help="结果存储，同时作为跨请求缓存；设为空字符串关闭")
+    parser.add_argument("--max-inflight", type=int, default=8, help="同时分析的JD数上限")
+    parser.add_argument("--mock", type=float, metavar="LATENCY",
+                        help="使用本地模拟LLM（平均延迟秒数），不需要API密钥")
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    llm_manager = UnifiedLLMManager(
+        os.getenv('GEMINI_API_KEY'),
+        os.getenv('OPENAI_API_KEY'),
+        os.getenv('ANTHROPIC_API_KEY'),
+        args.prompts,
+        mock_latency=args.mock
+    )
+    candidate = os.path.splitext(os.path.basename(args.experience))[0]
+    experiences = load_experiences(args.experience)
+    service = ResumeService(llm_manager, experiences, ResultStore(args.store) if args.store else None,
+                            args.max_inflight, candidate)
+    if service.store is not None:
+        # 服务只复用与当前经历库完全一致的排名，只迁移这部分旧记录
+        service.store.adopt_unnamed_rankings(candidate, service.experience_index.library_hash)
+    print(f"🌐 服务启动: http://{args.host}:{args.port}")
+    try:
+        web.run_app(create_app(service), host=args.host, port=args.port, print=None)
+    finally:
+        if service.store is not None:
+            service.store.close()
+
+
+if __name__ == "__main__":
+    main()
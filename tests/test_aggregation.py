@@ -0,0 +1,100 @@
+"""
+RankAggregator 测试
+默认的 rank_sum 与向量化之前报告里逐职位计算的总分和顺序保持一致
+"""
+
+import os
+import random
+import sys
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from analysis.aggregation import RankAggregator
+
+
+def _baseline_rank_sum(ranking_results):
+    """向量化之前 MarkdownReportGenerator._aggregate_experience_rankings 的实现"""
+    experience_scores = {}
+    for llm_name, result in ranking_results.items():
+        if "error" in result:
+            continue
+        for exp in result.get("ranked_experiences", []):
+            exp_id = exp.get("id")
+            rank = exp.get("rank", 999)
+            if exp_id not in experience_scores:
+                experience_scores[exp_id] = {"id": exp_id, "total_score": 0, "llm_rankings": {}, "count": 0}
+            experience_scores[exp_id]["total_score"] += rank
+            experience_scores[exp_id]["llm_rankings"][llm_name] = {
+                "rank": rank, "justification": exp.get("justification", "")
+            }
+            experience_scores[exp_id]["count"] += 1
+
+    num_llms = len(ranking_results)
+    for exp_data in experience_scores.values():
+        missing = num_llms - exp_data["count"]
+        if missing > 0:
+            exp_data["total_score"] += missing * 5
+    return sorted(experience_scores.values(), key=lambda x: x["total_score"])[:6]
+
+
+def _ranking(*exp_ids):
+    return {"match_percentage": 70, "ranked_experiences": [
+        {"id": exp_id, "rank": rank, "justification": f"{exp_id} 理由"} for rank, exp_id in enumerate(exp_ids, 1)
+    ]}
+
+
+FIXED_PAYLOADS = [
+    # 三个模型都成功
+    {"gemini": _ranking("a", "b", "c", "d"), "gpt": _ranking("b", "a", "e", "c"), "claude": _ranking("a", "c", "b", "f")},
+    # 一个模型调用失败：仍计入缺失惩罚
+    {"gemini": _ranking("a", "b", "c", "d"), "gpt": {"error": "timeout"}, "claude": _ranking("d", "c", "b", "a")},
+    # 总分相同：按首次出现的顺序
+    {"gemini": _ranking("a", "b"), "gpt": _ranking("b", "a")},
+    # 超过 top_k 条候选经历
+    {"gemini": _ranking("a", "b", "c", "d"), "gpt": _ranking("e", "f", "g", "h"), "claude": _ranking("i", "a", "e", "j")},
+    # 只有一个模型参与排名
+    {"gpt": _ranking("c", "a", "b", "d")},
+    # 没有任何有效排名
+    {"gemini": {"error": "rate limited"}},
+]
+
+
+def _random_payloads(count, seed=7):
+    rng = random.Random(seed)
+    exp_ids = [f"exp_{i}" for i in range(10)]
+    payloads = []
+    for _ in range(count):
+        models = rng.sample(["gemini", "gpt", "claude"], rng.randint(1, 3))
+        payloads.append({
+            name: {"error": "failed"} if rng.random() < 0.15 else _ranking(*rng.sample(exp_ids, 4))
+            for name in models
+        })
+    return payloads
+
+
+def _comparable(entries, score_key):
+    return [(entry["id"], entry[score_key], entry["llm_rankings"]) for entry in entries]
+
+
+@pytest.mark.parametrize("payloads", [FIXED_PAYLOADS, _random_payloads(200)], ids=["fixed", "random"])
+def test_rank_sum_matches_baseline(payloads):
+    consensus = RankAggregator().aggregate(payloads)
+    assert len(consensus) == len(payloads)
+    for ranking_results, entries in zip(payloads, consensus):
+        expected = _baseline_rank_sum(ranking_results)
+        assert _comparable(entries, "score") == _comparable(expected, "total_score")
+
+
+def test_weights_scale_rank_sum():
+    payload = {"gemini": _ranking("a", "b"), "gpt": _ranking("b", "a")}
+    consensus = RankAggregator(weights={"gemini": 2}).aggregate([payload])[0]
+    # a: 2×1 + 2 = 4，b: 2×2 + 1 = 5
+    assert [(entry["id"], entry["score"]) for entry in consensus] == [("a", 4), ("b", 5)]
+
+
+def test_unknown_method_rejected():
+    with pytest.raises(ValueError):
+        RankAggregator(method="median")
@@ -0,0 +1,70 @@
+"""
+PositionAnalytics 测试
+在一个小的结果存储上检查经历需求矩阵、技能缺口和匹配度分布
+"""
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from analysis.analytics import PositionAnalytics
+from utils.result_store import ResultStore
+
+EXPERIENCES = [
+    {"id": "etl", "type": "project", "title": "ETL", "tech_stack": ["Python", "Airflow"]},
+    {"id": "web", "type": "project", "title": "Web", "tech_stack": ["React"]},
+    {"id": "unused", "type": "project", "title": "Unused", "tech_stack": ["Rust"]},
+]
+
+
+def _ranking(match, *exp_ids):
+    return {"match_percentage": match, "ranked_experiences": [
+        {"id": exp_id, "rank": rank, "justification": ""} for rank, exp_id in enumerate(exp_ids, 1)
+    ]}
+
+
+@pytest.fixture
+def analytics(tmp_path):
+    store = ResultStore(str(tmp_path / "results.db"))
+    positions = {
+        "jd1": ("Acme", "Remote", "Python and Kafka pipelines on AWS", {"gpt": _ranking(80, "etl", "web"),
+                                                                         "claude": _ranking(60, "etl")}),
+        "jd2": ("Acme", "NYC", "React frontend with Kafka events", {"gpt": _ranking(40, "web"),
+                                                                     "claude": {"error": "timeout"}}),
+        "jd3": ("Globex", "NYC", "Senior staff engineer, AWS", None),
+    }
+    for key, (company, location, jd, rankings) in positions.items():
+        store.save_position(key, {"company": company, "location": location, "job_description": jd})
+        if rankings is not None:
+            store.save_rankings(key, rankings, "lib", {}, "alice")
+    store.save_screening("jd3", "gemini", {"senior_level_required": True})
+    yield PositionAnalytics(store, EXPERIENCES, candidate="alice")
+    store.close()
+
+
+def test_experience_demand(analytics):
+    demand = analytics.experience_demand()
+    assert demand.loc["etl", ["gpt", "claude", "total"]].tolist() == [1, 1, 2]
+    assert demand.loc["web", ["gpt", "claude", "total"]].tolist() == [2, 0, 2]
+    assert demand.loc["etl", "position_share"] == 0.5
+    assert demand.loc["web", "position_share"] == 1.0
+    assert demand.loc["unused", "total"] == 0
+
+
+def test_skill_gaps(analytics):
+    gaps = analytics.skill_gaps().set_index("term")["positions"].to_dict()
+    # python、react 在经历库中，不算缺口
+    assert gaps == {"kafka": 2, "aws": 2}
+
+
+def test_match_distribution_and_summary(analytics):
+    by_company = analytics.match_distribution("company")
+    # jd1 两个模型平均 70，jd2 只有成功的模型 40
+    assert by_company.loc["Acme", ["count", "mean"]].tolist() == [2, 55.0]
+    assert "Globex" not in by_company.index
+    summary = analytics.summary()
+    assert (summary["total_positions"], summary["rejected_positions"], summary["ranked_positions"]) == (3, 1, 2)
@@ -0,0 +1,82 @@
+"""
+费用预算测试
+BudgetController 按实际 token 用量累计花费并逐级降级；BudgetTracker 按下一个职位的调用数检查调用次数预算
+"""
+
+import os
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from llm.budget import (BudgetController, STAGE_FULL, STAGE_ONE_RANKER, STAGE_SCREENING_ONLY, STAGE_STOPPED,
+                        STAGE_TWO_RANKERS)
+from scheduler import BudgetTracker, RunBudget
+
+# 每百万 token 的价格：输出单价 claude > gpt > gemini
+PRICING = {
+    "gemini": {"input": 1, "output": 2},
+    "gpt": {"input": 2, "output": 8},
+    "claude": {"input": 5, "output": 25},
+}
+
+
+def _spend(controller, dollars, per_call=1):
+    """以每次 per_call 美元的 gemini 调用累计花费 dollars 美元"""
+    for _ in range(round(dollars / per_call)):
+        controller.record("gemini", int(per_call * 1_000_000), 0)
+
+
+def test_record_accumulates_cost_and_usage():
+    controller = BudgetController(10, PRICING)
+    assert controller.record("gpt", 1_000_000, 500_000) == 6.0
+    controller.record("gpt", 0, 250_000)
+    assert controller.spent == 8.0
+    assert controller.usage["gpt"] == {"calls": 2, "prompt_tokens": 1_000_000, "completion_tokens": 750_000,
+                                       "dollars": 8.0}
+
+
+def test_stages_degrade_at_thresholds():
+    controller = BudgetController(100, PRICING)
+    expected = [(10, STAGE_FULL), (50, STAGE_TWO_RANKERS), (15, STAGE_ONE_RANKER), (15, STAGE_SCREENING_ONLY)]
+    for dollars, stage in expected:
+        _spend(controller, dollars)
+        assert controller.update_stage() == stage
+    assert [(d["from"], d["to"]) for d in controller.decisions] == [
+        (STAGE_FULL, STAGE_TWO_RANKERS), (STAGE_TWO_RANKERS, STAGE_ONE_RANKER),
+        (STAGE_ONE_RANKER, STAGE_SCREENING_ONLY),
+    ]
+
+
+def test_stops_when_remaining_below_average_call():
+    controller = BudgetController(100, PRICING)
+    _spend(controller, 96, per_call=24)
+    # 剩余 4 美元，不够再做一次平均 24 美元的调用
+    assert controller.update_stage() == STAGE_STOPPED
+
+
+def test_stage_never_upgrades():
+    controller = BudgetController(100, PRICING, degrade_at={STAGE_TWO_RANKERS: 0.5})
+    _spend(controller, 60)
+    assert controller.update_stage() == STAGE_TWO_RANKERS
+    controller.max_dollars = 1000
+    assert controller.update_stage() == STAGE_TWO_RANKERS
+
+
+def test_select_rankers_keeps_cheapest_in_config_order():
+    controller = BudgetController(100, PRICING)
+    models = ["claude", "gpt", "gemini"]
+    assert controller.select_rankers(models) == models
+    controller.stage = STAGE_TWO_RANKERS
+    assert controller.select_rankers(models) == ["gpt", "gemini"]
+    controller.stage = STAGE_ONE_RANKER
+    assert controller.select_rankers(models) == ["gemini"]
+    controller.stage = STAGE_SCREENING_ONLY
+    assert controller.select_rankers(models) == []
+
+
+def test_tracker_checks_next_position_calls():
+    tracker = BudgetTracker(RunBudget.parse("calls=10"))
+    tracker.record_calls(6)
+    assert tracker.exhausted_by(4) is None
+    assert tracker.exhausted_by(7) is not None
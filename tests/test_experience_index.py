@@ -0,0 +1,58 @@
+"""
+ExperienceIndex.needs_rerank 测试
+增量运行时经历库变更是否触发重新排名：无关的新增经历沿用排名，可能挤入前列或影响已入选经历时重排
+"""
+
+import os
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from utils.experience_index import ExperienceIndex
+
+JD = "We build data pipelines in Python and run Kafka streaming jobs."
+
+LIBRARY = [
+    {"id": "backend", "type": "project", "title": "Backend service", "tech_stack": ["Python"]},
+    {"id": "frontend", "type": "project", "title": "Dashboard redesign", "tech_stack": ["React"]},
+]
+# 已保存排名中的入选经历
+TOP_IDS = {"backend"}
+
+
+def _needs_rerank(experiences):
+    old = ExperienceIndex(LIBRARY)
+    new = ExperienceIndex(experiences)
+    return new.needs_rerank(JD, TOP_IDS, new.diff(old.hashes))
+
+
+def test_unchanged_library_keeps_ranking():
+    assert not _needs_rerank(list(LIBRARY))
+
+
+def test_added_experience_without_overlap_keeps_ranking():
+    added = {"id": "mobile", "type": "project", "title": "Photo editor app", "tech_stack": ["Swift"]}
+    assert not _needs_rerank(LIBRARY + [added])
+
+
+def test_added_experience_matching_description_words_reranks():
+    # tech_stack 与JD无关，只有描述中的实词（pipelines、kafka、streaming）重合
+    added = {"id": "etl", "type": "work", "title": "Streaming pipelines on Kafka", "tech_stack": ["Rust"]}
+    assert _needs_rerank(LIBRARY + [added])
+
+
+def test_modified_top_experience_reranks():
+    modified = dict(LIBRARY[0], title="Backend service rewrite")
+    assert _needs_rerank([modified, LIBRARY[1]])
+
+
+def test_removed_top_experience_reranks():
+    assert _needs_rerank([LIBRARY[1]])
+
+
+def test_reordered_library_keeps_ranking():
+    reordered = list(reversed(LIBRARY))
+    old, new = ExperienceIndex(LIBRARY), ExperienceIndex(reordered)
+    assert new.diff(old.hashes).is_empty()
+    assert not _needs_rerank(reordered)
@@ -0,0 +1,49 @@
+"""
+JSONFixer 解析结果测试
+在 benchmarks/data/malformed_responses.json 的畸形LLM响应上，断言解析出的对象与样本中的 expected 一致
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from utils.json_fixer import JSONFixer
+
+CORPUS_PATH = os.path.join(ROOT, "benchmarks", "data", "malformed_responses.json")
+
+with open(CORPUS_PATH, encoding="utf-8") as f:
+    CORPUS = json.load(f)
+
+
+@pytest.mark.parametrize("sample", CORPUS, ids=[f"{i}-{sample['kind']}" for i, sample in enumerate(CORPUS)])
+def test_corpus(sample):
+    assert JSONFixer.parse(sample["text"]) == sample["expected"]
+
+
+def test_trailing_comma_inside_string_is_kept():
+    text = '{"reason": "技能 [Python, SQL, ] 等, }", "rank": 1,}'
+    assert JSONFixer.parse(text) == {"reason": "技能 [Python, SQL, ] 等, }", "rank": 1}
+    # 单引号使 json.loads 失败，由容错解析器处理多余逗号
+    text = "{'reason': '技能 [Python, SQL, ] 等, }', 'rank': 1,}"
+    assert JSONFixer.parse(text) == {"reason": "技能 [Python, SQL, ] 等, }", "rank": 1}
+
+
+@pytest.mark.parametrize("fragment", ["tr", "fals", "nu", "Tru", "Non"])
+def test_truncated_literal_is_missing(fragment):
+    assert JSONFixer.parse('{"a": 1, "b": ' + fragment) == {"a": 1}
+    assert JSONFixer.parse('[1, ' + fragment) == [1]
+
+
+def test_complete_literal_at_end_is_kept():
+    assert JSONFixer.parse('{"a": true') == {"a": True}
+    assert JSONFixer.parse('{"a": None') == {"a": None}
+
+
+def test_no_json_raises():
+    with pytest.raises(json.JSONDecodeError):
+        JSONFixer.parse("抱歉，无法分析该职位")
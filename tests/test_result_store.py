@@ -0,0 +1,85 @@
+"""
+ResultStore 测试
+按候选人保存和读取排名、经历库快照，以及旧版单候选人记录（candidate 为空字符串）的读取与迁移
+"""
+
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from utils.result_store import ResultStore, jd_hash
+
+RANKING = {"match_percentage": 80, "ranked_experiences": [{"id": "a", "rank": 1, "justification": ""}]}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ResultStore(str(tmp_path / "results.db"))
+    yield store
+    store.close()
+
+
+def _candidates(store):
+    return sorted(row[0] for row in store.conn.execute("SELECT candidate FROM rankings"))
+
+
+def test_jd_hash_ignores_surrounding_whitespace():
+    assert jd_hash("  Python engineer\n") == jd_hash("Python engineer")
+
+
+def test_rankings_kept_per_candidate(store):
+    store.save_rankings("jd1", {"gpt": RANKING}, "lib_alice", {"a": "h1"}, "alice")
+    store.save_rankings("jd1", {"gpt": {"error": "timeout"}}, "lib_bob", {"b": "h2"}, "bob")
+    assert store.get_rankings("jd1", "alice") == ({"gpt": RANKING}, {"a": "h1"})
+    assert store.get_rankings("jd1", "bob") == ({"gpt": {"error": "timeout"}}, {"b": "h2"})
+    assert store.get_rankings("jd1", "carol") is None
+
+
+def test_revalidate_moves_rankings_to_new_library(store):
+    store.save_rankings("jd1", {"gpt": RANKING}, "lib_v1", {"a": "h1"}, "alice")
+    store.revalidate_rankings("jd1", "lib_v2", {"a": "h1", "b": "h2"}, "alice")
+    assert store.get_rankings("jd1", "alice") == ({"gpt": RANKING}, {"a": "h1", "b": "h2"})
+
+
+def test_load_history_falls_back_to_legacy_rows_without_migrating(store):
+    store.save_position("jd1", {"company": "A"})
+    store.save_position("jd2", {"company": "B"})
+    store.save_screening("jd1", "gemini", {"reason": "ok"})
+    store.save_rankings("jd1", {"gpt": RANKING}, "lib", {"a": "h1"}, "")
+    store.save_rankings("jd2", {"gpt": RANKING}, "lib", {"a": "h1"}, "")
+    store.save_rankings("jd2", {"claude": RANKING}, "lib", {"a": "h1"}, "alice")
+
+    positions, rankings = store.load_history("alice")
+    assert sorted(positions) == [("jd1", {"company": "A"}, {"reason": "ok"}), ("jd2", {"company": "B"}, None)]
+    # jd2 已有 alice 自己的排名，不再混入旧记录
+    assert sorted((key, model) for key, model, _ in rankings) == [("jd1", "gpt"), ("jd2", "claude")]
+    assert _candidates(store) == ["", "", "alice"]
+
+
+def test_adopt_only_matching_library(store):
+    store.save_rankings("jd1", {"gpt": RANKING}, "lib_alice", {"a": "h1"}, "")
+    store.save_rankings("jd2", {"gpt": RANKING}, "lib_bob", {"b": "h2"}, "")
+    assert store.adopt_unnamed_rankings("alice", "lib_alice") == 1
+    assert store.get_rankings("jd1", "alice") is not None
+    assert store.get_rankings("jd2", "") is not None
+
+
+def test_adopt_keeps_rows_for_positions_already_ranked(store):
+    store.save_rankings("jd1", {"gpt": RANKING}, "lib", {"a": "h1"}, "")
+    store.save_rankings("jd2", {"gpt": RANKING}, "lib", {"a": "h1"}, "")
+    store.save_rankings("jd1", {"claude": RANKING}, "lib", {"a": "h1"}, "alice")
+    assert store.adopt_unnamed_rankings("alice") == 1
+    assert _candidates(store) == ["", "alice", "alice"]
+    assert set(store.get_rankings("jd1", "alice")[0]) == {"claude"}
+
+
+def test_writes_from_threads(store):
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(lambda i: store.save_position(f"jd{i}", {"n": i}), range(20)))
+    positions, _ = store.load_history()
+    assert len(positions) == 20
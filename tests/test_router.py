@@ -0,0 +1,74 @@
+"""
+ModelRouter 测试
+冷启动按配置顺序；按（模型, 调用类型）的延迟和错误率绕开变慢或出错的模型
+"""
+
+import os
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from llm.router import RANKING, SCREENING, ModelRouter
+
+CONFIG = {
+    "min_samples": 3,
+    "max_error_rate": 0.5,
+    "slow_factor": 2.5,
+    "screening_candidates": ["gemini", "gpt"],
+    "ranking_candidates": ["gemini", "gpt", "claude"],
+    "min_rankers": 2,
+}
+
+
+def _record(router, llm_name, prompt_type, latency, ok=True, times=3):
+    for _ in range(times):
+        router.record(llm_name, prompt_type, latency, ok)
+
+
+def test_cold_start_uses_config_order():
+    router = ModelRouter(CONFIG)
+    assert router.screening_order() == ["gemini", "gpt"]
+    assert router.choose_rankers() == ["gemini", "gpt", "claude"]
+
+
+def test_screening_prefers_faster_healthy_model():
+    router = ModelRouter(CONFIG)
+    _record(router, "gemini", SCREENING, 4.0)
+    _record(router, "gpt", SCREENING, 1.0)
+    assert router.screening_order() == ["gpt", "gemini"]
+    _record(router, "gpt", SCREENING, 1.0, ok=False, times=6)
+    assert router.screening_order() == ["gemini", "gpt"]
+
+
+def test_slow_and_failing_rankers_dropped_down_to_min_rankers():
+    router = ModelRouter(CONFIG)
+    _record(router, "gemini", RANKING, 2.0)
+    _record(router, "gpt", RANKING, 2.5)
+    _record(router, "claude", RANKING, 9.0)
+    assert router.choose_rankers() == ["gemini", "gpt"]
+    # 只剩一个健康模型时仍保留 min_rankers 个，用较快的补齐
+    _record(router, "gpt", RANKING, 2.5, ok=False, times=6)
+    assert router.choose_rankers() == ["gemini", "claude"]
+
+
+def test_stats_kept_per_prompt_type():
+    router = ModelRouter(CONFIG)
+    # 排名调用本身就比筛选慢得多，不应因此被判为慢模型
+    _record(router, "gemini", SCREENING, 1.0, times=4)
+    _record(router, "claude", RANKING, 8.0)
+    _record(router, "gpt", RANKING, 7.0)
+    _record(router, "gemini", RANKING, 6.0)
+    assert router.choose_rankers() == ["gemini", "gpt", "claude"]
+    # 筛选出错不影响该模型的排名健康状态
+    _record(router, "gpt", SCREENING, 1.0, ok=False, times=6)
+    assert not router.is_healthy("gpt", SCREENING)
+    assert router.is_healthy("gpt", RANKING)
+
+
+def test_summary_labels_by_prompt_type():
+    router = ModelRouter(CONFIG)
+    _record(router, "gemini", SCREENING, 1.0)
+    _record(router, "gemini", RANKING, 5.0)
+    assert set(router.summary()["models"]) == {"gemini 筛选", "gemini 排名"}
+    assert router.describe("claude", RANKING) == "claude 排名: 无数据"
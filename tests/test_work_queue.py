@@ -0,0 +1,90 @@
+"""
+WorkQueue 测试
+幂等入队、租约领取、过期接管、失败重试、结果读取，以及多个线程共用同一实例
+"""
+
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from utils.work_queue import DONE, FAILED, LEASED, PENDING, WorkQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = WorkQueue(str(tmp_path / "queue.db"), max_attempts=2, retry_delay=0)
+    yield queue
+    queue.close()
+
+
+def test_enqueue_is_idempotent(queue):
+    assert queue.enqueue("a", {"n": 1})
+    assert not queue.enqueue("a", {"n": 2})
+    job = queue.claim("w1", 60)
+    assert (job.key, job.payload, job.attempts) == ("a", {"n": 1}, 1)
+
+
+def test_claim_in_order_and_skip_leased(queue):
+    queue.enqueue("a", {})
+    queue.enqueue("b", {})
+    assert queue.claim("w1", 60).key == "a"
+    assert queue.claim("w2", 60).key == "b"
+    assert queue.claim("w3", 60) is None
+    assert queue.counts()[LEASED] == 2
+
+
+def test_expired_lease_is_taken_over(queue):
+    queue.enqueue("a", {})
+    stale = queue.claim("w1", -1)
+    job = queue.claim("w2", 60)
+    assert job.key == "a" and job.attempts == 2
+    # 原进程的续约和完成都不再生效
+    assert not queue.heartbeat(stale, "w1", 60)
+    assert not queue.complete(stale, "w1", {"by": "w1"})
+    assert queue.complete(job, "w2", {"by": "w2"})
+    assert queue.results() == [{"by": "w2"}]
+
+
+def test_expired_lease_after_last_attempt_marks_failed(queue):
+    queue.enqueue("a", {})
+    queue.enqueue("b", {})
+    assert queue.claim("w1", -1).key == "a"
+    assert queue.claim("w2", -1).key == "a"
+    # a 的第二次尝试也已过期且用完次数：标记失败后继续领取下一个任务 b
+    job = queue.claim("w3", 60)
+    assert (job.key, job.attempts) == ("b", 1)
+    assert queue.counts() == {PENDING: 0, LEASED: 1, DONE: 0, FAILED: 1}
+    assert queue.claim("w4", 60) is None
+
+
+def test_fail_retries_then_keeps_last_result(queue):
+    queue.enqueue("a", {})
+    job = queue.claim("w1", 60)
+    queue.fail(job, "w1", "timeout")
+    assert queue.counts()[PENDING] == 1
+    job = queue.claim("w1", 60)
+    queue.fail(job, "w1", "timeout", {"partial": True})
+    assert queue.counts()[FAILED] == 1
+    assert queue.is_drained()
+    assert queue.results() == [{"partial": True}]
+
+
+def test_complete_marks_done(queue):
+    queue.enqueue("a", {})
+    job = queue.claim("w1", 60)
+    assert queue.heartbeat(job, "w1", 60)
+    assert queue.complete(job, "w1", {"ok": 1})
+    assert queue.counts()[DONE] == 1 and queue.is_drained()
+
+
+def test_claims_from_threads_are_distinct(queue):
+    for i in range(20):
+        queue.enqueue(f"job{i}", {})
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        jobs = list(pool.map(lambda i: queue.claim(f"w{i}", 60), range(20)))
+    assert sorted(job.key for job in jobs) == sorted(f"job{i}" for i in range(20))
@@ -0,0 +1,133 @@
+"""
+协作式取消
+SIGINT / SIGTERM 或到达截止时间（--deadline）时取消正在运行的任务，而不是直接结束进程：
+取消沿 await 链传播，分析代码收集已完成的职位后继续向上抛出，由调用方保存部分结果。
+第一次收到信号后恢复默认的信号处理，再次 Ctrl+C 立即退出。
+"""
+
+import asyncio
+import re
+import signal
+from typing import Any, List, Optional
+
+_DURATION = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*([smh]?)\s*$', re.I)
+_UNIT_SECONDS = {'s': 1, 'm': 60, 'h': 3600, '': 60}
+
+# 到达截止时间时的退出码（与 coreutils timeout 一致）；收到信号时为 128 + 信号值
+DEADLINE_EXIT_CODE = 124
+
+
+def parse_duration(text: str) -> float:
+    """
+    解析时长，如 "90s"、"30m"、"1.5h"；不带单位时按分钟计（与 --budget minutes 一致）
+
+    Returns:
+        float: 秒数
+
+    Raises:
+        ValueError: 格式错误或不为正数
+    """
+    match = _DURATION.match(text)
+    if not match or float(match.group(1)) <= 0:
+        raise ValueError(f"无效的时长: {text}（示例: 90s / 30m / 1.5h）")
+    return float(match.group(1)) * _UNIT_SECONDS[match.group(2).lower()]
+
+
+class AnalysisCancelled(asyncio.CancelledError):
+    """
+    分析被取消，携带取消前已完成的结果
+
+    是 CancelledError 的子类，不捕获它的代码看到的仍是普通的取消
+    """
+
+    def __init__(self, results: List[Any], unfinished: List[Any], deferred: List[Any]):
+        super().__init__("分析被中断")
+        self.results = results
+        self.unfinished = unfinished
+        self.deferred = deferred
+
+
+class GracefulStop:
+    """
+    在 with 块内监听 SIGINT / SIGTERM 和截止时间，触发时取消进入 with 块的任务
+
+    用法:
+        stop = GracefulStop(deadline)
+        with stop:
+            try:
+                await work()
+            except asyncio.CancelledError:
+                if not stop.requested:
+                    raise
+                stop.acknowledge()
+                ...  # 保存部分结果
+    """
+
+    def __init__(self, deadline: Optional[float] = None):
+        """
+        Args:
+            deadline: 从进入 with 块起允许运行的秒数，None 表示不限
+        """
+        self.deadline = deadline
+        self.reason: Optional[str] = None
+        self.exit_code = 0
+        self._loop = None
+        self._task = None
+        self._timer = None
+        self._handlers = {}
+
+    @property
+    def requested(self) -> bool:
+        return self.reason is not None
+
+    def __enter__(self) -> 'GracefulStop':
+        self._loop = asyncio.get_running_loop()
+        self._task = asyncio.current_task()
+        for sig in self._signals():
+            try:
+                self._loop.add_signal_handler(sig, self._on_signal, sig)
+                self._handlers[sig] = None
+            except (NotImplementedError, RuntimeError):
+                # Windows 的事件循环不支持 add_signal_handler，改用 signal.signal 转交给事件循环
+                self._handlers[sig] = signal.signal(
+                    sig, lambda signum, _frame: self._loop.call_soon_threadsafe(self._on_signal, signum)
+                )
+        if self.deadline is not None:
+            self._timer = self._loop.call_later(self.deadline, self.request,
+                                                f"到达截止时间 ({self.deadline:g}s)", DEADLINE_EXIT_CODE)
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._timer is not None:
+            self._timer.cancel()
+        self._restore_signals()
+
+    @staticmethod
+    def _signals() -> List[int]:
+        return [sig for sig in (getattr(signal, 'SIGINT', None), getattr(signal, 'SIGTERM', None)) if sig is not None]
+
+    def _restore_signals(self):
+        for sig, previous in self._handlers.items():
+            if previous is None:
+                self._loop.remove_signal_handler(sig)
+            else:
+                signal.signal(sig, previous)
+        self._handlers = {}
+
+    def _on_signal(self, signum: int):
+        self.request(f"收到 {signal.Signals(signum).name}", 128 + signum)
+
+    def request(self, reason: str, exit_code: int = 1):
+        """请求停止：取消任务（只生效一次），再次收到信号时按默认方式处理"""
+        if self.requested:
+            return
+        self.reason, self.exit_code = reason, exit_code
+        print(f"\n🛑 {reason}，取消进行中的请求并保存已完成的结果（再次 Ctrl+C 立即退出）")
+        self._restore_signals()
+        self._task.cancel()
+
+    def acknowledge(self):
+        """调用方已处理本次取消，之后的 await 照常执行"""
+        uncancel = getattr(self._task, 'uncancel', None)
+        if uncancel is not None:
+            uncancel()
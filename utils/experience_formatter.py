@@ -2,10 +2,16 @@
 将结构化的experiences.json 转为供LLM prompt使用的半结构化库字符串
 """
 
-from typing import List, Dict
+import hashlib
+import json
+from typing import List, Dict, Optional
 
 MAX_BULLETS = 6
 
+# 已格式化的经历库缓存：内容哈希 -> 库字符串
+_LIBRARY_CACHE: Dict[str, str] = {}
+_LIBRARY_CACHE_SIZE = 16
+
 
 def _truncate_bullets(bullets: List[str], max_len: int = MAX_BULLETS) -> List[str]:
     """保留前 max_len 条 bullet"""
@@ -52,4 +58,24 @@ def format_experiences_library(experiences: List[Dict]) -> str:
     """将整个经历列表格式化为字符串"""
     blocks = [format_single_experience(exp) for exp in experiences]
     library = "\n".join(blocks)
-    return f"==== 经历库 ====""\n" + library + "\n==== 结束====" 
\ No newline at end of file
+    return f"==== 经历库 ====""\n" + library + "\n==== 结束===="
+
+
+def format_experiences_library_cached(experiences: List[Dict], cache_key: Optional[str] = None) -> str:
+    """
+    按内容哈希缓存的 format_experiences_library
+
+    Args:
+        experiences: 经历列表
+        cache_key: 按经历顺序计算的内容哈希（如 ExperienceIndex.layout_hash），不提供时现算
+    """
+    if cache_key is None:
+        payload = json.dumps(experiences, sort_keys=True, ensure_ascii=False)
+        cache_key = hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+    library = _LIBRARY_CACHE.get(cache_key)
+    if library is None:
+        if len(_LIBRARY_CACHE) >= _LIBRARY_CACHE_SIZE:
+            _LIBRARY_CACHE.pop(next(iter(_LIBRARY_CACHE)))
+        library = _LIBRARY_CACHE[cache_key] = format_experiences_library(experiences)
+    return library 
\ No newline at end of file
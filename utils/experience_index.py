@@ -0,0 +1,157 @@
+"""
+经历索引
+为经历库中的每条经历计算内容哈希和关键词集合，
+用于增量重排（判断经历库变更会影响哪些职位）以及本地的廉价匹配打分
+"""
+
+import hashlib
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, Iterable, List, Set
+
+_WORD = re.compile(r'[a-z][a-z0-9+#]{2,}')
+_NON_TEXT_FIELDS = frozenset({"id", "type", "tech_stack"})
+# 描述和JD里都很常见、不说明相关性的词
+_STOPWORDS = frozenset("""
+    and the for with from that this into over under across using use used via per than then
+    are was were been being has have had will would can could should our your their its
+    all any each more most other such only also well new including within
+    team work working experience years year strong ability skills knowledge understanding
+    """.split())
+
+
+def experience_hash(exp: Dict[str, Any]) -> str:
+    """计算单条经历的内容哈希（与字段顺序无关）"""
+    payload = json.dumps(exp, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def library_hash(experience_hashes: Dict[str, str]) -> str:
+    """根据每条经历的哈希计算整个经历库的哈希"""
+    payload = json.dumps(experience_hashes, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def layout_hash(ordered_hashes: List[str]) -> str:
+    """按经历顺序计算的经历库哈希：调整顺序或重复的经历都会改变该哈希（prompt 中的经历库文本随之改变）"""
+    payload = json.dumps(ordered_hashes)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def _extract_terms(exp: Dict[str, Any]) -> FrozenSet[str]:
+    """提取经历的关键词（tech_stack，统一小写）"""
+    return frozenset(term.strip().lower() for term in exp.get("tech_stack", []) if term and term.strip())
+
+
+def _words(text: str) -> Set[str]:
+    """文本中的实词（小写英文单词，去掉常见虚词）"""
+    return set(_WORD.findall(text.lower())) - _STOPWORDS
+
+
+def _extract_words(exp: Dict[str, Any]) -> FrozenSet[str]:
+    """提取经历描述中的实词（标题、描述、成果要点等全部文本字段，不含 id/type/tech_stack）"""
+    words: Set[str] = set()
+    for key, value in exp.items():
+        if key in _NON_TEXT_FIELDS:
+            continue
+        for text in (value if isinstance(value, list) else [value]):
+            if isinstance(text, str):
+                words |= _words(text)
+    return frozenset(words)
+
+
+def _term_pattern(term: str) -> re.Pattern:
+    """为关键词构造按词边界匹配的正则（兼容 C++、.NET 这类带符号的词）"""
+    return re.compile(r'(?<![\w])' + re.escape(term) + r'(?![\w])')
+
+
+@dataclass
+class LibraryDiff:
+    """两个经历库版本之间的差异"""
+    added: Set[str] = field(default_factory=set)
+    removed: Set[str] = field(default_factory=set)
+    changed: Set[str] = field(default_factory=set)
+
+    def is_empty(self) -> bool:
+        return not (self.added or self.removed or self.changed)
+
+    def summary(self) -> str:
+        return f"新增 {len(self.added)} / 删除 {len(self.removed)} / 修改 {len(self.changed)}"
+
+
+class ExperienceIndex:
+    """经历库索引：内容哈希 + 关键词"""
+
+    def __init__(self, experiences: List[Dict[str, Any]]):
+        self.experiences = experiences
+        self.hashes: Dict[str, str] = {}
+        self.ordered_hashes: List[str] = []
+        self.terms: Dict[str, FrozenSet[str]] = {}
+        self.words: Dict[str, FrozenSet[str]] = {}
+        for exp in experiences:
+            exp_id = exp.get("id")
+            self.hashes[exp_id] = content_hash = experience_hash(exp)
+            self.ordered_hashes.append(content_hash)
+            self.terms[exp_id] = _extract_terms(exp)
+            self.words[exp_id] = _extract_words(exp)
+        self.library_hash = library_hash(self.hashes)
+        # 与顺序无关的 library_hash 用于判断排名是否可复用；格式化后的经历库文本按顺序缓存
+        self.layout_hash = layout_hash(self.ordered_hashes)
+
+        # 所有关键词共享一份编译好的正则，避免每个JD重复编译
+        all_terms = set().union(*self.terms.values()) if self.terms else set()
+        self._patterns = {term: _term_pattern(term) for term in all_terms}
+
+    def diff(self, old_hashes: Dict[str, str]) -> LibraryDiff:
+        """与旧版本经历库（id -> hash）比较"""
+        old_ids = set(old_hashes)
+        new_ids = set(self.hashes)
+        changed = {i for i in old_ids & new_ids if old_hashes[i] != self.hashes[i]}
+        return LibraryDiff(added=new_ids - old_ids, removed=old_ids - new_ids, changed=changed)
+
+    def jd_terms(self, jd_text: str) -> Set[str]:
+        """返回JD中出现的经历库关键词"""
+        text = jd_text.lower()
+        return {term for term, pattern in self._patterns.items() if term in text and pattern.search(text)}
+
+    def relevance(self, exp_id: str, jd_terms: Set[str]) -> int:
+        """经历与JD的关键词重合数"""
+        return len(self.terms.get(exp_id, frozenset()) & jd_terms)
+
+    def content_relevance(self, exp_id: str, jd_terms: Set[str], jd_words: Set[str]) -> int:
+        """经历与JD的内容重合数：关键词重合数 + 描述实词重合数"""
+        return self.relevance(exp_id, jd_terms) + len(self.words.get(exp_id, frozenset()) & jd_words)
+
+    def match_score(self, jd_text: str, top_k: int = 4) -> int:
+        """JD与整个经历库的本地匹配分：关键词重合数最高的 top_k 条经历之和"""
+        terms = self.jd_terms(jd_text)
+        scores = sorted((self.relevance(exp_id, terms) for exp_id in self.hashes), reverse=True)
+        return sum(scores[:top_k])
+
+    def needs_rerank(self, jd_text: str, top_ids: Iterable[str], diff: LibraryDiff) -> bool:
+        """
+        判断经历库变更是否可能影响该职位的排名
+
+        - 已入选的经历被删除或修改：必须重排
+        - 新增或修改的经历与JD有内容重合（tech_stack 关键词或描述、成果要点中的实词），
+          且不低于当前入选经历中最弱的一条：可能挤入前列，需要重排
+        - 其余情况沿用已有排名
+        """
+        if diff.is_empty():
+            return False
+
+        top_ids = set(top_ids)
+        if not top_ids or top_ids & (diff.removed | diff.changed):
+            return True
+
+        candidates = diff.added | (diff.changed - top_ids)
+        if not candidates:
+            return False
+
+        terms, words = self.jd_terms(jd_text), _words(jd_text)
+        weakest = min(self.content_relevance(exp_id, terms, words) for exp_id in top_ids)
+        return any(
+            score > 0 and score >= weakest
+            for score in (self.content_relevance(exp_id, terms, words) for exp_id in candidates)
+        )
@@ -0,0 +1,63 @@
+"""
+文件变更监听
+轮询文件的修改时间和大小（不依赖额外的库），供 --watch 常驻模式使用
+"""
+
+import asyncio
+import os
+from typing import Dict, List, Optional, Tuple
+
+Signature = Optional[Tuple[int, int]]
+
+
+def file_signature(path: str) -> Signature:
+    """文件的 (修改时间ns, 大小)，文件不存在时返回 None"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class FileWatcher:
+    """
+    轮询式文件监听
+
+    变更需要在连续两次轮询中保持一致才会上报，避免读到正在保存的半截文件
+    （Excel 等程序保存时往往分多次写入）
+    """
+
+    def __init__(self, paths: List[str], interval: float = 0.25):
+        self.paths = list(paths)
+        self.interval = interval
+        self._committed: Dict[str, Signature] = {path: file_signature(path) for path in self.paths}
+        self._pending: Dict[str, Signature] = {}
+
+    def poll(self) -> List[str]:
+        """检查一次，返回已稳定的变更文件"""
+        changed = []
+        for path in self.paths:
+            signature = file_signature(path)
+            if signature == self._committed[path]:
+                self._pending.pop(path, None)
+                continue
+            if path in self._pending and self._pending[path] == signature:
+                self._committed[path] = signature
+                del self._pending[path]
+                changed.append(path)
+            else:
+                self._pending[path] = signature
+        return changed
+
+    def acknowledge(self, path: str):
+        """把文件的当前状态视为已处理（本进程自己写入的变更不再上报）"""
+        self._committed[path] = file_signature(path)
+        self._pending.pop(path, None)
+
+    async def wait_for_change(self) -> List[str]:
+        """阻塞直到有文件发生（稳定的）变更"""
+        while True:
+            changed = self.poll()
+            if changed:
+                return changed
+            await asyncio.sleep(self.interval)
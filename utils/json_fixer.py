@@ -1,49 +1,318 @@
 """
 JSON格式自动修复工具
+单遍容错解析：定位LLM响应中的JSON对象，修复常见缺陷并只解析一次
 """
 
-import re
 import json
+from typing import Any, List, Tuple
+
+from utils.profiler import profiled, span
+
+_WHITESPACE = " \t\r\n"
+_LITERALS = {"true": True, "false": False, "null": None, "True": True, "False": False, "None": None}
+_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+_NUMBER_CHARS = frozenset("+-0123456789.eE")
+# 快速路径最多去掉的多余逗号数，更多时交给容错解析器
+_MAX_COMMA_FIXES = 8
+# 截断在字面量中间（如 "tr"）时的返回值：无法确定原值，当作缺失
+_MISSING = object()
+
+
+class _TolerantParser:
+    """
+    容错的递归下降JSON解析器
+
+    能处理：代码块标记和前后说明文字、多余逗号（只在结构层面跳过，字符串内的逗号原样保留）、
+    缺少逗号、输出被截断（自动补全未闭合的字符串/数组/对象；截断在 true/false/null
+    中间的值无法确定，对应的键或元素视为缺失）、字符串内未转义的英文双引号、
+    单引号字符串和 Python 风格的 True/False/None
+    """
+
+    __slots__ = ('text', 'pos', 'length')
+
+    def __init__(self, text: str, start: int):
+        self.text = text
+        self.pos = start
+        self.length = len(text)
+
+    def _skip_ws(self):
+        text, pos, length = self.text, self.pos, self.length
+        while pos < length and text[pos] in _WHITESPACE:
+            pos += 1
+        self.pos = pos
+
+    def _peek(self) -> str:
+        self._skip_ws()
+        return self.text[self.pos] if self.pos < self.length else ""
+
+    def parse(self) -> Any:
+        """解析顶层值；顶层值本身被截断而无法确定时抛出 JSONDecodeError"""
+        value = self.parse_value()
+        if value is _MISSING:
+            raise json.JSONDecodeError("响应在字面量中间被截断", self.text, self.pos)
+        return value
+
+    def parse_value(self) -> Any:
+        ch = self._peek()
+        if ch == "{":
+            return self._parse_object()
+        if ch == "[":
+            return self._parse_array()
+        if ch in ('"', "'"):
+            return self._parse_string(ch)
+        if ch and (ch in "-0123456789"):
+            return self._parse_number()
+        return self._parse_literal()
+
+    def _parse_object(self) -> dict:
+        self.pos += 1
+        result = {}
+        while True:
+            ch = self._peek()
+            if ch == "" or ch == "}":
+                self.pos += 1
+                return result
+            if ch == ",":
+                self.pos += 1
+                continue
+            if ch in ('"', "'"):
+                key = self._parse_string(ch, is_key=True)
+            else:
+                key = self._parse_bare_key()
+                if not key:
+                    # 无法识别的字符，跳过
+                    self.pos += 1
+                    continue
+            if self._peek() == ":":
+                self.pos += 1
+            if self._peek() in ("", "}"):
+                # 截断在键之后，丢弃没有值的键
+                continue
+            value = self.parse_value()
+            if value is not _MISSING:
+                result[key] = value
+
+    def _parse_bare_key(self) -> str:
+        start = self.pos
+        text = self.text
+        while self.pos < self.length and (text[self.pos].isalnum() or text[self.pos] == "_"):
+            self.pos += 1
+        return text[start:self.pos]
+
+    def _parse_array(self) -> list:
+        self.pos += 1
+        result = []
+        while True:
+            ch = self._peek()
+            if ch == "" or ch == "]":
+                self.pos += 1
+                return result
+            if ch == ",":
+                self.pos += 1
+                continue
+            if ch == "}":
+                # 括号不匹配，视为数组结束
+                return result
+            start = self.pos
+            value = self.parse_value()
+            if value is not _MISSING:
+                result.append(value)
+            if self.pos == start:
+                self.pos += 1
+
+    def _is_closing_quote(self, index: int, is_key: bool) -> bool:
+        """判断 index 处的引号是否是字符串结尾：其后（跳过空白）应为结构字符或文本结束"""
+        text, length = self.text, self.length
+        index += 1
+        while index < length and text[index] in _WHITESPACE:
+            index += 1
+        if index >= length:
+            return True
+        nxt = text[index]
+        if is_key:
+            return nxt == ":"
+        if nxt in "\"'" and "\n" in text[self.pos:index]:
+            # 换行后紧跟下一个键：缺少逗号的情况
+            return True
+        if nxt in ",}]:":
+            if nxt != ",":
+                return True
+            # 逗号之后应当是下一个键/值，否则是正文里的逗号
+            index += 1
+            while index < length and text[index] in _WHITESPACE:
+                index += 1
+            return index >= length or text[index] in "\"'{[]}-0123456789tfnTFN"
+        return False
+
+    def _parse_string(self, quote: str, is_key: bool = False) -> str:
+        text, length = self.text, self.length
+        self.pos += 1
+        chunks: List[str] = []
+        start = self.pos
+        while self.pos < length:
+            # 直接跳到下一个引号或反斜杠，普通字符不逐个检查
+            quote_at = text.find(quote, self.pos)
+            escape_at = text.find("\\", self.pos, quote_at if quote_at != -1 else length)
+            if escape_at == -1 and quote_at == -1:
+                self.pos = length
+                break
+            self.pos = escape_at if escape_at != -1 else quote_at
+            ch = text[self.pos]
+            if ch == "\\":
+                chunks.append(text[start:self.pos])
+                esc = text[self.pos + 1] if self.pos + 1 < length else ""
+                if esc == "u" and self.pos + 6 <= length:
+                    try:
+                        chunks.append(chr(int(text[self.pos + 2:self.pos + 6], 16)))
+                        self.pos += 6
+                    except ValueError:
+                        chunks.append(esc)
+                        self.pos += 2
+                else:
+                    chunks.append(_ESCAPES.get(esc, esc))
+                    self.pos += 2
+                start = self.pos
+                continue
+            if ch == quote:
+                if self._is_closing_quote(self.pos, is_key):
+                    chunks.append(text[start:self.pos])
+                    self.pos += 1
+                    return "".join(chunks)
+                # 字符串内部未转义的引号，按普通字符保留
+            self.pos += 1
+        # 截断在字符串中间
+        chunks.append(text[start:self.pos])
+        return "".join(chunks)
+
+    def _parse_number(self) -> Any:
+        start = self.pos
+        text = self.text
+        while self.pos < self.length and text[self.pos] in _NUMBER_CHARS:
+            self.pos += 1
+        raw = text[start:self.pos]
+        try:
+            return int(raw)
+        except ValueError:
+            pass
+        try:
+            return float(raw)
+        except ValueError:
+            # 截断的数字，例如 "8" 后面被切掉的 "5."
+            stripped = raw.rstrip("+-.eE")
+            try:
+                return float(stripped) if "." in stripped else int(stripped)
+            except ValueError:
+                return None
+
+    def _parse_literal(self) -> Any:
+        start = self.pos
+        text = self.text
+        while self.pos < self.length and text[self.pos].isalpha():
+            self.pos += 1
+        word = text[start:self.pos]
+        if word in _LITERALS:
+            return _LITERALS[word]
+        # 截断的字面量（如 "tr"、"fals"、"nu"）：补全会凭空得到一个值，交给上层按缺失字段处理
+        if word and self.pos >= self.length and any(literal.startswith(word) for literal in _LITERALS):
+            return _MISSING
+        # 无法识别的裸文本：读到结构字符为止，作为字符串
+        while self.pos < self.length and text[self.pos] not in ",}]\n":
+            self.pos += 1
+        return text[start:self.pos].strip() or None
 
 
 class JSONFixer:
     """JSON格式自动修复工具"""
-    
+
+    @staticmethod
+    def _locate(text: str) -> Tuple[int, int]:
+        """
+        定位JSON主体的起止位置（去掉代码块标记和前后的说明文字）
+
+        Returns:
+            Tuple[int, int]: (起始下标, 结束下标)；找不到时起始下标为 -1
+        """
+        # 响应约定为JSON对象，只有找不到对象时才退而寻找数组
+        start, closer = text.find("{"), "}"
+        if start == -1:
+            start, closer = text.find("["), "]"
+        if start == -1:
+            return -1, -1
+        end = text.rfind(closer)
+        return start, (end + 1 if end > start else len(text))
+
     @staticmethod
-    def fix_json(text: str) -> str:
+    def _trailing_comma(body: str, pos: int) -> int:
+        """json.loads 在 pos 处报错时，若 pos 处是 } 或 ] 且前一个非空白字符是逗号，返回逗号下标，否则返回 -1"""
+        if pos >= len(body) or body[pos] not in "}]":
+            return -1
+        pos -= 1
+        while pos >= 0 and body[pos] in _WHITESPACE:
+            pos -= 1
+        return pos if pos >= 0 and body[pos] == "," else -1
+
+    @classmethod
+    @profiled("json.parse")
+    def parse(cls, text: str) -> Any:
+        """
+        从LLM响应中提取并解析JSON，一次返回解析后的对象
+
+        绝大多数响应是合法JSON（可能包在代码块或说明文字里），此时只调用一次
+        C 实现的 json.loads；多余逗号按解码器报错的位置逐个去掉后重试；其余缺陷
+        由容错解析器在同一段文本上单遍修复解析。
+
+        Args:
+            text (str): 原始响应文本
+
+        Returns:
+            Any: 解析后的对象
+
+        Raises:
+            json.JSONDecodeError: 响应中找不到任何JSON结构
+        """
+        if not text:
+            raise json.JSONDecodeError("响应为空", text or "", 0)
+
+        start, end = cls._locate(text)
+        if start == -1:
+            raise json.JSONDecodeError("响应中未找到JSON对象", text, 0)
+
+        body = text[start:end]
+        try:
+            return json.loads(body)
+        except json.JSONDecodeError as error:
+            failure = error
+
+        with span("json.repair"):
+            for _ in range(_MAX_COMMA_FIXES):
+                # 多余逗号是最常见的缺陷：解码器报错的位置就是逗号后的 } 或 ]，
+                # 它已按JSON规则区分了字符串内外，去掉这一个逗号后再用C实现解析
+                comma = cls._trailing_comma(body, failure.pos)
+                if comma == -1:
+                    break
+                body = body[:comma] + body[comma + 1:]
+                try:
+                    return json.loads(body)
+                except json.JSONDecodeError as error:
+                    failure = error
+
+            # 在完整的剩余文本上解析，便于恢复被截断的输出
+            return _TolerantParser(text, start).parse()
+
+    @classmethod
+    def fix_json(cls, text: str) -> str:
         """
         自动修复常见的JSON格式问题
-        
+
         Args:
             text (str): 原始文本
-            
+
         Returns:
-            str: 修复后的JSON文本
+            str: 修复后的JSON文本；无法找到JSON时返回原文本，让上层处理
         """
         if not text:
             return text
-            
-        # 去除markdown标记
-        text = re.sub(r'```json\s*', '', text)
-        text = re.sub(r'```\s*', '', text)
-        
-        # 去除多余的空白字符
-        text = text.strip()
-        
-        # 尝试直接解析，如果成功就直接返回
         try:
-            json.loads(text)
-            return text
-        except json.JSONDecodeError:
-            pass
-        
-        # 修复多余的逗号（在}或]前）
-        text = re.sub(r',\s*([}\]])', r'\1', text)
-        
-        # 尝试再次解析
-        try:
-            json.loads(text)
-            return text
+            return json.dumps(cls.parse(text), ensure_ascii=False)
         except json.JSONDecodeError:
-            # 如果仍然失败，返回原文本，让上层处理
-            return text
+            return text.strip()
@@ -0,0 +1,232 @@
+"""
+运行时性能剖析
+按名称统计各阶段耗时（Excel解析、prompt渲染、LLM调用/网络/重试等待、JSON解析及其中的修复、报告生成等），
+并可监测事件循环延迟、导出 cProfile 和火焰图数据。
+
+未启用时 span() 返回共享的空上下文，profiled() 装饰的函数只多一次属性判断，开销可以忽略。
+阶段可以嵌套：通过 contextvars 记录当前任务的阶段栈，并发的协程各自统计，
+因此能得到每个阶段的自身耗时（去掉子阶段）和 flamegraph.pl / speedscope 可读的折叠栈。
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import functools
+import inspect
+import time
+import unicodedata
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Tuple
+
+# 当前任务的阶段栈，每一层为 [阶段名, 子阶段累计耗时]
+_stack: contextvars.ContextVar = contextvars.ContextVar('profiler_stack', default=())
+
+_NULL_SPAN = contextlib.nullcontext()
+
+
+def pad_display(text: str, width: int, right: bool = False) -> str:
+    """按显示宽度补齐（中文字符占两列）"""
+    shown = sum(2 if unicodedata.east_asian_width(ch) in 'WF' else 1 for ch in text)
+    fill = " " * max(width - shown, 0)
+    return fill + text if right else text + fill
+
+
+class StageStats:
+    """一个阶段的累计统计"""
+
+    __slots__ = ('count', 'total', 'self_total', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.self_total = 0.0
+        self.max = 0.0
+
+
+class _Span:
+    """一次阶段计时"""
+
+    __slots__ = ('profiler', 'name', 'frame', 'token', 'started')
+
+    def __init__(self, profiler: 'Profiler', name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.frame = [self.name, 0.0]
+        self.token = _stack.set(_stack.get() + (self.frame,))
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.started
+        path = _stack.get()
+        _stack.reset(self.token)
+        parent = _stack.get()
+        if parent:
+            parent[-1][1] += elapsed
+        # 并发的子阶段耗时之和可能超过父阶段，自身耗时不小于 0
+        self.profiler.record(tuple(name for name, _ in path), elapsed, max(elapsed - self.frame[1], 0.0))
+        return False
+
+
+class Profiler:
+    """阶段耗时统计器（进程内共享一个实例: utils.profiler.profiler）"""
+
+    def __init__(self):
+        self.enabled = False
+        self.stages: Dict[str, StageStats] = defaultdict(StageStats)
+        # 折叠栈 "a;b;c" -> 自身耗时（秒）
+        self.folded: Dict[str, float] = defaultdict(float)
+        self.loop_lags: List[float] = []
+        self.started = None
+        self._cprofile = None
+
+    def enable(self, cprofile: bool = False):
+        """
+        开始统计
+
+        Args:
+            cprofile: 同时用 cProfile 记录函数级调用（开销较大，仅在需要导出时开启）
+        """
+        self.enabled = True
+        self.started = time.perf_counter()
+        if cprofile:
+            import cProfile
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+    def disable(self):
+        """停止统计（已收集的数据保留）"""
+        self.enabled = False
+        if self._cprofile is not None:
+            self._cprofile.disable()
+
+    def span(self, name: str):
+        """阶段计时上下文，同步和异步代码中均可使用"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def record(self, path: Tuple[str, ...], elapsed: float, self_time: float):
+        """记录一次阶段耗时"""
+        stats = self.stages[path[-1]]
+        stats.count += 1
+        stats.total += elapsed
+        stats.self_total += self_time
+        stats.max = max(stats.max, elapsed)
+        self.folded[";".join(path)] += self_time
+
+    async def monitor_loop_lag(self, interval: float = 0.05):
+        """
+        事件循环延迟监测：每隔 interval 秒醒来一次，记录实际醒来时间比预期晚了多少。
+        延迟大说明有同步代码（如JSON修复、报告渲染、Excel解析）阻塞了事件循环。
+        作为后台任务运行，取消即停止。
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + interval
+            await asyncio.sleep(interval)
+            self.loop_lags.append(max(loop.time() - expected, 0.0))
+
+    def summary(self) -> Dict[str, Any]:
+        """统计结果：各阶段耗时（按总耗时降序）和事件循环延迟"""
+        wall = time.perf_counter() - self.started if self.started is not None else 0.0
+        stages = {
+            name: {
+                "count": stats.count,
+                "total": stats.total,
+                "self": stats.self_total,
+                "mean": stats.total / stats.count,
+                "max": stats.max,
+            }
+            for name, stats in sorted(self.stages.items(), key=lambda item: -item[1].total)
+        }
+        lags = sorted(self.loop_lags)
+        loop_lag = None
+        if lags:
+            loop_lag = {
+                "samples": len(lags),
+                "p50": lags[len(lags) // 2],
+                "p95": lags[min(int(len(lags) * 0.95), len(lags) - 1)],
+                "max": lags[-1],
+                "stalls": sum(1 for lag in lags if lag >= 0.1),
+            }
+        return {"wall": wall, "stages": stages, "loop_lag": loop_lag}
+
+    def format_report(self) -> str:
+        """可打印的阶段耗时表"""
+        summary = self.summary()
+        lines = [
+            f"⏱️ 阶段耗时 (运行 {summary['wall']:.2f}s；并发时阶段总计可能超过运行时间)",
+            "  " + pad_display("阶段", 26) + "".join(
+                pad_display(title, width, right=True)
+                for title, width in (("次数", 6), ("总计(s)", 10), ("自身(s)", 10), ("平均(ms)", 10), ("最大(ms)", 10))
+            ),
+        ]
+        for name, stage in summary["stages"].items():
+            lines.append(
+                f"  {name:<26}{stage['count']:>6}{stage['total']:>10.3f}{stage['self']:>10.3f}"
+                f"{stage['mean'] * 1000:>10.1f}{stage['max'] * 1000:>10.1f}"
+            )
+        if not summary["stages"]:
+            lines.append("  (没有记录到阶段)")
+        loop_lag = summary["loop_lag"]
+        if loop_lag:
+            lines.append(
+                f"🔁 事件循环延迟: p50 {loop_lag['p50'] * 1000:.1f} ms, p95 {loop_lag['p95'] * 1000:.1f} ms, "
+                f"最大 {loop_lag['max'] * 1000:.1f} ms, 阻塞≥100ms {loop_lag['stalls']} 次 ({loop_lag['samples']} 个采样)"
+            )
+        return "\n".join(lines)
+
+    def dump(self, prefix: str) -> List[str]:
+        """
+        导出剖析数据
+
+        - <prefix>.folded: 阶段折叠栈（自身耗时，微秒），可用 flamegraph.pl 或 speedscope 打开
+        - <prefix>.prof: cProfile 数据（启用 cprofile 时），可用 snakeviz / flameprof / pstats 查看
+
+        Returns:
+            写出的文件路径
+        """
+        paths = [f"{prefix}.folded"]
+        with open(paths[0], 'w', encoding='utf-8') as f:
+            for stack, seconds in sorted(self.folded.items()):
+                f.write(f"{stack} {max(int(seconds * 1_000_000), 1)}\n")
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            paths.append(f"{prefix}.prof")
+            self._cprofile.dump_stats(paths[1])
+        return paths
+
+
+profiler = Profiler()
+
+
+def span(name: str):
+    """在共享的 profiler 上计时一个阶段: with span("excel.load_positions"): ..."""
+    return profiler.span(name)
+
+
+def profiled(name: str) -> Callable:
+    """
+    阶段计时装饰器，支持普通函数和协程函数；未启用剖析时直接调用原函数
+    """
+    def decorate(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not profiler.enabled:
+                    return await func(*args, **kwargs)
+                with _Span(profiler, name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not profiler.enabled:
+                return func(*args, **kwargs)
+            with _Span(profiler, name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
@@ -0,0 +1,222 @@
+"""
+分析结果存储
+使用SQLite持久化每个职位的筛选和排名结果，以及排名时所用经历库的内容哈希，
+供增量运行（--since-last-run）判断哪些结果可以直接复用。
+排名按候选人区分（candidate，经历库文件名），筛选结果与候选人无关、共享
+等锁可能阻塞（busy timeout 30 秒），异步代码应通过 asyncio.to_thread 调用，不阻塞事件循环
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def jd_hash(jd_text: str) -> str:
+    """计算JD文本的内容哈希，作为职位在存储中的键"""
+    return hashlib.sha256(jd_text.strip().encode('utf-8')).hexdigest()[:16]
+
+
+class ResultStore:
+    """基于SQLite的分析结果存储"""
+
+    def __init__(self, db_path: str = "results.db"):
+        self.db_path = db_path
+        # WAL + 等待锁：多个工作进程可以同时写入同一个存储
+        # 连接可能在 asyncio.to_thread 的线程池中使用，由锁串行化
+        self.conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self._lock = threading.Lock()
+        self._init_schema()
+
+    def _init_schema(self):
+        """创建数据表"""
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS positions (
+                jd_hash TEXT PRIMARY KEY,
+                position_info TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS screenings (
+                jd_hash TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                result TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS libraries (
+                library_hash TEXT PRIMARY KEY,
+                experience_hashes TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS rankings (
+                jd_hash TEXT NOT NULL,
+                candidate TEXT NOT NULL DEFAULT '',
+                model TEXT NOT NULL,
+                result TEXT NOT NULL,
+                library_hash TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (jd_hash, candidate, model)
+            );
+        """)
+        self.conn.commit()
+        self._migrate_rankings()
+
+    def _migrate_rankings(self):
+        """
+        迁移旧版 rankings 表（没有 candidate 列，主键为 (jd_hash, model)）：
+        已有排名归属于单候选人模式（candidate 为空字符串）
+        """
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(rankings)")]
+        if "candidate" in columns:
+            return
+        print("🔧 迁移结果存储: rankings 表增加 candidate 列")
+        with self.conn:
+            self.conn.executescript("""
+                ALTER TABLE rankings RENAME TO rankings_old;
+                CREATE TABLE rankings (
+                    jd_hash TEXT NOT NULL,
+                    candidate TEXT NOT NULL DEFAULT '',
+                    model TEXT NOT NULL,
+                    result TEXT NOT NULL,
+                    library_hash TEXT NOT NULL,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (jd_hash, candidate, model)
+                );
+                INSERT INTO rankings (jd_hash, candidate, model, result, library_hash, updated_at)
+                    SELECT jd_hash, '', model, result, library_hash, updated_at FROM rankings_old;
+                DROP TABLE rankings_old;
+            """)
+
+    def save_position(self, key: str, position_info: Dict[str, Any]):
+        """保存职位基本信息"""
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO positions VALUES (?, ?, ?)",
+                (key, json.dumps(position_info, ensure_ascii=False), time.time())
+            )
+            self.conn.commit()
+
+    def save_screening(self, key: str, model: str, result: Dict[str, Any]):
+        """保存筛选结果"""
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO screenings VALUES (?, ?, ?, ?)",
+                (key, model, json.dumps(result, ensure_ascii=False), time.time())
+            )
+            self.conn.commit()
+
+    def get_screening(self, key: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """读取筛选结果，返回 (模型名, 结果)"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT model, result FROM screenings WHERE jd_hash = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            return row[0], json.loads(row[1])
+
+    def save_rankings(self, key: str, ranking_results: Dict[str, Dict[str, Any]],
+                      library_hash: str, experience_hashes: Dict[str, str], candidate: str = ""):
+        """保存某个候选人各模型的排名结果，并记录排名时经历库的快照"""
+        with self._lock:
+            now = time.time()
+            self.conn.execute(
+                "INSERT OR IGNORE INTO libraries VALUES (?, ?)",
+                (library_hash, json.dumps(experience_hashes, sort_keys=True))
+            )
+            self.conn.execute("DELETE FROM rankings WHERE jd_hash = ? AND candidate = ?", (key, candidate))
+            self.conn.executemany(
+                "INSERT INTO rankings (jd_hash, candidate, model, result, library_hash, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (key, candidate, model, json.dumps(result, ensure_ascii=False), library_hash, now)
+                    for model, result in ranking_results.items()
+                ]
+            )
+            self.conn.commit()
+
+    def get_rankings(self, key: str, candidate: str = "") -> Optional[Tuple[Dict[str, Dict[str, Any]], Dict[str, str]]]:
+        """读取某个候选人的排名结果，返回 (各模型排名, 排名时的经历哈希快照)"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT r.model, r.result, l.experience_hashes FROM rankings r "
+                "JOIN libraries l ON r.library_hash = l.library_hash WHERE r.jd_hash = ? AND r.candidate = ?",
+                (key, candidate)
+            ).fetchall()
+            if not rows:
+                return None
+            rankings = {model: json.loads(result) for model, result, _ in rows}
+            return rankings, json.loads(rows[0][2])
+
+    def revalidate_rankings(self, key: str, library_hash: str, experience_hashes: Dict[str, str],
+                            candidate: str = ""):
+        """经历库变更不影响该职位时，把已有排名标记为对应新版本经历库"""
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO libraries VALUES (?, ?)",
+                (library_hash, json.dumps(experience_hashes, sort_keys=True))
+            )
+            self.conn.execute(
+                "UPDATE rankings SET library_hash = ? WHERE jd_hash = ? AND candidate = ?", (library_hash, key, candidate)
+            )
+            self.conn.commit()
+
+    def load_history(self, candidate: str = "") -> Tuple[List[Tuple[str, Dict[str, Any], Optional[Dict[str, Any]]]],
+                                                         List[Tuple[str, str, Dict[str, Any]]]]:
+        """
+        读取全部历史结果（排名只取指定候选人的），供跨职位分析使用
+
+        只读：该候选人没有排名的职位使用旧版单候选人模式的记录（candidate 为空字符串），不迁移
+
+        Returns:
+            (positions, rankings):
+                positions: [(jd_hash, 职位信息, 筛选结果或None)]
+                rankings: [(jd_hash, 模型名, 排名结果)]
+        """
+        with self._lock:
+            positions = [
+                (key, json.loads(info), json.loads(screening) if screening else None)
+                for key, info, screening in self.conn.execute(
+                    "SELECT p.jd_hash, p.position_info, s.result FROM positions p "
+                    "LEFT JOIN screenings s ON p.jd_hash = s.jd_hash"
+                )
+            ]
+            rankings = [
+                (key, model, json.loads(result))
+                for key, model, result in self.conn.execute(
+                    "SELECT jd_hash, model, result FROM rankings WHERE candidate = ? OR (candidate = '' "
+                    "AND jd_hash NOT IN (SELECT jd_hash FROM rankings WHERE candidate = ?))", (candidate, candidate)
+                )
+            ]
+            return positions, rankings
+
+    def adopt_unnamed_rankings(self, candidate: str, library_hash: Optional[str] = None) -> int:
+        """
+        把旧版单候选人模式的排名（candidate 为空字符串）归属到指定候选人
+
+        之前只有一个经历库时排名记为空字符串，多个经历库时记为文件名，增加经历库后已有排名
+        无法复用；现在始终按文件名记录。只迁移该候选人还没有排名的职位，其余旧记录原样保留。
+
+        Args:
+            candidate: 候选人标识（经历库文件名）
+            library_hash: 只迁移排名时经历库快照为该哈希的记录；None 表示全部迁移（只有一个经历库时）
+
+        Returns:
+            int: 迁移的记录数
+        """
+        with self._lock:
+            query = ("UPDATE rankings SET candidate = ? WHERE candidate = '' "
+                     "AND jd_hash NOT IN (SELECT jd_hash FROM rankings WHERE candidate = ?)")
+            params: Tuple[str, ...] = (candidate, candidate)
+            if library_hash is not None:
+                query += " AND library_hash = ?"
+                params += (library_hash,)
+            moved = self.conn.execute(query, params).rowcount
+            self.conn.commit()
+            return moved
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self.conn.close()
@@ -0,0 +1,190 @@
+"""
+基于SQLite的本地任务队列
+生产者把职位写入队列，多个工作进程通过租约领取任务：
+- 领取时设置租约到期时间，处理期间定期续约
+- 进程崩溃后租约过期，任务会被其他进程重新领取
+- 失败的任务延迟后重试，超过最大尝试次数标记为失败
+等锁可能阻塞（busy timeout 30 秒），异步代码应通过 asyncio.to_thread 调用，不阻塞事件循环
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+PENDING = 'pending'
+LEASED = 'leased'
+DONE = 'done'
+FAILED = 'failed'
+
+
+@dataclass
+class Job:
+    """一个已领取的任务"""
+    id: int
+    key: str
+    payload: Dict[str, Any]
+    attempts: int
+
+
+class WorkQueue:
+    """SQLite任务队列（WAL模式，可被多个进程同时使用；同一实例可在多个线程中调用，操作由锁串行化）"""
+
+    def __init__(self, db_path: str = "queue.db", max_attempts: int = 3, retry_delay: float = 5.0):
+        """
+        Args:
+            db_path: 队列数据库路径
+            max_attempts: 每个任务的最大尝试次数
+            retry_delay: 失败后重新可领取前的等待时间（秒），按尝试次数线性增加
+        """
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        # isolation_level=None: 手动控制事务，领取任务时用 BEGIN IMMEDIATE 加写锁
+        self.conn = sqlite3.connect(db_path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self._lock = threading.Lock()
+        self._init_schema()
+
+    def _init_schema(self):
+        """创建数据表"""
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                job_key TEXT NOT NULL UNIQUE,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                available_at REAL NOT NULL,
+                lease_owner TEXT,
+                lease_expires REAL,
+                result TEXT,
+                error TEXT,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, available_at);
+        """)
+
+    def enqueue(self, key: str, payload: Dict[str, Any]) -> bool:
+        """
+        加入一个任务；相同 key 的任务已存在时忽略（重复运行生产者是幂等的）
+
+        Returns:
+            bool: 是否新加入
+        """
+        now = time.time()
+        with self._lock:
+            cursor = self.conn.execute(
+                "INSERT OR IGNORE INTO jobs (job_key, payload, status, available_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (key, json.dumps(payload, ensure_ascii=False, default=str), PENDING, now, now)
+            )
+        return cursor.rowcount > 0
+
+    def claim(self, worker_id: str, lease_seconds: float) -> Optional[Job]:
+        """
+        领取一个可执行的任务：待处理且已到重试时间，或租约已过期（原进程可能已崩溃）
+        """
+        with self._lock:
+            while True:
+                now = time.time()
+                self.conn.execute("BEGIN IMMEDIATE")
+                try:
+                    row = self.conn.execute(
+                        "SELECT id, job_key, payload, attempts FROM jobs "
+                        "WHERE (status = ? AND available_at <= ?) OR (status = ? AND lease_expires < ?) "
+                        "ORDER BY id LIMIT 1",
+                        (PENDING, now, LEASED, now)
+                    ).fetchone()
+                    if row is None:
+                        self.conn.execute("COMMIT")
+                        return None
+                    job_id, key, payload, attempts = row
+                    if attempts >= self.max_attempts:
+                        # 租约过期但已用完尝试次数：最后一次尝试中崩溃，标记失败后继续找下一个
+                        self.conn.execute(
+                            "UPDATE jobs SET status = ?, error = COALESCE(error, ?), updated_at = ? WHERE id = ?",
+                            (FAILED, "租约过期（工作进程可能已崩溃）", now, job_id)
+                        )
+                        self.conn.execute("COMMIT")
+                        continue
+                    self.conn.execute(
+                        "UPDATE jobs SET status = ?, attempts = attempts + 1, lease_owner = ?, lease_expires = ?, "
+                        "updated_at = ? WHERE id = ?",
+                        (LEASED, worker_id, now + lease_seconds, now, job_id)
+                    )
+                    self.conn.execute("COMMIT")
+                except BaseException:
+                    self.conn.execute("ROLLBACK")
+                    raise
+                return Job(job_id, key, json.loads(payload), attempts + 1)
+
+    def heartbeat(self, job: Job, worker_id: str, lease_seconds: float) -> bool:
+        """
+        续约；租约已被其他进程接管时返回 False
+        """
+        with self._lock:
+            cursor = self.conn.execute(
+                "UPDATE jobs SET lease_expires = ?, updated_at = ? WHERE id = ? AND status = ? AND lease_owner = ?",
+                (time.time() + lease_seconds, time.time(), job.id, LEASED, worker_id)
+            )
+        return cursor.rowcount > 0
+
+    def complete(self, job: Job, worker_id: str, result: Dict[str, Any]) -> bool:
+        """标记任务完成并保存结果；租约已被接管时不覆盖"""
+        payload = json.dumps(result, ensure_ascii=False, default=str)
+        with self._lock:
+            cursor = self.conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = NULL, lease_owner = NULL, updated_at = ? "
+                "WHERE id = ? AND status = ? AND lease_owner = ?",
+                (DONE, payload, time.time(), job.id, LEASED, worker_id)
+            )
+        return cursor.rowcount > 0
+
+    def fail(self, job: Job, worker_id: str, error: str, result: Optional[Dict[str, Any]] = None):
+        """
+        记录一次失败：未超过最大尝试次数时延迟后重新排队，否则标记为失败（保留最后一次的结果）
+        """
+        now = time.time()
+        if job.attempts >= self.max_attempts:
+            status, available_at = FAILED, now
+        else:
+            status, available_at = PENDING, now + self.retry_delay * job.attempts
+        payload = json.dumps(result, ensure_ascii=False, default=str) if result is not None else None
+        with self._lock:
+            self.conn.execute(
+                "UPDATE jobs SET status = ?, available_at = ?, error = ?, result = ?, lease_owner = NULL, "
+                "updated_at = ? WHERE id = ? AND status = ? AND lease_owner = ?",
+                (status, available_at, error, payload, now, job.id, LEASED, worker_id)
+            )
+
+    def counts(self) -> Dict[str, int]:
+        """各状态的任务数"""
+        counts = {PENDING: 0, LEASED: 0, DONE: 0, FAILED: 0}
+        with self._lock:
+            counts.update(dict(self.conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status")))
+        return counts
+
+    def is_drained(self) -> bool:
+        """是否已没有待处理或处理中的任务"""
+        counts = self.counts()
+        return counts[PENDING] == 0 and counts[LEASED] == 0
+
+    def results(self) -> List[Dict[str, Any]]:
+        """按入队顺序返回已有结果的任务（已完成的，以及失败但保留了最后结果的）"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT result FROM jobs WHERE status IN (?, ?) AND result IS NOT NULL ORDER BY id", (DONE, FAILED)
+            ).fetchall()
+        return [json.loads(result) for (result,) in rows]
+
+    def close(self):
+        """关闭数据库连接"""
+        self.conn.close()
+
+
+def worker_id() -> str:
+    """当前进程的工作进程标识"""
+    return f"{os.uname().nodename if hasattr(os, 'uname') else 'local'}:{os.getpid()}"
@@ -0,0 +1,88 @@
+"""
+职位表回写
+把分析结论（状态、匹配度、推荐经历）批量写回职位表：
+- 一次加载、一次保存，所有行在同一次写入中更新
+- .xlsm 文件保留宏（keep_vba）
+- 先保存到同目录的临时文件，再用 os.replace 原子替换，保存中途失败不会损坏原文件
+"""
+
+import math
+import os
+import stat
+import tempfile
+from typing import Any, Callable, Dict, Hashable
+
+# 回写的列名和状态值，可在配置文件的 write_back 中覆盖
+DEFAULT_SETTINGS = {
+    "match_column": "match %",
+    "top_ids_column": "top experiences",
+    "rejected_status": "rejected",
+    "suitable_status": "analyzed",
+}
+
+# load_positions 只选择这一列为空的职位
+STATUS_COLUMN = "status"
+
+
+def write_back(path: str, sheet_name: Any, updates: Dict[Hashable, Dict[str, Any]],
+               row_key: Callable[[Dict[str, Any]], Hashable]) -> int:
+    """
+    把 updates 中的列值写回工作表
+
+    行通过 row_key 匹配：它接收 {列名: 单元格值} 的行（空单元格为 NaN，与 pandas 读取的结果一致），
+    返回的标识在 updates 中时更新该行；相同标识的多行都会更新。工作表中没有的列会追加在表头末尾。
+
+    Args:
+        path: 职位表路径（.xlsx / .xlsm）
+        sheet_name: 工作表名或序号
+        updates: 行标识 -> {列名: 新值}
+        row_key: 计算行标识的函数
+
+    Returns:
+        int: 更新的行数；没有需要更新的行时不写文件
+    """
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(path, keep_vba=path.lower().endswith('.xlsm'))
+    try:
+        sheet = workbook.worksheets[sheet_name] if isinstance(sheet_name, int) else workbook[sheet_name]
+        columns = {cell.value: cell.column for cell in sheet[1] if cell.value is not None}
+        for change in updates.values():
+            for name in change:
+                if name not in columns:
+                    columns[name] = sheet.max_column + 1
+                    sheet.cell(row=1, column=columns[name], value=name)
+
+        updated = 0
+        for row in sheet.iter_rows(min_row=2):
+            values = {
+                name: math.nan if row[column - 1].value is None else row[column - 1].value
+                for name, column in columns.items() if column <= len(row)
+            }
+            change = updates.get(row_key(values))
+            if change is None:
+                continue
+            for name, value in change.items():
+                sheet.cell(row=row[0].row, column=columns[name], value=value)
+            updated += 1
+
+        if updated:
+            _atomic_save(workbook, path)
+        return updated
+    finally:
+        workbook.close()
+
+
+def _atomic_save(workbook, path: str):
+    """保存到同目录的临时文件（相同扩展名，保留原文件权限），再原子替换原文件"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix=".~writeback-", suffix=os.path.splitext(path)[1], dir=directory)
+    os.close(fd)
+    try:
+        workbook.save(temp_path)
+        os.chmod(temp_path, stat.S_IMODE(os.stat(path).st_mode))
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise